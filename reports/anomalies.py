@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Streaming anomaly detector for tone and dissonance
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Follows the ``sentiment`` table the way rollup.py does: each refresh reads
+only the rows past its own rowid watermark and folds them, in ingest order,
+into a small per-country, per-metric state in ``anomaly_state``. That state
+holds the EWMA mean and variance, two-sided CUSUM sums and the running
+min/max. History is never rescanned, so scoring a refresh costs the same
+on day 10 as on day 1000.
+
+Each new value is scored against the state from before it:
+
+- ``spike``:  |z| >= Z_THRESHOLD, where z = (value - EWMA mean) / EWMA std
+- ``shift``:  a CUSUM of z (each step capped at Z_THRESHOLD, so one spike
+  cannot trip it alone) passes CUSUM_H; the sums then restart at zero
+- ``record``: dissonance above the country's highest value seen so far
+
+Events go into ``anomalies``, which publish.py serves as /api/anomalies.
+Nothing is scored until a country has WARMUP values for a metric.
+Snapshots replaced in place by the ingest are not rescored; run
+``--rebuild`` to replay the raw rows that are still in the database.
+
+Usage:
+    python reports/anomalies.py [--db PATH] [--rebuild] [--list N]
+"""
+
+import argparse
+import math
+import sqlite3
+import sys
+
+import migrate
+import rollup
+
+WATERMARK = 'anomalies'
+
+METRICS = ('tone_internal', 'tone_external', 'dissonance')
+# Metrics that also raise ``record`` events when they pass their running max
+RECORD_METRICS = ('dissonance',)
+
+# EWMA smoothing: weight of the newest snapshot (~1/ALPHA snapshots of memory)
+ALPHA = 0.1
+# Values folded in before a country's metric is scored at all
+WARMUP = 10
+Z_THRESHOLD = 3.0
+# Tone points; keeps a near-constant series from turning noise into huge z
+MIN_STD = 0.25
+# CUSUM slack and decision threshold, in standard deviations (tone series drift,
+# so the slack is wider than the textbook 0.5)
+CUSUM_K = 1.0
+CUSUM_H = 5.0
+
+# Events per /api/anomalies payload, newest first
+RECENT_LIMIT = 200
+
+_STATE_FIELDS = ('n', 'mean', 'var', 'cusum_high', 'cusum_low', 'min', 'max', 'last_timestamp')
+
+
+def new_state():
+    return {'n': 0, 'mean': None, 'var': 0.0, 'cusum_high': 0.0, 'cusum_low': 0.0,
+            'min': None, 'max': None, 'last_timestamp': None}
+
+
+def observe(state, value, records=False):
+    """Score ``value`` against ``state``, then fold it in; returns [(kind, expected, score)]"""
+    events = []
+    n, mean, var = state['n'], state['mean'], state['var']
+    if n >= WARMUP:
+        z = (value - mean) / max(math.sqrt(var), MIN_STD)
+        if abs(z) >= Z_THRESHOLD:
+            events.append(('spike', mean, z))
+        step = max(-Z_THRESHOLD, min(Z_THRESHOLD, z))
+        high = max(0.0, state['cusum_high'] + step - CUSUM_K)
+        low = max(0.0, state['cusum_low'] - step - CUSUM_K)
+        if high >= CUSUM_H or low >= CUSUM_H:
+            events.append(('shift', mean, high if high >= low else -low))
+            high = low = 0.0
+        state['cusum_high'], state['cusum_low'] = high, low
+        if records and value > state['max']:
+            events.append(('record', state['max'], value - state['max']))
+
+    if n == 0:
+        state['mean'] = value
+    else:
+        # Incremental EWMA mean and variance (West, 1979)
+        diff = value - mean
+        increment = ALPHA * diff
+        state['mean'] = mean + increment
+        state['var'] = (1 - ALPHA) * (var + diff * increment)
+    state['n'] = n + 1
+    state['min'] = value if state['min'] is None else min(state['min'], value)
+    state['max'] = value if state['max'] is None else max(state['max'], value)
+    return events
+
+
+def _load_states(conn, last, newest):
+    """States of the countries that have rows in the (last, newest] rowid range"""
+    rows = conn.execute(f"""
+        SELECT country_code, metric, {', '.join(_STATE_FIELDS)}
+        FROM anomaly_state
+        WHERE country_code IN (SELECT DISTINCT country_code FROM sentiment WHERE rowid > ? AND rowid <= ?)
+    """, (last, newest))
+    return {(code, metric): dict(zip(_STATE_FIELDS, values)) for code, metric, *values in rows}
+
+
+def _save_states(conn, states):
+    updates = ",\n".join(f"{f} = excluded.{f}" for f in _STATE_FIELDS)
+    conn.executemany(f"""
+        INSERT INTO anomaly_state (country_code, metric, {', '.join(_STATE_FIELDS)})
+        VALUES (?, ?, {', '.join('?' * len(_STATE_FIELDS))})
+        ON CONFLICT (country_code, metric) DO UPDATE SET
+        {updates}
+    """, [(code, metric, *(state[f] for f in _STATE_FIELDS)) for (code, metric), state in states.items()])
+
+
+def refresh(conn):
+    """Score sentiment rows added since the last run. Returns how many events were raised.
+
+    Like rollup.refresh(), joins the caller's transaction if one is open, so
+    the ingest commits raw rows, rollups and anomalies together.
+    """
+    with migrate.write_transaction(conn):
+        last = rollup.get_watermark(conn, WATERMARK)
+        newest = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM sentiment").fetchone()[0]
+        if newest <= last:
+            return 0
+        states = _load_states(conn, last, newest)
+        events = []
+        rows = conn.execute(f"""
+            SELECT rowid, country_code, timestamp, {', '.join(METRICS)}
+            FROM sentiment
+            WHERE rowid > ? AND rowid <= ?
+            ORDER BY rowid
+        """, (last, newest))
+        for rowid, code, timestamp, *values in rows:
+            for metric, value in zip(METRICS, values):
+                if value is None:
+                    continue
+                state = states.setdefault((code, metric), new_state())
+                for kind, expected, score in observe(state, value, metric in RECORD_METRICS):
+                    events.append((code, timestamp, metric, kind, value, expected, score, rowid))
+                state['last_timestamp'] = timestamp
+        conn.executemany("""
+            INSERT INTO anomalies (country_code, timestamp, metric, kind, value, expected, score, sentiment_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, events)
+        _save_states(conn, states)
+        rollup.set_watermark(conn, newest, WATERMARK)
+    return len(events)
+
+
+def rebuild(conn):
+    """Forget every state and event, then replay all raw rows in the database"""
+    with migrate.write_transaction(conn):
+        conn.execute("DELETE FROM anomaly_state")
+        conn.execute("DELETE FROM anomalies")
+        rollup.set_watermark(conn, 0, WATERMARK)
+        return refresh(conn)
+
+
+def recent(db, limit=RECENT_LIMIT, since=None):
+    """Newest events first, optionally only from ``since`` (ISO timestamp) on; [] before migration 6
+
+    ``db`` is anything with a ``query()`` method, as for rollup.read_rollup().
+    """
+    try:
+        return db.query("""
+            SELECT a.country_code, c.name, a.timestamp, a.metric, a.kind, a.value, a.expected, a.score
+            FROM anomalies a
+            LEFT JOIN countries c ON a.country_code = c.code
+            WHERE a.timestamp >= ?
+            ORDER BY a.timestamp DESC, a.id DESC
+            LIMIT ?
+        """, (since or '', limit))
+    except sqlite3.OperationalError:
+        return []
+
+
+def main():
+    from generate_pulse_report import DB_PATH
+    from pulse_db import PulseDB
+
+    parser = argparse.ArgumentParser(description="Score new sentiment rows for tone and dissonance anomalies")
+    parser.add_argument('--db', default=DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--rebuild', action='store_true', help="replay every raw row from a clean state")
+    parser.add_argument('--list', type=int, metavar='N', help="then print the N most recent events")
+    args = parser.parse_args()
+
+    conn = migrate.connect(args.db)
+    migrate.migrate(conn)
+    raised = rebuild(conn) if args.rebuild else refresh(conn)
+    conn.close()
+    print(f"✓ {raised} anomalies raised{' (rebuilt)' if args.rebuild else ''}")
+    if args.list:
+        db = PulseDB(args.db)
+        for event in recent(db, args.list):
+            print(f"  {event['timestamp']}  {event['country_code']:<4} {event['metric']:<14} "
+                  f"{event['kind']:<7} {event['value']:8.2f}  (expected {event['expected']:.2f}, "
+                  f"score {event['score']:+.2f})")
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
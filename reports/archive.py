@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Week-partitioned Parquet cold archive for sentiment, analyses and articles
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Closed weeks older than KEEP_WEEKS move out of sensmundi.db into
+``archive/<table>/week=<Monday>/part-0.parquet`` next to the database
+(hive-style, so ``pyarrow.dataset`` or DuckDB can read a whole table for
+long-range analyses). Rows are deleted from the hot database in the same
+transaction that records the week in ``archive_weeks``, after the rollups
+and the anomaly detector have caught up with them. The rollup tables keep
+every week, so the overview and regional sections never need the archive.
+
+The report getters that read raw rows run inside covering(). When the
+range includes archived weeks, those weeks are read with memory mapping,
+only for the columns the report uses (REPORT_COLUMNS) and the range's rows,
+into temp tables. For the duration of the block, temp views named like the
+real tables put them together with the hot rows (UNION ALL), which stay
+where they are and keep their indexes. A range with no archived weeks never
+touches this module's optional dependency (``pyarrow``) and queries the
+real tables directly.
+
+Usage:
+    python reports/archive.py [--db PATH] [--keep-weeks N] [--dry-run] [--vacuum]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import anomalies
+import migrate
+import rollup
+from pulse_db import PulseDB
+
+# Weeks kept hot in sensmundi.db, counting back from the current one
+KEEP_WEEKS = 12
+
+# table -> column that places a row in a week
+TIME_COLUMNS = {
+    'sentiment': 'timestamp',
+    'analyses': 'timestamp',
+    'articles': 'fetched_at',
+}
+
+# Columns the report reads back from archived weeks (the temp tables have only these)
+REPORT_COLUMNS = {
+    'sentiment': ['id', 'country_code', 'timestamp', 'tone_internal', 'tone_external', 'dissonance',
+                  'article_count_internal', 'article_count_external', 'timeline_internal', 'timeline_external'],
+    'analyses': ['id', 'country_code', 'timestamp', 'tension_level', 'summary_en', 'context_en'],
+    'articles': ['id', 'country_code', 'title', 'title_en', 'source', 'source_type', 'tone', 'fetched_at'],
+}
+
+# table -> the natural key the ingest upserts on; an archived week keeps one row per key
+NATURAL_KEYS = {table: columns.split(', ') for table, columns in migrate.UNIQUE_INDEXES.values()}
+
+# Stored as bytes: packed timelines are BLOBs, unpackable ones JSON text (see timeline_codec)
+BINARY_COLUMNS = {'timeline_internal', 'timeline_external'}
+
+# Indexes on the archived rows' temp tables: they hold only the range's rows,
+# so the time indexes are not needed, only the sentiment <-> analyses joins'
+ARCHIVED_INDEXES = {
+    'idx_archived_sentiment_country_ts': ('sentiment', 'country_code, timestamp'),
+    'idx_archived_analyses_country_ts': ('analyses', 'country_code, timestamp'),
+}
+
+BATCH_SIZE = 5000
+
+
+def archive_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'archive')
+
+
+def week_path(root, table, week):
+    return os.path.join(root, table, f"week={week}", 'part-0.parquet')
+
+
+def _monday(day):
+    day = date.fromisoformat(day[:10]) if isinstance(day, str) else day
+    return day - timedelta(days=day.weekday())
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("the Parquet archive needs pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def archived_weeks(conn, start=None, end=None):
+    """Mondays of archived weeks overlapping ``start``..``end`` (all when omitted); [] before migration 5"""
+    first = _monday(start).isoformat() if start else ''
+    last = end or '9999'
+    try:
+        return [row[0] for row in conn.execute(
+            "SELECT week FROM archive_weeks WHERE week >= ? AND week <= ? ORDER BY week", (first, last))]
+    except sqlite3.OperationalError:
+        return []
+
+
+def hot_since(conn):
+    """First day still held in sensmundi.db, or None when nothing was archived"""
+    weeks = archived_weeks(conn)
+    return (date.fromisoformat(weeks[-1]) + timedelta(days=7)).isoformat() if weeks else None
+
+
+# --- Writing ---
+
+def _schema(pa, conn, table):
+    types = {'INTEGER': pa.int64(), 'REAL': pa.float64(), 'TEXT': pa.string()}
+    return pa.schema([(name, pa.binary() if name in BINARY_COLUMNS else types.get(decl.upper(), pa.binary()))
+                      for _cid, name, decl, *_rest in conn.execute(f"PRAGMA main.table_info({table})")])
+
+
+def _coerce(value, kind):
+    # SQLite columns are dynamically typed; Parquet columns are not
+    if value is None:
+        return None
+    if kind == 'binary':
+        return value.encode('utf-8') if isinstance(value, str) else bytes(value)
+    if kind == 'string':
+        return value if isinstance(value, str) else str(value)
+    if kind == 'int64':
+        return int(value)
+    return float(value)
+
+
+def _week_table(pa, conn, table, schema, lo, hi):
+    kinds = [str(field.type) for field in schema]
+    columns = [[] for _ in kinds]
+    cursor = conn.execute(f"SELECT {', '.join(schema.names)} FROM main.{table} "
+                          f"WHERE {TIME_COLUMNS[table]} >= ? AND {TIME_COLUMNS[table]} < ? ORDER BY rowid", (lo, hi))
+    while True:
+        batch = cursor.fetchmany(BATCH_SIZE)
+        if not batch:
+            break
+        for row in batch:
+            for values, value, kind in zip(columns, row, kinds):
+                values.append(_coerce(value, kind))
+    return pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                                schema=schema)
+
+
+def _dedup(data, table):
+    """One row per id and per natural key (NULLs never match); the last row wins"""
+    ids = data.column('id').to_pylist()
+    columns = NATURAL_KEYS.get(table)
+    keys = list(zip(*(data.column(name).to_pylist() for name in columns))) if columns else [None] * len(ids)
+    seen_ids, seen_keys, keep = set(), set(), []
+    for i in range(len(ids) - 1, -1, -1):
+        key = keys[i] if keys[i] is not None and None not in keys[i] else None
+        if ids[i] in seen_ids or (key is not None and key in seen_keys):
+            continue
+        seen_ids.add(ids[i])
+        if key is not None:
+            seen_keys.add(key)
+        keep.append(i)
+    if len(keep) == len(ids):
+        return data
+    return data.take(sorted(keep))
+
+
+def _partition_rows(pa, path):
+    return pa.parquet.ParquetFile(path).metadata.num_rows if os.path.exists(path) else 0
+
+
+def _write_week(pa, root, table, week, data):
+    """Write one partition, merged with what it already holds; returns its row count
+
+    The partition may already hold rows from an earlier run: a later one for
+    rows that arrived after the week was archived, or the same run when it
+    was interrupted after writing but before deleting. Merging keeps one copy
+    of each row, the database's.
+    """
+    path = week_path(root, table, week)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        data = _dedup(pa.concat_tables([pa.parquet.read_table(path, schema=data.schema), data]), table)
+    partial = f"{path}.tmp"
+    pa.parquet.write_table(data, partial, compression='zstd')
+    os.replace(partial, path)
+    return data.num_rows
+
+
+def archive(conn, db_path, keep_weeks=KEEP_WEEKS, today=None, dry_run=False):
+    """Move every closed week before the last ``keep_weeks`` into the archive
+
+    Returns {week: {table: rows archived}}. Each week's files are written
+    before its rows are deleted, so an interrupted run leaves nothing lost,
+    and rerunning it is safe.
+    """
+    cutoff = (_monday(today or date.today()) - timedelta(weeks=keep_weeks)).isoformat()
+    weeks = set()
+    for table, column in TIME_COLUMNS.items():
+        weeks.update(row[0] for row in conn.execute(
+            f"SELECT DISTINCT date(substr({column}, 1, 10), 'weekday 0', '-6 days') "
+            f"FROM main.{table} WHERE {column} < ?", (cutoff,)) if row[0])
+    if dry_run or not weeks:
+        return {week: {} for week in sorted(weeks)}
+
+    pa = _pyarrow()
+    root = archive_dir(db_path)
+    schemas = {table: _schema(pa, conn, table) for table in TIME_COLUMNS}
+    moved = {}
+    for week in sorted(weeks):
+        lo, hi = week, (date.fromisoformat(week) + timedelta(days=7)).isoformat()
+        counts = {}
+        with migrate.write_transaction(conn):
+            # Rows deleted before these caught up would never be rolled up or scored
+            rollup.refresh(conn)
+            anomalies.refresh(conn)
+            totals = {}
+            for table in TIME_COLUMNS:
+                data = _week_table(pa, conn, table, schemas[table], lo, hi)
+                counts[table] = data.num_rows
+                if data.num_rows:
+                    totals[table] = _write_week(pa, root, table, week, data)
+                    conn.execute(f"DELETE FROM main.{table} WHERE {TIME_COLUMNS[table]} >= ? "
+                                 f"AND {TIME_COLUMNS[table]} < ?", (lo, hi))
+                else:
+                    totals[table] = _partition_rows(pa, week_path(root, table, week))
+            conn.execute("""
+                INSERT INTO archive_weeks (week, sentiment_rows, analyses_rows, articles_rows)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (week) DO UPDATE SET
+                    sentiment_rows = excluded.sentiment_rows,
+                    analyses_rows = excluded.analyses_rows,
+                    articles_rows = excluded.articles_rows,
+                    archived_at = datetime('now')
+            """, (week, totals['sentiment'], totals['analyses'], totals['articles']))
+        moved[week] = counts
+    return moved
+
+
+# --- Reading ---
+
+def _load_range(pa, db, start, end, weeks):
+    """Temp tables of the range's archived rows, behind views that add the hot rows"""
+    conn = db.conn
+    root = archive_dir(db.db_path)
+    lo, hi = start + 'T00:00:00', end + 'T23:59:59'
+    for table, wanted in REPORT_COLUMNS.items():
+        columns = ', '.join(wanted)
+        time_column = TIME_COLUMNS[table]
+        conn.execute(f"CREATE TEMP TABLE archived_{table} (id INTEGER PRIMARY KEY, "
+                     f"{', '.join(name for name in wanted if name != 'id')})")
+        for week in weeks:
+            path = week_path(root, table, week)
+            if not os.path.exists(path):
+                continue
+            data = pa.parquet.read_table(path, columns=wanted, memory_map=True,
+                                         filters=[(time_column, '>=', lo), (time_column, '<=', hi)])
+            conn.executemany(f"INSERT INTO temp.archived_{table} ({columns}) "
+                             f"VALUES ({', '.join('?' * len(wanted))})",
+                             zip(*(column.to_pylist() for column in data.columns)))
+        # The hot rows stay in main (queried through its own indexes)
+        conn.execute(f"CREATE TEMP VIEW {table} AS SELECT {columns} FROM main.{table} "
+                     f"UNION ALL SELECT {columns} FROM temp.archived_{table}")
+    for name, (table, indexed) in ARCHIVED_INDEXES.items():
+        conn.execute(f"CREATE INDEX temp.{name} ON archived_{table} ({indexed})")
+
+
+def _drop_range(conn):
+    for table in REPORT_COLUMNS:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}")
+        conn.execute(f"DROP TABLE IF EXISTS temp.archived_{table}")
+
+
+@contextmanager
+def covering(db, start, end):
+    """Within the block, ``db``'s queries over ``start``..``end`` also see archived weeks
+
+    When the range includes archived weeks, ``sentiment``, ``analyses`` and
+    ``articles`` are shadowed by temp views (SQLite resolves unqualified
+    names to temp first) over the real table and that range's archived
+    rows, with REPORT_COLUMNS only. They are dropped on exit. Otherwise, or for anything
+    that is not a PulseDB (e.g. migrate's plan recorder), nothing changes.
+    Nested blocks for the same range reuse the outer one's tables.
+    """
+    if not isinstance(db, PulseDB) or db.archive_range == (start, end):
+        yield db
+        return
+    conn = db.conn
+    weeks = archived_weeks(conn, start, end)
+    if not weeks:
+        yield db
+        return
+    if db.archive_range is not None:
+        raise RuntimeError(f"archived range {db.archive_range} is already loaded on this connection")
+
+    pa = _pyarrow()
+    # The temp schema is this connection's own; query_only guards the database file
+    conn.execute("PRAGMA query_only = 0")
+    try:
+        _load_range(pa, db, start, end, weeks)
+        db.archive_range = (start, end)
+        conn.execute("PRAGMA query_only = 1")
+        yield db
+    finally:
+        conn.execute("PRAGMA query_only = 0")
+        _drop_range(conn)
+        db.archive_range = None
+        conn.execute("PRAGMA query_only = 1")
+
+
+def dataset(db_path, table):
+    """A ``pyarrow.dataset`` over every archived week of ``table``, for multi-month analyses"""
+    _pyarrow()
+    import pyarrow.dataset
+    return pyarrow.dataset.dataset(os.path.join(archive_dir(db_path), table), format='parquet',
+                                   partitioning='hive')
+
+
+def main(argv=None):
+    from generate_pulse_report import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Move closed weeks of raw data into the Parquet archive")
+    parser.add_argument('--db', default=DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--keep-weeks', type=int, default=KEEP_WEEKS,
+                        help="recent weeks to keep in the database")
+    parser.add_argument('--dry-run', action='store_true', help="only list the weeks that would move")
+    parser.add_argument('--vacuum', action='store_true', help="VACUUM afterwards to shrink the database file")
+    args = parser.parse_args(argv)
+
+    conn = migrate.connect(args.db)
+    migrate.migrate(conn)
+    moved = archive(conn, args.db, args.keep_weeks, dry_run=args.dry_run)
+    if args.dry_run:
+        print(f"{len(moved)} weeks would be archived: {', '.join(moved) or 'none'}")
+    else:
+        for week, counts in moved.items():
+            print(f"✓ week of {week}: " + ", ".join(f"{n} {table}" for table, n in counts.items()))
+        print(f"✓ Archived {len(moved)} weeks to {archive_dir(args.db)}")
+        if args.vacuum and moved:
+            conn.execute("VACUUM")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Report benchmarks against a synthetic sensmundi.db
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Times every report getter, the chart builders, snapshot loading and the
+full generate_pdf() on a database from synthdb.py, and saves the results
+as JSON. Comparing against a saved run flags anything that got slower.
+
+The cli[...] cases time whole fresh processes of generate_pulse_report.py.
+cli[dry-run] is pure startup (interpreter, imports, argument parsing);
+cli[json] adds the queries and NumPy analytics, and must never import the
+PDF renderer. Both must stay under STARTUP_BUDGET, since the data-only
+export is what cron and the publisher run.
+
+Generated databases are kept in BENCH_DB_DIR and reused, since the same
+scale and seed always produce the same rows.
+
+Usage:
+    python reports/benchmark.py [--scale small|medium|large] [--db PATH] [--repeat N]
+                                [--only SUBSTRING] [--output PATH] [--compare BASELINE.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import generate_pulse_report as report
+import synthdb
+from chart_cache import CHART_CACHE
+from instrument import peak_rss_kb
+from pulse_db import open_db
+
+BENCH_DB_DIR = os.environ.get('PULSE_BENCH_DIR', os.path.expanduser('~/.cache/pulse/bench'))
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench-results')
+REPEAT = 5
+# A median this much slower than the baseline counts as a regression
+THRESHOLD = 0.20
+# ...and by at least this many seconds, so sub-millisecond jitter is not flagged
+MIN_DELTA = 0.001
+# The synthetic data ends on a Sunday; benchmark its last full week
+PERIOD = ('2026-02-09', '2026-02-15')
+# Seconds a dry run or a data-only export may take, interpreter included
+STARTUP_BUDGET = 0.2
+# Cases held to STARTUP_BUDGET
+BUDGET_CASES = ('cli[dry-run]', 'cli[json]')
+REPORT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generate_pulse_report.py')
+# Modules a data-only run must not import
+RENDER_MODULES = ('reportlab', 'matplotlib')
+
+
+def benchmarks(db_path, start, end, workdir):
+    """name -> zero-argument callable"""
+    db = open_db(db_path)
+    snapshot = report.ReportSnapshot(db_path, start, end).load()
+    cases = {}
+    for getter in (report.get_global_overview, report.get_top_tense_countries,
+                   report.get_top_dissonance_countries, report.get_regional_breakdown,
+                   report.get_timeline_trends, report.get_key_stories):
+        cases[getter.__name__] = (lambda g=getter: g(db, start, end))
+    cases['create_regional_chart'] = lambda: report.create_regional_chart(snapshot.regions)
+    cases['create_dissonance_chart'] = lambda: report.create_dissonance_chart(snapshot.dissonance)
+    cases['create_regional_chart[vector]'] = lambda: report.create_regional_chart(snapshot.regions, vector=True)
+    cases['create_dissonance_chart[vector]'] = lambda: report.create_dissonance_chart(snapshot.dissonance, vector=True)
+    cases['ReportSnapshot.load'] = lambda: report.ReportSnapshot(db_path, start, end).load()
+    pdf = os.path.join(workdir, 'bench.pdf')
+    cases['generate_pdf'] = lambda: report.generate_pdf(snapshot, pdf)
+    cases['generate_pdf[vector]'] = lambda: report.generate_pdf(snapshot, pdf, vector_charts=True)
+    for mode, extra in (('dry-run', ['--dry-run']), ('json', ['--format', 'json', '--output', os.devnull])):
+        command = [sys.executable, REPORT_SCRIPT, '--db', db_path, '--start', start, '--end', end, *extra]
+        cases[f'cli[{mode}]'] = lambda command=command: subprocess.run(command, check=True,
+                                                                       stdout=subprocess.DEVNULL)
+    return cases
+
+
+def render_imports(db_path, start, end):
+    """RENDER_MODULES that a --format json run imports (should be none)"""
+    code = (f"import sys, generate_pulse_report as r; "
+            f"r.main(['--db', {db_path!r}, '--start', {start!r}, '--end', {end!r}, "
+            f"'--format', 'json', '--output', {os.devnull!r}]); "
+            f"print(' '.join(sorted({{m.split('.')[0] for m in sys.modules}} & {set(RENDER_MODULES)!r})))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(REPORT_SCRIPT)).stdout
+    return output.split('\n')[-2].split() if output.strip() else []
+
+
+def measure(fn, repeat=REPEAT):
+    """Wall/CPU seconds over ``repeat`` runs after one warm-up"""
+    fn()
+    walls, cpus = [], []
+    for _ in range(repeat):
+        gc.collect()
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    return {
+        'repeat': repeat,
+        'min': min(walls),
+        'median': statistics.median(walls),
+        'mean': statistics.fmean(walls),
+        'stdev': statistics.stdev(walls) if repeat > 1 else 0.0,
+        'cpu_median': statistics.median(cpus),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _row_counts(db_path):
+    db = open_db(db_path)
+    return {table: db.query(f"SELECT COUNT(*) FROM {table}", rows='tuple')[0][0]
+            for table in ('countries', 'sentiment', 'analyses', 'articles')}
+
+
+def synthetic_db(scale, seed=1):
+    """Path to the synthetic database for a scale, generating it on first use"""
+    path = os.path.join(BENCH_DB_DIR, f"{scale}-seed{seed}.db")
+    if not os.path.exists(path):
+        os.makedirs(BENCH_DB_DIR, exist_ok=True)
+        print(f"Generating {scale} synthetic database (once)...")
+        countries, days, snapshots, articles = synthdb.SCALES[scale]
+        synthdb.generate(path + '.tmp', countries, days, snapshots, articles, seed)
+        os.replace(path + '.tmp', path)
+    return path
+
+
+def run(db_path, repeat=REPEAT, only=None, scale=None):
+    """Run every benchmark (or those whose name contains ``only``); returns the result document"""
+    # Charts must be drawn every time, not served from the on-disk cache
+    CHART_CACHE.enabled = False
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, fn in benchmarks(db_path, *PERIOD, workdir).items():
+            if only and only not in name:
+                continue
+            results[name] = measure(fn, repeat)
+            print(f"  {name:<34} {results[name]['median'] * 1000:>9.1f} ms "
+                  f"(min {results[name]['min'] * 1000:.1f}, ±{results[name]['stdev'] * 1000:.1f})")
+    return {
+        'version': 1,
+        'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scale': scale,
+        'period': list(PERIOD),
+        'rows': _row_counts(db_path),
+        'peak_rss_kb': peak_rss_kb(),
+        'results': results,
+    }
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Print median changes against a baseline run; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':<34} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if not old:
+            print(f"{name:<34} {'-':>10} {result['median'] * 1000:>8.1f}ms {'new':>8}")
+            continue
+        change = result['median'] / old['median'] - 1 if old['median'] else 0.0
+        flag = ''
+        if change > threshold and result['median'] - old['median'] > MIN_DELTA:
+            regressions.append(name)
+            flag = ' ✗'
+        print(f"{name:<34} {old['median'] * 1000:>8.1f}ms {result['median'] * 1000:>8.1f}ms {change:>+7.0%}{flag}")
+    if baseline.get('rows') != current.get('rows'):
+        print("Note: baseline was measured on a database of a different size")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark report generation on synthetic data")
+    parser.add_argument('--scale', choices=sorted(synthdb.SCALES), default='small',
+                        help="synthetic database preset (generated once, then reused)")
+    parser.add_argument('--db', help="benchmark an existing database instead")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="timed runs per benchmark")
+    parser.add_argument('--only', help="run only benchmarks whose name contains this")
+    parser.add_argument('--output', help=f"results JSON (default: {RESULTS_DIR}/<revision>-<scale>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help="fractional slowdown of a median that fails --compare")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or synthetic_db(args.scale, args.seed)
+    scale = None if args.db else args.scale
+    print(f"Benchmarking {db_path} ({args.repeat} runs each)")
+    result = run(db_path, args.repeat, args.only, scale)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{result['revision'] or 'local'}-{scale or 'custom'}.json")
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=1)
+    print(f"✓ Results written to {output} (peak RSS {result['peak_rss_kb'] / 1024:.0f} MB)")
+
+    status = 0
+    for name in BUDGET_CASES:
+        case = result['results'].get(name)
+        if case and case['median'] > STARTUP_BUDGET:
+            print(f"✗ {name} {case['median'] * 1000:.0f} ms is over the {STARTUP_BUDGET * 1000:.0f} ms budget")
+            status = 1
+    if not args.only or 'cli' in args.only:
+        heavy = render_imports(db_path, *PERIOD)
+        if heavy:
+            print(f"✗ --format json imported {', '.join(heavy)}")
+            status = 1
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), result, args.threshold)
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("✓ No regressions")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
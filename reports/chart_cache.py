@@ -0,0 +1,164 @@
+"""
+Content-addressed cache for rendered report charts
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+A chart is keyed by a hash of its drawing function's source, the data
+passed to it and the installed matplotlib version, so a re-run over
+unchanged numbers (a typo fix, a second edition of the same week) reuses
+the encoded image instead of rebuilding the matplotlib figure. Editing a chart's style changes its source and
+therefore its key, so stale images are never served.
+
+Entries are plain files; the least recently used ones are evicted once the
+cache grows past ``max_bytes``. The cache is best effort: a directory that
+cannot be read or written (read-only deploy, full disk) just means every
+chart is rendered.
+"""
+
+import functools
+import hashlib
+import io
+import json
+import os
+
+CACHE_DIR = os.environ.get('PULSE_CHART_CACHE', os.path.expanduser('~/.cache/pulse/charts'))
+MAX_BYTES = 64 * 1024 * 1024
+
+
+_renderer_version = None
+
+
+def renderer_version():
+    """matplotlib's version, read from its package metadata so matplotlib itself is not imported"""
+    global _renderer_version
+    if _renderer_version is None:
+        from importlib import metadata
+        try:
+            _renderer_version = metadata.version('matplotlib')
+        except metadata.PackageNotFoundError:
+            _renderer_version = 'none'
+    return _renderer_version
+
+
+class ChartCache:
+    """On-disk, size-bounded LRU store of encoded chart images"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=MAX_BYTES, enabled=True):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bytes in cache_dir as far as this process knows; None until first scanned
+        self._size = None
+
+    def key(self, name, source, args, kwargs):
+        payload = json.dumps([name, source, renderer_version(), args, kwargs], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def get(self, key, ext='png'):
+        path = self._path(key, ext)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        # Bump the mtime so eviction treats this entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return data
+
+    def put(self, key, data, ext='png'):
+        """Store an entry; returns False (and stores nothing) when the cache directory is unusable"""
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write then rename, so parallel render workers never read a partial file
+            import tempfile
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key, ext))
+        except OSError:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return False
+        if self._size is None:
+            self._size = self._scan()[1]
+        else:
+            self._size += len(data)
+        if self._size > self.max_bytes:
+            self._evict()
+        return True
+
+    def _scan(self):
+        entries = []
+        try:
+            for entry in os.scandir(self.cache_dir):
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            pass
+        return entries, sum(size for _mtime, size, _path in entries)
+
+    def _evict(self):
+        # Other workers share the directory, so count it afresh before deleting
+        entries, total = self._scan()
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+CHART_CACHE = ChartCache()
+
+
+def cached_chart(fn=None, ext='png'):
+    """Cache the encoded output of a chart function returning a BytesIO (or None)"""
+    if fn is None:
+        return functools.partial(cached_chart, ext=ext)
+
+    # inspect and tempfile are imported where used: a data-only export loads
+    # this module through generate_pulse_report but never draws a chart
+    import inspect
+    try:
+        source = inspect.getsource(fn)
+    except (OSError, TypeError):
+        source = fn.__qualname__
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = CHART_CACHE
+        if not cache.enabled:
+            return fn(*args, **kwargs)
+        key = cache.key(fn.__qualname__, source, args, kwargs)
+        data = cache.get(key, ext)
+        if data is None:
+            buffer = fn(*args, **kwargs)
+            if buffer is None:
+                return None
+            data = buffer.getvalue()
+            cache.put(key, data, ext)
+        return io.BytesIO(data)
+
+    return wrapper
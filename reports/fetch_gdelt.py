@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Concurrent GDELT sentiment fetcher
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Python replacement for data/fetch-gdelt-v2.sh. Requests run concurrently
+but share one token bucket tuned to GDELT's rate limit, so a refresh runs
+close to the limit instead of sleeping a fixed 6 seconds before every call.
+Failed calls are retried with exponential backoff. A country that still
+fails is reported and left out, never written as ``tone: 0``. Each finished
+country is checkpointed, so an interrupted run picks up where it stopped
+with ``--resume``.
+
+Fetching is incremental: the raw series for every country and source is
+kept in a state file, and each run asks GDELT only for the smallest window
+that covers the points added since (plus a little overlap for smoothing),
+merging them into the stored 90-day timeline. A source refreshed within
+the last GDELT update interval is not requested at all.
+
+Output has the same shape as data/sentiment-cache.json.
+
+Usage:
+    python reports/fetch_gdelt.py [--output FILE] [--resume] [--full] [--codes US,CN,...]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timezone
+
+GDELT_API = "https://api.gdeltproject.org/api/v2/doc/doc"
+CHECKPOINT_DIR = "/tmp/gdelt-countries"
+STATE_PATH = "/tmp/gdelt-state.json"
+
+# GDELT asks for at most one request every 5 seconds
+RATE_PER_SECOND = 0.2
+BURST = 1
+CONCURRENCY = 4
+MAX_RETRIES = 5
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+REQUEST_TIMEOUT = 15
+
+TIMELINE_DAYS = 90
+SMOOTH = 5
+# GDELT drops to hourly points for short spans; this is the shortest
+# TIMESPAN that still comes back at the daily resolution we store
+MIN_TIMESPAN_DAYS = 8
+# GDELT refreshes every 15 minutes, so re-asking sooner cannot return anything new
+REFRESH_INTERVAL = 15 * 60
+
+# ISO code -> (name used for external coverage, GDELT FIPS code for internal sources)
+COUNTRIES = {
+    'US': ("United States", 'US'), 'CN': ("China", 'CH'), 'RU': ("Russia", 'RS'),
+    'GB': ("United Kingdom", 'UK'), 'DE': ("Germany", 'GM'), 'FR': ("France", 'FR'),
+    'JP': ("Japan", 'JA'), 'IN': ("India", 'IN'), 'BR': ("Brazil", 'BR'),
+    'AU': ("Australia", 'AS'), 'CA': ("Canada", 'CA'), 'KR': ("South Korea", 'KS'),
+    'MX': ("Mexico", 'MX'), 'IT': ("Italy", 'IT'), 'ES': ("Spain", 'SP'),
+    'TR': ("Turkey", 'TU'), 'SA': ("Saudi Arabia", 'SA'), 'IR': ("Iran", 'IR'),
+    'IL': ("Israel", 'IS'), 'UA': ("Ukraine", 'UP'), 'PL': ("Poland", 'PL'),
+    'NL': ("Netherlands", 'NL'), 'SE': ("Sweden", 'SW'), 'NO': ("Norway", 'NO'),
+    'AR': ("Argentina", 'AR'), 'CO': ("Colombia", 'CO'), 'EG': ("Egypt", 'EG'),
+    'NG': ("Nigeria", 'NI'), 'ZA': ("South Africa", 'SF'), 'ID': ("Indonesia", 'ID'),
+    'TH': ("Thailand", 'TH'), 'VN': ("Vietnam", 'VM'), 'PK': ("Pakistan", 'PK'),
+    'BD': ("Bangladesh", 'BG'), 'PH': ("Philippines", 'RP'), 'MY': ("Malaysia", 'MY'),
+    'TW': ("Taiwan", 'TW'), 'SG': ("Singapore", 'SN'), 'AE': ("United Arab Emirates", 'AE'),
+    'QA': ("Qatar", 'QA'), 'IQ': ("Iraq", 'IZ'), 'SY': ("Syria", 'SY'),
+    'AF': ("Afghanistan", 'AF'), 'KE': ("Kenya", 'KE'), 'ET': ("Ethiopia", 'ET'),
+    'MM': ("Myanmar", 'BM'), 'VE': ("Venezuela", 'VE'), 'CL': ("Chile", 'CI'),
+    'PE': ("Peru", 'PE'), 'CU': ("Cuba", 'CU'),
+}
+
+
+class FetchError(Exception):
+    """A GDELT call failed after all retries"""
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` requests per second with bursts up to ``capacity``"""
+
+    def __init__(self, rate=RATE_PER_SECOND, capacity=BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens are handed out first come, first served
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def parse_series(raw):
+    """Raw ``[{'date', 'value'}]`` points of a timelinetone response
+
+    An empty list means GDELT has no coverage; a malformed body raises
+    ValueError so it can be retried rather than recorded as zero.
+    """
+    d = json.loads(raw)
+    timeline = d.get('timeline') or [{}]
+    return [{'date': x['date'], 'value': x['value']} for x in timeline[0].get('data', [])]
+
+
+def summarize(series):
+    """Turn raw points into {'tone', 'articleCount', 'timeline'}
+
+    Same rules as the shell fetcher: tone is the mean of the last 7 points,
+    the timeline keeps the last 90.
+    """
+    if not series:
+        return {'tone': 0, 'articleCount': 0, 'timeline': []}
+    recent = series[-7:]
+    avg = sum(x['value'] for x in recent) / len(recent)
+    tl = [{'date': x['date'][:10], 'tone': round(x['value'], 2)} for x in series[-TIMELINE_DAYS:]]
+    return {'tone': round(avg, 2), 'articleCount': len(recent), 'timeline': tl}
+
+
+def parse(raw):
+    """Parse a full timelinetone response into {'tone', 'articleCount', 'timeline'}"""
+    return summarize(parse_series(raw))
+
+
+def _point_date(value):
+    return datetime.strptime(value[:8], '%Y%m%d').replace(tzinfo=timezone.utc)
+
+
+def incremental_timespan(series, now=None):
+    """Smallest TIMESPAN (e.g. '9d') covering everything after ``series``, or None for a full fetch"""
+    if not series:
+        return None
+    now = now or datetime.now(timezone.utc)
+    # Re-fetch the last SMOOTH points too: GDELT's smoothing and the still
+    # open current day keep revising them
+    days = math.ceil((now - _point_date(series[-1]['date'])).total_seconds() / 86400) + SMOOTH + 1
+    if days >= TIMELINE_DAYS:
+        return None
+    return f"{max(days, MIN_TIMESPAN_DAYS)}d"
+
+
+def merge_series(old, new):
+    """Merge a freshly fetched window into the stored series, newest points winning"""
+    if not old:
+        return new[-TIMELINE_DAYS:]
+    # The first points of a short window are smoothed over fewer days than
+    # the stored ones, so only keep them if they fill a gap
+    overlap_start = old[-1]['date'][:8]
+    trimmed = [x for i, x in enumerate(new) if i >= SMOOTH - 1 or x['date'][:8] > overlap_start]
+    points = {x['date'][:8]: x for x in old}
+    points.update((x['date'][:8], x) for x in trimmed)
+    return [points[day] for day in sorted(points)][-TIMELINE_DAYS:]
+
+
+def timeline_url(query, base_url=GDELT_API, timespan=None):
+    params = {
+        'query': query,
+        'mode': 'timelinetone',
+        'format': 'json',
+        'TIMELINESMOOTH': SMOOTH,
+    }
+    if timespan:
+        params['TIMESPAN'] = timespan
+    return f"{base_url}?{urllib.parse.urlencode(params, quote_via=urllib.parse.quote)}"
+
+
+class FetchState:
+    """Last fetched raw series and fetch time per country and source, kept on disk"""
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, code, source):
+        return self.data.get(code, {}).get(source, {'series': [], 'fetched_at': 0})
+
+    def set(self, code, source, series, fetched_at):
+        self.data.setdefault(code, {})[source] = {'series': series, 'fetched_at': fetched_at}
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp_path, self.path)
+
+
+def _http_get(url, timeout):
+    request = urllib.request.Request(url, headers={'User-Agent': 'pulse-fetcher/1.0'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+class GdeltClient:
+    """Rate-limited, retrying GDELT DOC API client"""
+
+    def __init__(self, base_url=GDELT_API, bucket=None, concurrency=CONCURRENCY,
+                 max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE, timeout=REQUEST_TIMEOUT,
+                 state=None, refresh_interval=REFRESH_INTERVAL):
+        self.base_url = base_url
+        self.bucket = bucket or TokenBucket()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.state = state
+        self.refresh_interval = refresh_interval
+        self.requests = 0
+        self.skipped = 0
+        self.bytes = 0
+
+    async def series(self, query, timespan=None):
+        """Fetch one raw timelinetone series, retrying transient failures"""
+        url = timeline_url(query, self.base_url, timespan)
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = min(BACKOFF_MAX, self.backoff_base * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            await self.bucket.acquire()
+            async with self.semaphore:
+                self.requests += 1
+                try:
+                    raw = await asyncio.to_thread(_http_get, url, self.timeout)
+                    self.bytes += len(raw)
+                    # GDELT answers rate-limit violations with a plain-text 200
+                    return parse_series(raw.decode('utf-8'))
+                except urllib.error.HTTPError as e:
+                    last_error = e
+                    if e.code != 429 and e.code < 500:
+                        break
+                except (urllib.error.URLError, OSError, ValueError, KeyError) as e:
+                    last_error = e
+        raise FetchError(f"{query}: {last_error}")
+
+    async def timeline(self, code, source, query):
+        """Summary for one source, fetching only what changed since the stored state"""
+        if self.state is None:
+            return summarize(await self.series(query))
+        stored = self.state.get(code, source)
+        now = time.time()
+        if stored['series'] and now - stored['fetched_at'] < self.refresh_interval:
+            self.skipped += 1
+            return summarize(stored['series'])
+        timespan = incremental_timespan(stored['series'])
+        fresh = await self.series(query, timespan)
+        series = merge_series(stored['series'], fresh) if timespan else fresh[-TIMELINE_DAYS:]
+        self.state.set(code, source, series, now)
+        return summarize(series)
+
+    async def country(self, code):
+        name, fips = COUNTRIES[code]
+        ext, int_ = await asyncio.gather(
+            self.timeline(code, 'external', name),
+            self.timeline(code, 'internal', f"sourcecountry:{fips}"),
+        )
+        dis = round(abs(int_['tone'] - ext['tone']), 2)
+        return {
+            'name': name, 'code': code, 'internal': int_, 'external': ext, 'dissonance': dis,
+            'tone': ext['tone'], 'articleCount': ext['articleCount'] + int_['articleCount'],
+        }
+
+
+def write_checkpoint(checkpoint_dir, obj):
+    """Atomically write one country's result"""
+    fd, tmp_path = tempfile.mkstemp(dir=checkpoint_dir, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(obj, f)
+    os.replace(tmp_path, os.path.join(checkpoint_dir, f"{obj['code']}.json"))
+
+
+def load_checkpoints(checkpoint_dir):
+    countries = {}
+    for filename in os.listdir(checkpoint_dir):
+        if filename.endswith('.json'):
+            with open(os.path.join(checkpoint_dir, filename)) as f:
+                countries[filename[:-5]] = json.load(f)
+    return countries
+
+
+async def fetch_all(codes, client, checkpoint_dir=CHECKPOINT_DIR, resume=False, log=None):
+    """Fetch every country not already checkpointed. Returns (countries, failures)."""
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    if not resume:
+        for filename in os.listdir(checkpoint_dir):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(checkpoint_dir, filename))
+    done = set(load_checkpoints(checkpoint_dir))
+    pending = [code for code in codes if code not in done]
+    total = len(codes)
+    finished = len(done)
+    failures = {}
+
+    async def one(code):
+        nonlocal finished
+        try:
+            obj = await client.country(code)
+        except FetchError as e:
+            failures[code] = str(e)
+            if log:
+                log(f"✗ {COUNTRIES[code][0]}: {e}")
+            return
+        write_checkpoint(checkpoint_dir, obj)
+        if client.state is not None:
+            client.state.save()
+        finished += 1
+        if log:
+            log(f"[{finished}/{total}] {finished * 100 // total}% | {obj['name']}: "
+                f"int={obj['internal']['tone']} ext={obj['external']['tone']} dis={obj['dissonance']}")
+
+    await asyncio.gather(*(one(code) for code in pending))
+    countries = {code: obj for code, obj in load_checkpoints(checkpoint_dir).items() if code in codes}
+    return countries, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch GDELT sentiment for all tracked countries")
+    parser.add_argument('--output', help="write the assembled JSON here instead of stdout")
+    parser.add_argument('--db', help="also ingest the results straight into this sensmundi.db")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--resume', action='store_true', help="keep countries checkpointed by a previous run")
+    parser.add_argument('--state', default=STATE_PATH, help="incremental fetch state file")
+    parser.add_argument('--full', action='store_true', help="ignore stored state and fetch full timelines")
+    parser.add_argument('--codes', help="comma-separated ISO codes (default: all tracked countries)")
+    parser.add_argument('--base-url', default=GDELT_API, help="GDELT DOC API endpoint (e.g. a local stub)")
+    parser.add_argument('--rate', type=float, default=RATE_PER_SECOND, help="requests per second")
+    parser.add_argument('--burst', type=int, default=BURST)
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--retries', type=int, default=MAX_RETRIES)
+    args = parser.parse_args(argv)
+
+    codes = args.codes.upper().split(',') if args.codes else list(COUNTRIES)
+    unknown = [code for code in codes if code not in COUNTRIES]
+    if unknown:
+        parser.error(f"unknown country codes: {', '.join(unknown)}")
+
+    def log(message):
+        print(message, file=sys.stderr, flush=True)
+
+    async def run():
+        state = FetchState(args.state)
+        if args.full:
+            state.data = {}
+        client = GdeltClient(args.base_url, TokenBucket(args.rate, args.burst),
+                             args.concurrency, args.retries, state=state)
+        return await fetch_all(codes, client, args.checkpoint_dir, args.resume, log), client
+
+    started = time.monotonic()
+    (countries, failures), client = asyncio.run(run())
+    log(f"{len(countries)}/{len(codes)} countries, {client.requests} requests "
+        f"({client.skipped} skipped as fresh, {client.bytes / 1024:.0f} KiB) in {time.monotonic() - started:.0f}s")
+
+    result = {'countries': countries, 'timestamp': int(time.time() * 1000)}
+    if args.db:
+        import ingest
+        import migrate
+        import publish
+
+        conn = migrate.connect(args.db)
+        migrate.migrate(conn)
+        counts = ingest.ingest(conn, countries.values(), ingest.snapshot_timestamp(result['timestamp']))
+        conn.close()
+        log(f"✓ Ingested {counts['countries']} countries into {args.db}")
+        published = publish.publish(args.db)
+        log(f"✓ Published {published['routes']} API routes ({published['written']} changed)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f)
+    elif not args.db:
+        print(json.dumps(result))
+
+    if failures:
+        log(f"✗ {len(failures)} countries failed, rerun with --resume to retry: {', '.join(sorted(failures))}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,65 +2,108 @@
 """
 Global Sentiment Pulse Weekly Report Generator
 Aeon Infinitive - pulse.aeoninfinitive.com
+
+Renders the weekly PDF (layout in report_pdf.py), or with --format json/csv
+exports the same data for the frontend and the newsletter. --watch keeps a
+"week so far" report up to date, rebuilding only the sections whose data
+changed.
 """
 
-import sqlite3
+import argparse
+import csv
+import heapq
+import itertools
 import json
-from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.pdfgen import canvas
-from reportlab.lib.colors import HexColor
-import matplotlib
-matplotlib.use('Agg')
-import matplotlib.pyplot as plt
-import io
+import os
+import re
+import sys
+import time
+import traceback
+from datetime import date, timedelta
+
+import archive
+import rollup
+from chart_cache import CHART_CACHE
+from instrument import TRACER, format_summary, write_trace
+from pulse_db import open_db
+
+# reportlab and matplotlib (via report_pdf) and NumPy (via analytics) are
+# imported inside the functions that need them: a data-only export or a
+# --dry-run under cron should not pay a second of rendering imports.
 
 # Database path
 DB_PATH = "/home/ubuntu/projects/sensmundi/pipeline/sensmundi.db"
-
-# Color scheme
-DARK_BG = HexColor('#0a0a0f')
-ACCENT_BLUE = HexColor('#4f8ffc')
-TEXT_WHITE = HexColor('#ffffff')
-TEXT_GRAY = HexColor('#a0a0a0')
-CARD_BG = HexColor('#1a1a24')
+REPORTS_DIR = "/home/ubuntu/projects/sensmundi/reports"
+# Seconds between database polls in --watch mode
+WATCH_INTERVAL = 15 * 60
 
 # Date range
 WEEK_START = '2026-02-09'
 WEEK_END = '2026-02-15'
 
-def query_db(query, params=()):
-    """Execute a query and return results"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
-    return results
-
-def get_global_overview():
-    """Get global average sentiment and article counts"""
-    query = """
+def query_db(query, params=(), conn=None, rows=None):
+    """Execute a query and return results
+
+    When ``conn`` is given the query runs on it (and inside whatever
+    transaction it has open); otherwise on the pooled read-only handle.
+    ``rows='tuple'`` skips building a dict per row for large scans.
+    """
+    db = conn if conn is not None else open_db(DB_PATH)
+    return db.query(query, params, rows)
+
+def _reader(conn=None):
+    return conn if conn is not None else open_db(DB_PATH)
+
+def _period(start=None, end=None):
+    """Resolve a getter's date range, defaulting to the report week"""
+    return (start or WEEK_START, end or WEEK_END)
+
+# Daily rollup buckets, plus the sentiment rows past the rollup watermark as
+# one-row buckets: rows written without a rollup refresh (the fill step, manual
+# fixes) still count. The tail is found by rowid, so it costs nothing once
+# rollup.py has caught up; the unary + keeps the planner off the timestamp index.
+_DAILY_BUCKETS = """
+    SELECT key, sum_tone_internal, n_tone_internal, sum_tone_external, n_tone_external,
+           sum_dissonance, n_dissonance, article_count_internal, article_count_external
+    FROM sentiment_daily
+    WHERE scope = 'country' AND period >= ? AND period <= ?
+    UNION ALL
+    SELECT country_code, tone_internal, tone_internal IS NOT NULL, tone_external, tone_external IS NOT NULL,
+           dissonance, dissonance IS NOT NULL, article_count_internal, article_count_external
+    FROM main.sentiment
+    WHERE rowid > (SELECT COALESCE(MAX(last_rowid), 0) FROM rollup_state WHERE name = ?)
+        AND +timestamp >= ? AND +timestamp <= ?
+"""
+
+def _bucket_params(start=None, end=None):
+    start, end = _period(start, end)
+    return (start, end, rollup.WATERMARK, start, end + 'T23:59:59')
+
+def rollup_lag(conn=None):
+    """Sentiment rows past the rollup watermark (read raw until rollup.py or ingest.py catches up)"""
+    return query_db("""
+        SELECT COUNT(*) FROM main.sentiment
+        WHERE rowid > (SELECT COALESCE(MAX(last_rowid), 0) FROM rollup_state WHERE name = ?)
+    """, (rollup.WATERMARK,), conn, rows='tuple')[0][0]
+
+@TRACER.wrap('getter')
+def get_global_overview(conn=None, start=None, end=None):
+    """Get global average sentiment and article counts (from the daily rollup)"""
+    query = f"""
         SELECT 
-            AVG(tone_internal) as avg_internal,
-            AVG(tone_external) as avg_external,
-            AVG(dissonance) as avg_dissonance,
+            SUM(sum_tone_internal) / SUM(n_tone_internal) as avg_internal,
+            SUM(sum_tone_external) / SUM(n_tone_external) as avg_external,
+            SUM(sum_dissonance) / SUM(n_dissonance) as avg_dissonance,
             SUM(article_count_internal) as total_internal,
             SUM(article_count_external) as total_external,
-            COUNT(DISTINCT country_code) as countries_tracked
-        FROM sentiment
-        WHERE timestamp >= ? AND timestamp <= ?
+            COUNT(DISTINCT key) as countries_tracked
+        FROM ({_DAILY_BUCKETS})
     """
-    result = query_db(query, (WEEK_START, WEEK_END))
+    result = query_db(query, _bucket_params(start, end), conn)
     return dict(result[0]) if result else {}
 
-def get_top_tense_countries():
+@TRACER.wrap('getter')
+def get_top_tense_countries(conn=None, start=None, end=None):
     """Get top 5 countries with highest tension"""
     query = """
         SELECT 
@@ -87,10 +130,13 @@ def get_top_tense_countries():
             s.dissonance DESC
         LIMIT 5
     """
-    results = query_db(query, (WEEK_START, WEEK_END))
+    start, end = _period(start, end)
+    with archive.covering(_reader(conn), start, end) as db:
+        results = query_db(query, (start, end + 'T23:59:59'), db)
     return [dict(row) for row in results]
 
-def get_top_dissonance_countries():
+@TRACER.wrap('getter')
+def get_top_dissonance_countries(conn=None, start=None, end=None):
     """Get top 5 countries with highest dissonance"""
     query = """
         SELECT 
@@ -110,525 +156,622 @@ def get_top_dissonance_countries():
         ORDER BY ABS(s.dissonance) DESC
         LIMIT 5
     """
-    results = query_db(query, (WEEK_START, WEEK_END))
+    start, end = _period(start, end)
+    with archive.covering(_reader(conn), start, end) as db:
+        results = query_db(query, (start, end + 'T23:59:59'), db)
     return [dict(row) for row in results]
 
-def get_regional_breakdown():
-    """Get average sentiment by region"""
-    query = """
+@TRACER.wrap('getter')
+def get_regional_breakdown(conn=None, start=None, end=None):
+    """Get average sentiment by region (from the daily rollup)"""
+    query = f"""
         SELECT 
             c.region,
-            AVG(s.tone_internal) as avg_internal,
-            AVG(s.tone_external) as avg_external,
-            AVG(s.dissonance) as avg_dissonance,
-            COUNT(DISTINCT s.country_code) as country_count
-        FROM sentiment s
-        JOIN countries c ON s.country_code = c.code
-        WHERE s.timestamp >= ? AND s.timestamp <= ?
-            AND c.region IS NOT NULL AND c.region != ''
+            SUM(d.sum_tone_internal) / SUM(d.n_tone_internal) as avg_internal,
+            SUM(d.sum_tone_external) / SUM(d.n_tone_external) as avg_external,
+            SUM(d.sum_dissonance) / SUM(d.n_dissonance) as avg_dissonance,
+            COUNT(DISTINCT d.key) as country_count
+        FROM ({_DAILY_BUCKETS}) d
+        JOIN countries c ON d.key = c.code
+        WHERE c.region IS NOT NULL AND c.region != ''
         GROUP BY c.region
         ORDER BY avg_dissonance DESC
     """
-    results = query_db(query, (WEEK_START, WEEK_END))
+    results = query_db(query, _bucket_params(start, end), conn)
     return [dict(row) for row in results]
 
-def get_notable_shifts():
-    """Analyze timeline data for biggest tone shifts"""
-    query = """
-        SELECT 
-            country_code,
-            timeline_internal,
-            timeline_external
-        FROM sentiment
-        WHERE timestamp >= ? AND timestamp <= ?
-            AND timeline_internal IS NOT NULL
-    """
-    results = query_db(query, (WEEK_START, WEEK_END))
-    
-    shifts = []
-    for row in results:
-        try:
-            timeline_int = json.loads(row['timeline_internal']) if row['timeline_internal'] else []
-            if len(timeline_int) >= 2:
-                # Calculate shift between first and last
-                first_tone = timeline_int[0]['tone']
-                last_tone = timeline_int[-1]['tone']
-                shift = last_tone - first_tone
-                shifts.append({
-                    'country_code': row['country_code'],
-                    'shift': shift,
-                    'from': first_tone,
-                    'to': last_tone
-                })
-        except:
-            pass
-    
-    # Sort by absolute shift and get country names
-    shifts.sort(key=lambda x: abs(x['shift']), reverse=True)
-    top_shifts = shifts[:5]
-    
-    # Get country names
-    for shift in top_shifts:
-        query = "SELECT name FROM countries WHERE code = ?"
-        result = query_db(query, (shift['country_code'],))
-        shift['name'] = result[0]['name'] if result else shift['country_code']
-    
-    return top_shifts
+@TRACER.wrap('getter')
+def get_timeline_trends(conn=None, start=None, end=None):
+    """Shift, slope, volatility, z-score and divergence per country (see analytics.py)"""
+    import analytics
+    start, end = _period(start, end)
+    with archive.covering(_reader(conn), start, end) as db:
+        timelines = analytics.load_timelines(db, start, end)
+    return analytics.analyze(timelines, start, end)
 
-def get_key_stories():
-    """Get 10 interesting article titles from the week"""
-    query = """
+@TRACER.wrap('getter')
+def get_notable_shifts(conn=None, start=None, end=None):
+    """Biggest tone shifts over the period"""
+    import analytics
+    return analytics.top_shifts(get_timeline_trends(conn, start, end))
+
+# Stories are ranked per (country, polarity) group and then taken round-robin:
+# every group's strongest story before any group's second, alternating
+# positive and negative, strongest first within a round. Any period with at
+# least ``limit`` titled articles yields exactly ``limit`` stories. Ranking
+# runs over narrow rows; titles are fetched by id only for the winners, in a
+# second query so that under archive.covering() the id lookups reach both the
+# hot table and the archived rows (SQLite pushes constants, not join terms,
+# into its UNION ALL view).
+_KEY_STORIES = """
+    WITH grouped AS (
         SELECT 
-            a.title_en,
-            a.title,
-            a.source,
-            a.country_code,
-            c.name as country_name,
+            a.id,
             a.tone,
-            a.source_type
+            a.fetched_at,
+            CASE WHEN a.tone > 0 THEN 1 ELSE -1 END as polarity,
+            ROW_NUMBER() OVER (
+                PARTITION BY a.country_code, CASE WHEN a.tone > 0 THEN 1 ELSE -1 END
+                ORDER BY ABS(a.tone) DESC, a.fetched_at DESC
+            ) as country_rank
         FROM articles a
-        JOIN countries c ON a.country_code = c.code
         WHERE a.fetched_at >= ? AND a.fetched_at <= ?
             AND (a.title_en IS NOT NULL OR a.title IS NOT NULL)
-        ORDER BY ABS(a.tone) DESC, a.fetched_at DESC
-        LIMIT 20
+            AND a.country_code IN (SELECT code FROM countries)
+    ),
+    rounds AS (
+        SELECT 
+            id,
+            tone,
+            fetched_at,
+            polarity,
+            ROW_NUMBER() OVER (
+                PARTITION BY polarity
+                ORDER BY country_rank, ABS(tone) DESC, fetched_at DESC
+            ) as polarity_rank
+        FROM grouped
+        WHERE country_rank <= ?
+    )
+    SELECT id
+    FROM rounds
+    ORDER BY polarity_rank, ABS(tone) DESC, fetched_at DESC, polarity DESC
+    LIMIT ?
+"""
+
+_STORY_ROWS = """
+    SELECT 
+        a.id,
+        a.title_en,
+        a.title,
+        a.source,
+        a.country_code,
+        c.name as country_name,
+        a.tone,
+        a.source_type
+    FROM articles a
+    JOIN countries c ON a.country_code = c.code
+    WHERE a.id IN ({ids})
+"""
+
+def _story_rank(row):
+    # ORDER BY ABS(tone) DESC, fetched_at DESC, with NULL tones last
+    tone = row['tone']
+    return (-1 if tone is None else abs(tone), row['fetched_at'] or '')
+
+def _story(row):
+    title = row['title_en'] or row['title'] or 'Untitled'
+    return {
+        'title': title[:120],  # Truncate long titles
+        'country': row['country_name'],
+        'source': row['source'],
+        'tone': row['tone'] or 0,
+        'type': row['source_type']
+    }
+
+def top_stories(rows, limit=10):
+    """Pick ``limit`` balanced stories from any iterable of article rows
+
+    The same selection get_key_stories() makes in SQL, kept as its
+    reference: rows need title_en, title, source, country_code,
+    country_name, tone, source_type and fetched_at. Only the ``limit``
+    strongest rows of each (country, polarity) group are held, so memory
+    does not grow with the stream.
     """
-    results = query_db(query, (WEEK_START + 'T00:00:00', WEEK_END + 'T23:59:59'))
-    
-    # Diversify by selecting from different countries and tones
-    stories = []
-    seen_countries = set()
-    positive_count = 0
-    negative_count = 0
-    
-    for row in results:
-        if len(stories) >= 10:
-            break
-            
-        country = row['country_code']
-        tone = row['tone'] or 0
-        
-        # Try to balance countries and sentiment
-        if country in seen_countries and len(stories) < 5:
-            continue
-            
-        title = row['title_en'] or row['title'] or 'Untitled'
-        stories.append({
-            'title': title[:120],  # Truncate long titles
-            'country': row['country_name'],
-            'source': row['source'],
-            'tone': tone,
-            'type': row['source_type']
-        })
-        
-        seen_countries.add(country)
-        if tone > 0:
-            positive_count += 1
+    counter = itertools.count()
+    groups = {}
+    for row in rows:
+        polarity = 1 if (row['tone'] or 0) > 0 else -1
+        heap = groups.setdefault((row['country_code'], polarity), [])
+        item = (_story_rank(row), next(counter), row)
+        if len(heap) < limit:
+            heapq.heappush(heap, item)
+        elif item[0] > heap[0][0]:
+            heapq.heapreplace(heap, item)
+    
+    # Number each group's rows, then each polarity's rows round by round
+    rounds = {1: [], -1: []}
+    for (_country, polarity), heap in groups.items():
+        ranked = sorted(heap, key=lambda item: item[0], reverse=True)
+        rounds[polarity].extend((country_rank, rank, row) for country_rank, (rank, _n, row) in enumerate(ranked))
+    picks = []
+    for polarity, items in rounds.items():
+        # Stable sorts: strongest first, then by round
+        items.sort(key=lambda item: item[1], reverse=True)
+        items.sort(key=lambda item: item[0])
+        picks.extend((polarity_rank, rank, polarity, row) for polarity_rank, (_c, rank, row) in enumerate(items))
+    picks.sort(key=lambda item: (item[1], item[2]), reverse=True)
+    picks.sort(key=lambda item: item[0])
+    return [_story(row) for _p, _rank, _polarity, row in picks[:limit]]
+
+@TRACER.wrap('getter')
+def get_key_stories(conn=None, start=None, end=None, limit=10):
+    """Get ``limit`` diverse article titles from the week, balanced by country and polarity"""
+    start, end = _period(start, end)
+    with archive.covering(_reader(conn), start, end) as db:
+        ranked = [row[0] for row in query_db(_KEY_STORIES, (start + 'T00:00:00', end + 'T23:59:59', limit, limit),
+                                             db, rows='tuple')]
+        if not ranked:
+            return []
+        rows = {row['id']: row for row in query_db(_STORY_ROWS.format(ids=', '.join('?' * len(ranked))), ranked, db)}
+    return [_story(rows[story_id]) for story_id in ranked]
+
+# Report section -> tables its data is read from (the cover depends on the period only).
+# 'rollup_tail' is the sentiment rows past the rollup watermark, which overview and
+# regional read raw until the rollup catches up.
+SECTION_INPUTS = {
+    'overview': ('sentiment_daily', 'rollup_tail'),
+    'tense': ('analyses', 'sentiment', 'countries'),
+    'dissonance': ('sentiment', 'analyses', 'countries'),
+    'regional': ('sentiment_daily', 'rollup_tail', 'countries'),
+    'shifts': ('sentiment', 'countries'),
+    'stories': ('articles', 'countries'),
+}
+
+# table -> (query over the period's rows, bound type: days, timestamps or None
+# for the whole table). fingerprint() hashes every column a section reads,
+# row by row, so an upsert in place is caught even when it keeps the same
+# length or sum (a rewritten summary, a revised timeline). Timelines are
+# cast to BLOB so a packed value that is not valid text still reaches it.
+# Only consulted after PRAGMA data_version reports a commit.
+_SIGNATURES = {
+    'sentiment': ("""SELECT COUNT(*), fingerprint(rowid, country_code, timestamp, tone_internal, tone_external,
+                                         dissonance, article_count_internal, article_count_external,
+                                         CAST(timeline_internal AS BLOB), CAST(timeline_external AS BLOB))
+                     FROM sentiment WHERE timestamp >= ? AND timestamp <= ?""", 'timestamp'),
+    'sentiment_daily': ("""SELECT COUNT(*), fingerprint(period, key, samples, sum_tone_internal, n_tone_internal,
+                                               sum_tone_external, n_tone_external, sum_dissonance, n_dissonance,
+                                               article_count_internal, article_count_external)
+                           FROM sentiment_daily WHERE scope = 'country' AND period >= ? AND period <= ?""", 'day'),
+    'rollup_tail': (f"""SELECT COUNT(*), fingerprint(rowid, country_code, tone_internal, tone_external, dissonance,
+                                                  article_count_internal, article_count_external)
+                        FROM sentiment
+                        WHERE rowid > (SELECT COALESCE(MAX(last_rowid), 0) FROM rollup_state
+                                       WHERE name = '{rollup.WATERMARK}')
+                            AND +timestamp >= ? AND +timestamp <= ?""", 'timestamp'),
+    'analyses': ("""SELECT COUNT(*), fingerprint(rowid, country_code, timestamp, tension_level, summary_en, context_en)
+                    FROM analyses WHERE timestamp >= ? AND timestamp <= ?""", 'timestamp'),
+    'articles': ("""SELECT COUNT(*), fingerprint(rowid, country_code, title, title_en, source, tone, source_type,
+                                        fetched_at)
+                    FROM articles WHERE fetched_at >= ? AND fetched_at <= ?""", 'timestamp'),
+    'countries': ("""SELECT COUNT(*), fingerprint(code, name, region) FROM countries""", None),
+}
+
+class _Fingerprint:
+    """SQL aggregate: order-independent 64-bit hash of the rows it is given
+
+    Hashes each row's repr() (hash() of the values themselves maps -1 and
+    -2 alike). str hashes are salted per process, which is fine for
+    watch(): it only compares signatures it computed itself.
+    """
+
+    def __init__(self):
+        self.total = 0
+
+    def step(self, *values):
+        self.total += hash(repr(values))
+
+    def finalize(self):
+        return f"{self.total & 0xFFFFFFFFFFFFFFFF:016x}"
+
+def table_signatures(conn, start, end):
+    """Per-table fingerprint of what a report over ``start``..``end`` can see"""
+    db = _reader(conn)
+    db.conn.create_aggregate('fingerprint', -1, _Fingerprint)
+    signatures = {}
+    for table, (query, bounds) in _SIGNATURES.items():
+        if bounds is None:
+            params = ()
+        elif bounds == 'day':
+            params = (start, end)
         else:
-            negative_count += 1
-    
-    return stories
+            params = (start + 'T00:00:00', end + 'T23:59:59')
+        signatures[table] = tuple(query_db(query, params, db, rows='tuple')[0])
+    return signatures
 
-def create_regional_chart():
-    """Create bar chart for regional sentiment"""
-    regions = get_regional_breakdown()
-    
-    if not regions:
-        return None
-    
-    # Prepare data
-    region_names = [r['region'][:15] for r in regions]  # Truncate names
-    internal_tones = [r['avg_internal'] or 0 for r in regions]
-    external_tones = [r['avg_external'] or 0 for r in regions]
-    
-    # Create figure with dark background
-    fig, ax = plt.subplots(figsize=(10, 5), facecolor='#0a0a0f')
-    ax.set_facecolor('#0a0a0f')
-    
-    x = range(len(region_names))
-    width = 0.35
-    
-    bars1 = ax.bar([i - width/2 for i in x], internal_tones, width, 
-                    label='Internal', color='#4f8ffc', alpha=0.8)
-    bars2 = ax.bar([i + width/2 for i in x], external_tones, width,
-                    label='External', color='#8fb4fc', alpha=0.8)
-    
-    ax.set_xlabel('Region', color='#ffffff', fontsize=10)
-    ax.set_ylabel('Average Sentiment Tone', color='#ffffff', fontsize=10)
-    ax.set_title('Regional Sentiment Breakdown', color='#ffffff', fontsize=12, fontweight='bold')
-    ax.set_xticks(x)
-    ax.set_xticklabels(region_names, rotation=45, ha='right', color='#a0a0a0', fontsize=8)
-    ax.tick_params(axis='y', labelcolor='#a0a0a0')
-    ax.legend(facecolor='#1a1a24', edgecolor='#4f8ffc', labelcolor='#ffffff')
-    ax.axhline(y=0, color='#666666', linestyle='--', linewidth=0.5)
-    ax.grid(axis='y', alpha=0.2, color='#666666')
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['bottom'].set_color('#666666')
-    ax.spines['left'].set_color('#666666')
-    
-    plt.tight_layout()
-    
-    # Save to bytes
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, facecolor='#0a0a0f', edgecolor='none')
-    img_buffer.seek(0)
-    plt.close()
-    
-    return img_buffer
+def changed_sections(old, new):
+    """Sections whose input tables have a different signature"""
+    changed = {table for table in new if old.get(table) != new[table]}
+    return {name for name, tables in SECTION_INPUTS.items() if changed.intersection(tables)}
 
-def create_dissonance_chart():
-    """Create bar chart for top dissonance countries"""
-    countries = get_top_dissonance_countries()
-    
-    if not countries:
-        return None
-    
-    # Prepare data
-    names = [c['name'][:20] for c in countries]
-    dissonance_values = [abs(c['dissonance'] or 0) for c in countries]
-    
-    # Create figure
-    fig, ax = plt.subplots(figsize=(10, 4), facecolor='#0a0a0f')
-    ax.set_facecolor('#0a0a0f')
-    
-    bars = ax.barh(names, dissonance_values, color='#fc4f4f', alpha=0.8)
-    
-    ax.set_xlabel('Dissonance Level', color='#ffffff', fontsize=10)
-    ax.set_title('Top 5 Highest Dissonance Countries', color='#ffffff', fontsize=12, fontweight='bold')
-    ax.tick_params(axis='both', labelcolor='#a0a0a0')
-    ax.grid(axis='x', alpha=0.2, color='#666666')
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['bottom'].set_color('#666666')
-    ax.spines['left'].set_color('#666666')
-    
-    plt.tight_layout()
-    
-    # Save to bytes
-    img_buffer = io.BytesIO()
-    plt.savefig(img_buffer, format='png', dpi=150, facecolor='#0a0a0f', edgecolor='none')
-    img_buffer.seek(0)
-    plt.close()
-    
-    return img_buffer
+class ReportSnapshot:
+    """All report section data, read once from a single point in time.
 
-class PageNumCanvas(canvas.Canvas):
-    """Custom canvas for page numbers and footer"""
-    
-    def __init__(self, *args, **kwargs):
-        canvas.Canvas.__init__(self, *args, **kwargs)
-        self.pages = []
-        
-    def showPage(self):
-        self.pages.append(dict(self.__dict__))
-        self._startPage()
-        
-    def save(self):
-        page_count = len(self.pages)
-        for page_num, page in enumerate(self.pages, 1):
-            self.__dict__.update(page)
-            if page_num > 1:  # Skip footer on cover page
-                self.draw_page_footer(page_num, page_count)
-            canvas.Canvas.showPage(self)
-        canvas.Canvas.save(self)
-        
-    def draw_page_footer(self, page_num, page_count):
-        self.saveState()
-        self.setFillColor(TEXT_GRAY)
-        self.setFont('Helvetica', 8)
-        footer_text = f"Generated by Pulse (pulse.aeoninfinitive.com) — Aeon Infinitive"
-        self.drawString(2*cm, 1.5*cm, footer_text)
-        self.drawRightString(A4[0] - 2*cm, 1.5*cm, f"Page {page_num} of {page_count}")
-        self.restoreState()
-
-def generate_pdf():
-    """Generate the complete PDF report"""
-    output_path = "/home/ubuntu/projects/sensmundi/reports/global-pulse-week-2026-02-15.pdf"
-    
-    # Create PDF with custom canvas
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=A4,
-        topMargin=2*cm,
-        bottomMargin=2.5*cm,
-        leftMargin=2*cm,
-        rightMargin=2*cm
-    )
-    
-    # Container for elements
-    story = []
-    
-    # Define styles
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=32,
-        textColor=TEXT_WHITE,
-        alignment=TA_CENTER,
-        spaceAfter=12,
-        fontName='Helvetica-Bold'
-    )
-    
-    subtitle_style = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=ACCENT_BLUE,
-        alignment=TA_CENTER,
-        spaceAfter=30,
-        fontName='Helvetica'
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=18,
-        textColor=ACCENT_BLUE,
-        spaceAfter=12,
-        spaceBefore=20,
-        fontName='Helvetica-Bold'
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontSize=10,
-        textColor=TEXT_WHITE,
-        spaceAfter=6,
-        leading=14,
-        fontName='Helvetica'
-    )
-    
-    metric_style = ParagraphStyle(
-        'Metric',
-        parent=styles['Normal'],
-        fontSize=24,
-        textColor=ACCENT_BLUE,
-        alignment=TA_CENTER,
-        spaceAfter=6,
-        fontName='Helvetica-Bold'
-    )
-    
-    # === COVER PAGE ===
-    story.append(Spacer(1, 6*cm))
-    story.append(Paragraph("GLOBAL SENTIMENT PULSE", title_style))
-    story.append(Paragraph("Week of February 9-15, 2026", subtitle_style))
-    story.append(Spacer(1, 2*cm))
-    story.append(Paragraph("Aeon Infinitive", ParagraphStyle(
-        'Brand',
-        fontSize=14,
-        textColor=TEXT_GRAY,
-        alignment=TA_CENTER,
-        fontName='Helvetica'
-    )))
-    story.append(PageBreak())
-    
-    # === GLOBAL OVERVIEW ===
-    overview = get_global_overview()
-    
-    story.append(Paragraph("Global Overview", heading_style))
-    
-    if overview:
-        avg_internal = overview.get('avg_internal', 0) or 0
-        avg_external = overview.get('avg_external', 0) or 0
-        avg_dissonance = overview.get('avg_dissonance', 0) or 0
-        total_articles = (overview.get('total_internal', 0) or 0) + (overview.get('total_external', 0) or 0)
-        countries = overview.get('countries_tracked', 0) or 0
-        
-        # Overall sentiment
-        overall = (avg_internal + avg_external) / 2
-        trend = "↗ Improving" if overall > -0.5 else "↘ Declining" if overall < -1.5 else "→ Stable"
-        
-        story.append(Paragraph(f"{overall:.2f}", metric_style))
-        story.append(Paragraph("Average Global Sentiment", ParagraphStyle(
-            'MetricLabel',
-            fontSize=11,
-            textColor=TEXT_GRAY,
-            alignment=TA_CENTER,
-            spaceAfter=20
-        )))
-        
-        story.append(Paragraph(
-            f"This week, global sentiment averaged <b>{overall:.2f}</b> across {countries} countries, "
-            f"indicating a {trend.split()[1].lower()} trend. "
-            f"Internal media tone ({avg_internal:.2f}) {'was more negative than' if avg_internal < avg_external else 'aligned with'} "
-            f"external coverage ({avg_external:.2f}), with an average dissonance of {abs(avg_dissonance):.2f}.",
-            body_style
-        ))
-        
-        story.append(Paragraph(
-            f"Analysis drew from <b>{total_articles:,}</b> articles covering geopolitical events, "
-            f"humanitarian crises, and regional developments.",
-            body_style
-        ))
-    
-    story.append(Spacer(1, 0.5*cm))
-    
-    # === TOP 5 MOST TENSE ===
-    story.append(Paragraph("Top 5 Most Tense Countries", heading_style))
-    
-    tense = get_top_tense_countries()
-    for i, country in enumerate(tense, 1):
-        tension_color = {
-            'critical': '#ff4444',
-            'high': '#ff8844',
-            'medium': '#ffaa44',
-            'low': '#44ff88'
-        }.get(country.get('tension_level', 'low'), '#888888')
-        
-        story.append(Paragraph(
-            f"<b>{i}. {country['name']}</b> "
-            f"<font color='{tension_color}'>[{(country.get('tension_level') or 'unknown').upper()}]</font>",
-            body_style
-        ))
-        
-        context = country.get('context_en') or country.get('summary_en') or 'No context available.'
-        story.append(Paragraph(context[:300] + ('...' if len(context) > 300 else ''), ParagraphStyle(
-            'Context',
-            parent=body_style,
-            leftIndent=15,
-            textColor=TEXT_GRAY,
-            fontSize=9
-        )))
-        story.append(Spacer(1, 0.3*cm))
-    
-    story.append(PageBreak())
-    
-    # === TOP 5 DISSONANCE ===
-    story.append(Paragraph("Top 5 Highest Dissonance", heading_style))
-    story.append(Paragraph(
-        "Countries where internal and external narratives diverge most significantly:",
-        body_style
-    ))
-    story.append(Spacer(1, 0.3*cm))
-    
-    dissonance = get_top_dissonance_countries()
-    for i, country in enumerate(dissonance, 1):
-        diss = country.get('dissonance', 0) or 0
-        internal = country.get('tone_internal', 0) or 0
-        external = country.get('tone_external', 0) or 0
-        
-        story.append(Paragraph(
-            f"<b>{i}. {country['name']}</b> (Dissonance: {abs(diss):.2f})",
-            body_style
-        ))
-        
-        story.append(Paragraph(
-            f"Internal: {internal:.2f} | External: {external:.2f}",
-            ParagraphStyle('Metrics', parent=body_style, leftIndent=15, fontSize=9, textColor=ACCENT_BLUE)
-        ))
-        
-        explanation = country.get('context_en') or country.get('summary_en') or \
-            f"Internal media {'more positive' if internal > external else 'more negative'} than external coverage."
-        
-        story.append(Paragraph(explanation[:250] + ('...' if len(explanation) > 250 else ''), ParagraphStyle(
-            'Explanation',
-            parent=body_style,
-            leftIndent=15,
-            fontSize=9,
-            textColor=TEXT_GRAY
-        )))
-        story.append(Spacer(1, 0.3*cm))
-    
-    # Add dissonance chart
-    diss_chart = create_dissonance_chart()
-    if diss_chart:
-        story.append(Spacer(1, 0.5*cm))
-        story.append(Image(diss_chart, width=16*cm, height=8*cm))
-    
-    story.append(PageBreak())
-    
-    # === REGIONAL BREAKDOWN ===
-    story.append(Paragraph("Regional Breakdown", heading_style))
-    
-    regions = get_regional_breakdown()
-    if regions:
-        story.append(Paragraph(
-            "Average sentiment by geographic region, comparing internal and external media tone:",
-            body_style
-        ))
-        story.append(Spacer(1, 0.5*cm))
-        
-        # Add chart
-        regional_chart = create_regional_chart()
-        if regional_chart:
-            story.append(Image(regional_chart, width=16*cm, height=10*cm))
-        
-        story.append(Spacer(1, 0.5*cm))
-        
-        # Summary table
-        for region in regions:
-            story.append(Paragraph(
-                f"<b>{region['region']}</b>: "
-                f"Internal {region['avg_internal']:.2f}, "
-                f"External {region['avg_external']:.2f}, "
-                f"Dissonance {abs(region['avg_dissonance']):.2f} "
-                f"({region['country_count']} countries)",
-                ParagraphStyle('RegionSummary', parent=body_style, fontSize=9, leftIndent=10)
-            ))
-    
-    story.append(PageBreak())
-    
-    # === NOTABLE SHIFTS ===
-    story.append(Paragraph("Notable Sentiment Shifts", heading_style))
-    story.append(Paragraph(
-        "Countries experiencing the most significant changes in media tone throughout the week:",
-        body_style
-    ))
-    story.append(Spacer(1, 0.3*cm))
-    
-    shifts = get_notable_shifts()
-    for i, shift in enumerate(shifts, 1):
-        direction = "↗ Improved" if shift['shift'] > 0 else "↘ Declined"
-        magnitude = "significantly" if abs(shift['shift']) > 2 else "moderately"
-        
-        story.append(Paragraph(
-            f"<b>{i}. {shift['name']}</b> {direction} {magnitude} "
-            f"(from {shift['from']:.2f} to {shift['to']:.2f}, Δ {shift['shift']:+.2f})",
-            body_style
-        ))
-        story.append(Spacer(1, 0.2*cm))
-    
-    story.append(Spacer(1, 0.5*cm))
-    
-    # === KEY STORIES ===
-    story.append(Paragraph("Key Stories of the Week", heading_style))
-    story.append(Paragraph(
-        "Ten representative headlines capturing this week's global narrative landscape:",
-        body_style
-    ))
-    story.append(Spacer(1, 0.3*cm))
-    
-    stories = get_key_stories()
-    for i, story_item in enumerate(stories, 1):
-        sentiment_label = "Positive" if story_item['tone'] > 1 else "Negative" if story_item['tone'] < -1 else "Neutral"
-        sentiment_color = '#44ff88' if story_item['tone'] > 1 else '#ff4444' if story_item['tone'] < -1 else '#888888'
-        
-        story.append(Paragraph(
-            f"<b>{i}.</b> {story_item['title']}",
-            body_style
-        ))
-        story.append(Paragraph(
-            f"<font color='{sentiment_color}'>{sentiment_label}</font> | "
-            f"{story_item['country']} | {story_item['type'].title()} source",
-            ParagraphStyle('StoryMeta', parent=body_style, fontSize=8, textColor=TEXT_GRAY, leftIndent=15)
-        ))
-        story.append(Spacer(1, 0.2*cm))
+    Opens one read-only connection, runs every section query inside a single
+    read transaction (so the pipeline can keep writing without pages
+    disagreeing with each other) and keeps the results for both the text
+    sections and the charts.
+    """
+
+    def __init__(self, db_path=None, start=None, end=None):
+        self.db_path = db_path or DB_PATH
+        self.start, self.end = _period(start, end)
+        self.overview = {}
+        self.tense = []
+        self.dissonance = []
+        self.regions = []
+        self.trends = []
+        self.shifts = []
+        self.stories = []
+        # Sentiment rows overview and regional had to read past the rollup
+        self.rollup_lag = 0
+
+    @TRACER.wrap('snapshot', 'ReportSnapshot.load')
+    def load(self, sections=None):
+        """Read every section, or only those named in ``sections`` (keys of SECTION_INPUTS)"""
+        import analytics
+        sections = set(SECTION_INPUTS if sections is None else sections)
+        db = open_db(self.db_path)
+        with db.read_transaction(), archive.covering(db, self.start, self.end):
+            period = (self.start, self.end)
+            if sections & {'overview', 'regional'}:
+                self.rollup_lag = rollup_lag(db)
+            if 'overview' in sections:
+                self.overview = get_global_overview(db, *period)
+            if 'tense' in sections:
+                self.tense = get_top_tense_countries(db, *period)
+            if 'dissonance' in sections:
+                self.dissonance = get_top_dissonance_countries(db, *period)
+            if 'regional' in sections:
+                self.regions = get_regional_breakdown(db, *period)
+            if 'shifts' in sections:
+                self.trends = get_timeline_trends(db, *period)
+                self.shifts = analytics.top_shifts(self.trends)
+            if 'stories' in sections:
+                self.stories = get_key_stories(db, *period)
+        return self
+
+def create_regional_chart(regions=None, vector=False):
+    """Create bar chart for regional sentiment (PNG bytes, or a Drawing with ``vector=True``)"""
+    import report_pdf
+    if regions is None:
+        regions = get_regional_breakdown()
+    return report_pdf.create_regional_chart(regions, vector)
+
+def create_dissonance_chart(countries=None, vector=False):
+    """Create bar chart for top dissonance countries (PNG bytes, or a Drawing with ``vector=True``)"""
+    import report_pdf
+    if countries is None:
+        countries = get_top_dissonance_countries()
+    return report_pdf.create_dissonance_chart(countries, vector)
+
+def generate_pdf(snapshot=None, output_path=None, vector_charts=False, sections=None):
+    """Generate the complete PDF report
+
+    ``vector_charts`` embeds the charts as native reportlab drawings instead
+    of 150-dpi PNGs: smaller files, no rasterisation, sharp at any zoom.
+    ``sections`` caches built flowables between calls (see report_pdf.generate_pdf).
+    """
+    import report_pdf
+    if snapshot is None:
+        snapshot = ReportSnapshot().load()
     
-    # Build PDF
-    doc.build(story, canvasmaker=PageNumCanvas)
+    if output_path is None:
+        output_path = default_output_path(snapshot.start, snapshot.end)
     
+    return report_pdf.generate_pdf(snapshot, output_path, vector_charts, sections)
+
+# Columns of the CSV export: one row per country
+CSV_FIELDS = ['country_code', 'name', 'shift', 'from', 'to', 'slope', 'volatility',
+              'zscore', 'external_zscore', 'divergence']
+
+def export_data(snapshot, output_path, fmt='json'):
+    """Write a snapshot's report data as JSON (every section) or CSV (per-country trends)
+
+    ``output_path`` '-' writes to stdout.
+    """
+    out = sys.stdout if output_path == '-' else open(output_path, 'w', newline='')
+    try:
+        if fmt == 'csv':
+            writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(snapshot.trends)
+        else:
+            json.dump({
+                'start': snapshot.start,
+                'end': snapshot.end,
+                'overview': snapshot.overview,
+                'tense': snapshot.tense,
+                'dissonance': snapshot.dissonance,
+                'regions': snapshot.regions,
+                'shifts': snapshot.shifts,
+                'trends': snapshot.trends,
+                'stories': snapshot.stories,
+            }, out, indent=1)
+            out.write('\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
     return output_path
 
+def default_output_path(start, end, output_dir=None, fmt='pdf'):
+    """Archive file name for a period: weeks keep the historical week-<end> name"""
+    output_dir = output_dir or REPORTS_DIR
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    if (last - first).days == 6 and first.weekday() == 0:
+        return os.path.join(output_dir, f"global-pulse-week-{end}.{fmt}")
+    return os.path.join(output_dir, f"global-pulse-{start}-to-{end}.{fmt}")
+
+def iso_week_bounds(value):
+    """(Monday, Sunday) ISO dates for '2026-W07' or any date inside the week"""
+    match = re.fullmatch(r'(\d{4})-?W(\d{1,2})', value)
+    if match:
+        monday = date.fromisocalendar(int(match.group(1)), int(match.group(2)), 1)
+    else:
+        day = date.fromisoformat(value)
+        monday = day - timedelta(days=day.weekday())
+    return monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+
+def weeks_between(first, last):
+    """Every ISO week from the one containing ``first`` to the one containing ``last``"""
+    monday, _ = iso_week_bounds(first)
+    final, _ = iso_week_bounds(last)
+    weeks = []
+    while monday <= final:
+        weeks.append(iso_week_bounds(monday))
+        monday = (date.fromisoformat(monday) + timedelta(days=7)).isoformat()
+    return weeks
+
+def _init_worker(db_path, fmt='pdf', vector_charts=False):
+    """Warm a render worker: its own read-only DB handle and, for PDFs, the renderer"""
+    if fmt == 'pdf':
+        import report_pdf
+        report_pdf.warm(vector_charts)
+    open_db(db_path)
+
+def render_job(db_path, start, end, output_path, vector_charts=False, trace=False, fmt='pdf'):
+    """Render one report; failures are returned, not raised, so a batch carries on
+
+    With ``trace`` the result carries the run's instrument spans under 'trace'.
+    ``fmt`` 'json' or 'csv' exports the data instead of rendering a PDF.
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    hits, misses = CHART_CACHE.hits, CHART_CACHE.misses
+    result = {'start': start, 'end': end, 'path': output_path, 'error': None, 'trace': None, 'rollup_lag': 0}
+    if trace:
+        TRACER.enable()
+    try:
+        snapshot = ReportSnapshot(db_path, start, end).load()
+        result['rollup_lag'] = snapshot.rollup_lag
+        if fmt == 'pdf':
+            generate_pdf(snapshot, output_path, vector_charts)
+        else:
+            export_data(snapshot, output_path, fmt)
+    except Exception:
+        result['error'] = traceback.format_exc()
+    finally:
+        if trace:
+            TRACER.disable()
+    if trace:
+        result['trace'] = dict(TRACER.export(), start=start, end=end)
+    result['seconds'] = time.perf_counter() - wall
+    result['cpu_seconds'] = time.process_time() - cpu
+    result['chart_cache_hits'] = CHART_CACHE.hits - hits
+    result['chart_cache_misses'] = CHART_CACHE.misses - misses
+    return result
+
+def render_batch(jobs, db_path, workers=1, vector_charts=False, trace=False, fmt='pdf'):
+    """Render (start, end, output_path) jobs, yielding each result as it finishes
+
+    With more than one worker the jobs are spread over a process pool, each
+    worker warmed once by _init_worker().
+    """
+    if workers <= 1:
+        for start, end, output_path in jobs:
+            yield render_job(db_path, start, end, output_path, vector_charts, trace, fmt)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_path, fmt, vector_charts)) as pool:
+        futures = {pool.submit(render_job, db_path, *job, vector_charts, trace, fmt): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception:
+                # The worker itself died (e.g. BrokenProcessPool); report the job as failed
+                start, end, output_path = futures[future]
+                yield {'start': start, 'end': end, 'path': output_path,
+                       'error': traceback.format_exc(), 'trace': None, 'seconds': 0.0, 'cpu_seconds': 0.0,
+                       'chart_cache_hits': 0, 'chart_cache_misses': 0, 'rollup_lag': 0}
+
+def _lag_note(rows):
+    return (f"  {rows} sentiment rows are not rolled up yet; overview and regional read them raw "
+            f"(run reports/rollup.py)")
+
+def watch(db_path, period=None, output_path=None, output_dir=None, fmt='pdf', vector_charts=False,
+          interval=WATCH_INTERVAL, log=sys.stdout):
+    """Keep one report up to date until interrupted
+
+    Every ``interval`` seconds ``PRAGMA data_version`` tells whether anything
+    was committed since the last poll; only then are the table signatures
+    compared, and only the sections they feed are re-read and re-rendered
+    (the other sections' flowables are reused). Without ``period`` the
+    report follows the current ISO week. Output is replaced atomically.
+    """
+    db = open_db(db_path)
+    snapshot = version = None
+    signatures, flowables = {}, {}
+    while True:
+        start, end = period or iso_week_bounds(date.today().isoformat())
+        path = output_path or default_output_path(start, end, output_dir, fmt)
+        if snapshot is None or (snapshot.start, snapshot.end) != (start, end):
+            snapshot = ReportSnapshot(db_path, start, end)
+            signatures, flowables = {}, {}
+        try:
+            current = db.conn.execute("PRAGMA data_version").fetchone()[0]
+            if current != version or not signatures:
+                started = time.perf_counter()
+                with db.read_transaction():
+                    latest = table_signatures(db, start, end)
+                    dirty = changed_sections(signatures, latest)
+                    if dirty:
+                        snapshot.load(dirty)
+                signatures, version = latest, current
+                if dirty:
+                    for name in dirty:
+                        flowables.pop(name, None)
+                    partial = f"{path}.tmp"
+                    if fmt == 'pdf':
+                        generate_pdf(snapshot, partial, vector_charts, flowables)
+                    else:
+                        export_data(snapshot, partial, fmt)
+                    os.replace(partial, path)
+                    print(f"✓ {start} to {end}: rebuilt {', '.join(sorted(dirty))} "
+                          f"({time.perf_counter() - started:.1f}s) → {path}", file=log, flush=True)
+                    if snapshot.rollup_lag:
+                        print(_lag_note(snapshot.rollup_lag), file=log, flush=True)
+        except Exception:
+            # Try again from scratch on the next poll (e.g. the writer held a lock too long)
+            signatures = {}
+            print(f"✗ {start} to {end}\n{traceback.format_exc()}", file=sys.stderr, flush=True)
+        time.sleep(interval)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate the Global Sentiment Pulse PDF report",
+        epilog="Overview and regional averages come from the daily rollup (sentiment_daily). ingest.py keeps "
+               "it current; after writing sentiment any other way (fill step, manual fixes) run reports/rollup.py. "
+               "Rows the rollup has not seen are read raw and reported, so the numbers stay right, just slower.")
+    period = parser.add_mutually_exclusive_group()
+    period.add_argument('--week', help="ISO week (2026-W07) or any date inside it")
+    period.add_argument('--start', help="first day of a custom period (YYYY-MM-DD), needs --end")
+    period.add_argument('--backfill', nargs=2, metavar=('FROM', 'TO'),
+                        help="render every weekly report between two dates or ISO weeks")
+    parser.add_argument('--end', help="last day of a custom period (YYYY-MM-DD)")
+    parser.add_argument('--db', default=DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--output', help="output file path (single report only; '-' for stdout with json/csv)")
+    parser.add_argument('--output-dir', default=REPORTS_DIR, help="directory for generated reports")
+    parser.add_argument('--format', choices=('pdf', 'json', 'csv'), default='pdf',
+                        help="render the PDF, or export the report data as JSON (all sections) or CSV (per-country trends)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="list the reports that would be generated without opening the database")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and refresh the report (default: the current week so far) "
+                             "whenever the database changes, rebuilding only the changed sections")
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL,
+                        help="seconds between database polls with --watch")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="render reports in parallel across this many processes")
+    parser.add_argument('--vector-charts', action='store_true',
+                        help="embed charts as vector drawings instead of 150-dpi PNGs")
+    parser.add_argument('--no-chart-cache', action='store_true',
+                        help="always re-render charts instead of reusing cached images")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="time queries, sections, charts and layout; write a JSON trace and print a summary")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="run under cProfile and write pstats output to PATH (forces --jobs 1)")
+    args = parser.parse_args(argv)
+    
+    if bool(args.start) != bool(args.end):
+        parser.error("--start and --end must be given together")
+    if args.output and args.backfill:
+        parser.error("--output cannot be combined with --backfill; use --output-dir")
+    if args.output == '-' and args.format == 'pdf':
+        parser.error("--output - (stdout) needs --format json or csv")
+    if args.watch and (args.backfill or args.output == '-'):
+        parser.error("--watch renders one report to a file; it cannot be combined with --backfill or --output -")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.no_chart_cache:
+        CHART_CACHE.enabled = False
+    
+    if args.watch:
+        period = (args.start, args.end) if args.start else iso_week_bounds(args.week) if args.week else None
+        print("Watching for database changes (Ctrl-C to stop)...")
+        try:
+            watch(args.db, period, args.output, args.output_dir, args.format, args.vector_charts, args.interval)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    
+    if args.backfill:
+        periods = weeks_between(*args.backfill)
+    elif args.start:
+        periods = [(args.start, args.end)]
+    elif args.week:
+        periods = [iso_week_bounds(args.week)]
+    else:
+        # Last complete ISO week
+        periods = [iso_week_bounds((date.today() - timedelta(days=7)).isoformat())]
+    
+    # Progress goes to stderr when the data itself is written to stdout
+    log = sys.stderr if args.output == '-' else sys.stdout
+    
+    # Sequential runs stay in this process: the DB connection, styles and
+    # matplotlib/reportlab state are set up once and reused for every period
+    jobs = [(start, end, args.output or default_output_path(start, end, args.output_dir, args.format))
+            for start, end in periods]
+    if args.dry_run:
+        for start, end, output_path in jobs:
+            print(f"{start} to {end} → {output_path}")
+        return 0
+    
+    print("Generating Global Sentiment Pulse Report...", file=log)
+    workers = args.jobs
+    profiler = None
+    if args.profile:
+        import cProfile
+        if workers > 1:
+            print("--profile only sees this process; rendering with --jobs 1", file=log)
+            workers = 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+    batch_started = time.perf_counter()
+    failed = 0
+    cache_hits = cache_misses = lag = 0
+    runs = []
+    for result in render_batch(jobs, args.db, workers, args.vector_charts, bool(args.trace), args.format):
+        if result['trace']:
+            runs.append(result['trace'])
+        timing = f"{result['seconds']:.1f}s wall, {result['cpu_seconds']:.1f}s cpu"
+        cache_hits += result['chart_cache_hits']
+        cache_misses += result['chart_cache_misses']
+        if result['error']:
+            failed += 1
+            print(f"✗ {result['start']} to {result['end']} ({timing})", file=log)
+            print(result['error'], file=sys.stderr)
+        else:
+            print(f"✓ {result['start']} to {result['end']} ({timing}) → {result['path']}", file=log)
+            lag = max(lag, result['rollup_lag'])
+    
+    if len(jobs) > 1:
+        print(f"\n{len(jobs) - failed}/{len(jobs)} reports generated in "
+              f"{time.perf_counter() - batch_started:.1f}s ({args.output_dir})", file=log)
+    if lag:
+        print(_lag_note(lag), file=log)
+    if CHART_CACHE.enabled and args.format == 'pdf':
+        print(f"Chart cache: {cache_hits} hits, {cache_misses} misses", file=log)
+    if profiler:
+        import pstats
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+        print(f"\nProfile written to {args.profile}; top functions by cumulative time:", file=log)
+        pstats.Stats(profiler, stream=log).sort_stats('cumulative').print_stats(20)
+    if args.trace:
+        write_trace(args.trace, runs, argv)
+        print(f"\n{format_summary(runs)}\nTrace written to {args.trace}", file=log)
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    print("Generating Global Sentiment Pulse Report...")
-    print(f"Period: {WEEK_START} to {WEEK_END}")
-    print()
-    
-    pdf_path = generate_pdf()
-    
-    print(f"✓ Report generated successfully!")
-    print(f"📄 Saved to: {pdf_path}")
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Transactional ingest of fetched sentiment into sensmundi.db
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Takes per-country fetch results (the objects in data/sentiment-cache.json,
+optionally with an ``articles`` list) and writes ``sentiment`` rows,
+``countries.last_updated``, ``articles``, the rollups and the anomaly
+scores (see anomalies.py) in one write transaction. Readers (server.js,
+the report) see either the previous refresh or the whole new one, never
+half of it. The API payloads are then republished (see publish.py).
+
+Rows go in with batched ``executemany`` upserts on indexed natural keys,
+so ingest cost depends on the size of the refresh, not of the history.
+
+Usage:
+    python reports/ingest.py [--db PATH] [--checkpoint MODE] [--no-publish] [FILE]   (FILE defaults to stdin)
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timezone
+
+import anomalies
+import migrate
+import publish
+import rollup
+import timeline_codec
+
+BATCH_SIZE = 500
+
+_SENTIMENT_UPSERT = """
+    INSERT INTO sentiment (
+        country_code, timestamp, tone_internal, tone_external, dissonance,
+        article_count_internal, article_count_external, timeline_internal, timeline_external
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (country_code, timestamp) DO UPDATE SET
+        tone_internal = excluded.tone_internal,
+        tone_external = excluded.tone_external,
+        dissonance = excluded.dissonance,
+        article_count_internal = excluded.article_count_internal,
+        article_count_external = excluded.article_count_external,
+        timeline_internal = excluded.timeline_internal,
+        timeline_external = excluded.timeline_external
+"""
+
+_COUNTRY_UPSERT = """
+    INSERT INTO countries (code, name, last_updated) VALUES (?, ?, ?)
+    ON CONFLICT (code) DO UPDATE SET last_updated = excluded.last_updated
+"""
+
+# Re-seeing an article refreshes its titles and tone but keeps the week it was first fetched in
+_ARTICLE_UPSERT = """
+    INSERT INTO articles (
+        country_code, url, title, title_es, title_en, source, published,
+        language, source_type, tone, fetched_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (country_code, url) DO UPDATE SET
+        title = excluded.title,
+        title_es = COALESCE(excluded.title_es, articles.title_es),
+        title_en = COALESCE(excluded.title_en, articles.title_en),
+        source = excluded.source,
+        tone = excluded.tone
+"""
+
+
+def snapshot_timestamp(millis=None):
+    """ISO timestamp (UTC, seconds) for a fetch run, from its epoch-millisecond stamp"""
+    moment = datetime.fromtimestamp(millis / 1000, timezone.utc) if millis else datetime.now(timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _sentiment_row(obj, timestamp):
+    int_, ext = obj['internal'], obj['external']
+    return (
+        obj['code'], timestamp, int_['tone'], ext['tone'], obj['dissonance'],
+        int_['articleCount'], ext['articleCount'],
+        timeline_codec.encode_db_value(int_['timeline']), timeline_codec.encode_db_value(ext['timeline']),
+    )
+
+
+def _article_rows(obj, timestamp):
+    for a in obj.get('articles', ()):
+        yield (
+            obj['code'], a['url'], a.get('title'), a.get('title_es'), a.get('title_en'),
+            a.get('source'), a.get('published') or a.get('date'), a.get('language'),
+            a.get('source_type'), a.get('tone'), timestamp,
+        )
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest(conn, countries, timestamp=None, checkpoint='PASSIVE'):
+    """Write an iterable of per-country fetch results in one transaction
+
+    Returns counts of rows written. ``checkpoint`` is the WAL checkpoint
+    mode run after the commit (PASSIVE never blocks readers; None skips it).
+    """
+    timestamp = timestamp or snapshot_timestamp()
+    counts = {'countries': 0, 'articles': 0, 'rollup_rows': 0, 'replaced': 0, 'anomalies': 0}
+
+    # A big refresh should not stall on an automatic checkpoint half way
+    autocheckpoint = conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0]
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+    try:
+        with migrate.write_transaction(conn):
+            for batch in _batched(countries):
+                sentiment = [_sentiment_row(obj, timestamp) for obj in batch]
+                # Existing keys are about to be updated in place, which the
+                # append-only rollup refresh cannot see
+                counts['replaced'] += conn.execute(
+                    f"SELECT COUNT(*) FROM sentiment WHERE timestamp = ? AND country_code IN "
+                    f"({', '.join('?' * len(batch))})", [timestamp] + [obj['code'] for obj in batch]).fetchone()[0]
+                conn.executemany(_SENTIMENT_UPSERT, sentiment)
+                conn.executemany(_COUNTRY_UPSERT, [(obj['code'], obj['name'], timestamp) for obj in batch])
+                for articles in _batched(row for obj in batch for row in _article_rows(obj, timestamp)):
+                    conn.executemany(_ARTICLE_UPSERT, articles)
+                    counts['articles'] += len(articles)
+                counts['countries'] += len(batch)
+            counts['rollup_rows'] = rollup.refresh(conn)
+            if counts['replaced']:
+                rollup.rebuild(conn, timestamp[:10])
+            counts['anomalies'] = anomalies.refresh(conn)
+    finally:
+        conn.execute(f"PRAGMA wal_autocheckpoint = {int(autocheckpoint)}")
+
+    if checkpoint:
+        conn.execute(f"PRAGMA wal_checkpoint({checkpoint})")
+    return counts
+
+
+def main(argv=None):
+    from generate_pulse_report import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Ingest fetched sentiment into sensmundi.db")
+    parser.add_argument('file', nargs='?', help="fetch output JSON (default: stdin)")
+    parser.add_argument('--db', default=DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--checkpoint', default='PASSIVE',
+                        choices=['PASSIVE', 'FULL', 'RESTART', 'TRUNCATE', 'NONE'],
+                        help="WAL checkpoint to run after committing")
+    parser.add_argument('--no-publish', action='store_true',
+                        help="do not republish the pre-serialized API payloads afterwards")
+    args = parser.parse_args(argv)
+
+    if args.file:
+        with open(args.file) as f:
+            data = json.load(f)
+    else:
+        data = json.load(sys.stdin)
+
+    conn = migrate.connect(args.db)
+    migrate.migrate(conn)
+    counts = ingest(conn, data['countries'].values(), snapshot_timestamp(data.get('timestamp')),
+                    None if args.checkpoint == 'NONE' else args.checkpoint)
+    conn.close()
+    print(f"✓ Ingested {counts['countries']} countries, {counts['articles']} articles "
+          f"({counts['replaced']} snapshots replaced, {counts['rollup_rows']} rows rolled up, "
+          f"{counts['anomalies']} anomalies)")
+    if not args.no_publish:
+        published = publish.publish(args.db)
+        print(f"✓ Published {published['routes']} API routes ({published['written']} changed)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
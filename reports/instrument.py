@@ -0,0 +1,184 @@
+"""
+Opt-in timing instrumentation for report runs
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Records wall and CPU time for SQL queries (by fingerprint, with row
+counts), report data getters, section builders, chart renders and the
+reportlab build, plus the process's peak RSS. Disabled by default, in
+which case every hook is a single attribute check.
+
+    TRACER.enable()
+    try:
+        ... render ...
+    finally:
+        TRACER.disable()
+    runs = [TRACER.export()]
+    write_trace(path, runs)        # JSON, for diffing runs across releases
+    print(format_summary(runs))    # per-span totals, slowest first
+"""
+
+import functools
+import hashlib
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+TRACE_VERSION = 1
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(query):
+    """(short hash, normalised SQL) that is the same for every call of one query shape"""
+    normal = _WHITESPACE.sub(' ', _LITERALS.sub('?', query)).strip()
+    return hashlib.sha1(normal.encode('utf-8')).hexdigest()[:12], normal
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far, in KiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class Tracer:
+    """Collects timed spans while enabled"""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = []
+        self.queries = {}
+        self.origin = time.perf_counter()
+
+    def enable(self):
+        self.reset()
+        self.enabled = True
+
+    def disable(self):
+        """Stop recording; the spans so far stay available to export()"""
+        self.enabled = False
+
+    def reset(self):
+        self.events = []
+        self.queries = {}
+        self.origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, kind, name, **attrs):
+        """Time the block; yields the event dict so callers can add attributes (e.g. rows)"""
+        if not self.enabled:
+            yield {}
+            return
+        event = {'kind': kind, 'name': name, **attrs}
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield event
+        finally:
+            event['start'] = round(wall - self.origin, 6)
+            event['wall'] = round(time.perf_counter() - wall, 6)
+            event['cpu'] = round(time.process_time() - cpu, 6)
+            self.events.append(event)
+
+    def wrap(self, kind, name=None):
+        """Decorator form of span()"""
+        def decorate(fn):
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(kind, label):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    @contextmanager
+    def query(self, sql):
+        """Span for one SQL statement, named by its fingerprint"""
+        if not self.enabled:
+            yield {}
+            return
+        digest, normal = fingerprint(sql)
+        self.queries.setdefault(digest, normal)
+        with self.span('sql', digest) as event:
+            yield event
+
+    def laps(self, kind):
+        """Sequential spans without re-indenting: each call ends the previous lap and starts the next"""
+        current = []
+
+        def lap(name=None):
+            if current:
+                current.pop().__exit__(None, None, None)
+            if name is not None:
+                span = self.span(kind, name)
+                span.__enter__()
+                current.append(span)
+        return lap
+
+    def export(self):
+        return {'events': self.events, 'queries': self.queries, 'peak_rss_kb': peak_rss_kb()}
+
+
+TRACER = Tracer()
+
+
+def summarize(events):
+    """Aggregate spans by (kind, name): calls, wall, CPU and rows, slowest first"""
+    totals = {}
+    for event in events:
+        entry = totals.setdefault((event['kind'], event['name']),
+                                  {'kind': event['kind'], 'name': event['name'],
+                                   'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0})
+        entry['calls'] += 1
+        entry['wall'] += event['wall']
+        entry['cpu'] += event['cpu']
+        entry['rows'] += event.get('rows', 0)
+    return sorted(totals.values(), key=lambda e: e['wall'], reverse=True)
+
+
+def format_summary(runs, limit=25):
+    """Text table of summarize() over every run's events"""
+    events = [event for run in runs for event in run['events']]
+    queries = {}
+    for run in runs:
+        queries.update(run.get('queries', {}))
+    lines = [f"{'kind':<8} {'name':<34} {'calls':>6} {'wall ms':>9} {'cpu ms':>9} {'rows':>8}"]
+    for entry in summarize(events)[:limit]:
+        name = entry['name']
+        if entry['kind'] == 'sql' and name in queries:
+            name = f"{name} {queries[name][:21]}"
+        lines.append(f"{entry['kind']:<8} {name[:34]:<34} {entry['calls']:>6} "
+                     f"{entry['wall'] * 1000:>9.1f} {entry['cpu'] * 1000:>9.1f} {entry['rows']:>8}")
+    peak = max((run.get('peak_rss_kb', 0) for run in runs), default=0)
+    lines.append(f"Peak RSS: {peak / 1024:.1f} MB")
+    return "\n".join(lines)
+
+
+def write_trace(path, runs, argv=None):
+    """Write the runs (one per rendered report) and their summary as a JSON trace file"""
+    queries = {}
+    for run in runs:
+        queries.update(run.get('queries', {}))
+    trace = {
+        'version': TRACE_VERSION,
+        'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'argv': list(sys.argv if argv is None else argv),
+        'python': platform.python_version(),
+        'pid': os.getpid(),
+        'peak_rss_kb': max((run.get('peak_rss_kb', 0) for run in runs), default=0),
+        'queries': queries,
+        'summary': summarize([event for run in runs for event in run['events']]),
+        'runs': runs,
+    }
+    with open(path, 'w') as f:
+        json.dump(trace, f, indent=1)
+    return trace
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Pulse schema migrations and query-plan checks
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Applies numbered, idempotent migrations to sensmundi.db (recorded in
+``pulse_migrations``), verifies the indexes the report relies on, and prints
+EXPLAIN QUERY PLAN for every report query so full-table scans on
+``sentiment``, ``analyses`` and ``articles`` show up before they hurt.
+
+Usage:
+    python reports/migrate.py [--db PATH] [--analyze] [--plan-only]
+"""
+
+import argparse
+import re
+import sqlite3
+import sys
+from contextlib import contextmanager
+
+import timeline_codec
+
+# name -> (table, indexed columns / expressions): the indexes the current schema
+# has, which verify_indexes() checks for. Migrations create and retire them;
+# changing this dict changes no migration
+INDEXES = {
+    # Time-window aggregates (overview, regional) read only these columns
+    'idx_sentiment_ts_cover': ('sentiment', 'timestamp, country_code, tone_internal, tone_external, '
+                                            'dissonance, article_count_internal, article_count_external'),
+    'idx_analyses_ts': ('analyses', 'timestamp, country_code, tension_level'),
+    'idx_analyses_country_ts': ('analyses', 'country_code, timestamp'),
+    'idx_articles_fetched': ('articles', 'fetched_at, country_code, tone'),
+    'idx_articles_country_fetched': ('articles', 'country_code, fetched_at'),
+}
+
+# Natural keys the ingest upserts on (migration 3). ux_sentiment_country_ts also
+# serves the analyses <-> sentiment joins and latest-per-country lookups; it
+# cannot carry extra columns and stay the ON CONFLICT target, so those joins
+# read the row itself rather than keep a second (country_code, timestamp) index
+UNIQUE_INDEXES = {
+    'ux_sentiment_country_ts': ('sentiment', 'country_code, timestamp'),
+    'ux_articles_country_url': ('articles', 'country_code, url'),
+}
+
+# Large, growing tables that must never be read with a plain SCAN
+HOT_TABLES = ('sentiment', 'analyses', 'articles')
+
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|GROUP\b|ORDER\b)(\w+))?',
+                        re.IGNORECASE)
+
+
+def _create_rollup_table(table):
+    # Sums and non-NULL counts rather than averages, so buckets can be
+    # merged incrementally and AVG() over any range stays exact
+    return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            scope TEXT NOT NULL,
+            period TEXT NOT NULL,
+            key TEXT NOT NULL,
+            samples INTEGER NOT NULL DEFAULT 0,
+            sum_tone_internal REAL NOT NULL DEFAULT 0,
+            n_tone_internal INTEGER NOT NULL DEFAULT 0,
+            sum_tone_external REAL NOT NULL DEFAULT 0,
+            n_tone_external INTEGER NOT NULL DEFAULT 0,
+            sum_dissonance REAL NOT NULL DEFAULT 0,
+            n_dissonance INTEGER NOT NULL DEFAULT 0,
+            article_count_internal INTEGER NOT NULL DEFAULT 0,
+            article_count_external INTEGER NOT NULL DEFAULT 0,
+            country_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, period, key)
+        ) WITHOUT ROWID
+    """
+
+
+# (version, name, statements); a statement is SQL or a callable taking the
+# connection. Append only, never edit an applied entry
+MIGRATIONS = [
+    # Spelled out rather than built from INDEXES, so a fresh database and an
+    # upgraded one go through the same history; migrations 7 and 8 retire two
+    (1, 'report time-window indexes', [
+        "CREATE INDEX IF NOT EXISTS idx_sentiment_ts_cover ON sentiment (timestamp, country_code, tone_internal, "
+        "tone_external, dissonance, article_count_internal, article_count_external)",
+        "CREATE INDEX IF NOT EXISTS idx_sentiment_country_ts ON sentiment (country_code, timestamp, dissonance, "
+        "tone_internal, tone_external)",
+        "CREATE INDEX IF NOT EXISTS idx_analyses_ts ON analyses (timestamp, country_code, tension_level)",
+        "CREATE INDEX IF NOT EXISTS idx_analyses_country_ts ON analyses (country_code, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_fetched ON articles (fetched_at, country_code, tone)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_country_fetched ON articles (country_code, fetched_at)",
+        "CREATE INDEX IF NOT EXISTS idx_articles_abs_tone ON articles (abs(tone) DESC, fetched_at DESC)",
+    ]),
+    (2, 'sentiment rollup tables', [
+        _create_rollup_table('sentiment_daily'),
+        _create_rollup_table('sentiment_weekly'),
+        """
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT
+        )
+        """,
+    ]),
+    (3, 'ingest upsert keys', [
+        # Exact-key duplicates predate the upsert ingest; keep the newest copy.
+        # NULL urls are never equal to each other (the unique index allows any
+        # number of them), so those rows are not duplicates and all stay
+        "DELETE FROM sentiment WHERE rowid NOT IN (SELECT MAX(rowid) FROM sentiment GROUP BY country_code, timestamp)",
+        "DELETE FROM articles WHERE url IS NOT NULL AND rowid NOT IN "
+        "(SELECT MAX(rowid) FROM articles WHERE url IS NOT NULL GROUP BY country_code, url)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_sentiment_country_ts ON sentiment (country_code, timestamp)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_articles_country_url ON articles (country_code, url)",
+        # Rows may have been removed above: let the next refresh rebuild the rollups
+        "DELETE FROM sentiment_daily",
+        "DELETE FROM sentiment_weekly",
+        "DELETE FROM rollup_state",
+    ]),
+    (4, 'packed sentiment timelines', [timeline_codec.migrate_rows]),
+    (5, 'cold archive index', [
+        # Weeks moved out to the Parquet archive (see archive.py), keyed by Monday
+        """
+        CREATE TABLE IF NOT EXISTS archive_weeks (
+            week TEXT PRIMARY KEY,
+            sentiment_rows INTEGER NOT NULL DEFAULT 0,
+            analyses_rows INTEGER NOT NULL DEFAULT 0,
+            articles_rows INTEGER NOT NULL DEFAULT 0,
+            archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+    ]),
+    (6, 'streaming anomaly detector', [
+        # One row per (country, metric): the detector's whole memory (see anomalies.py)
+        """
+        CREATE TABLE IF NOT EXISTS anomaly_state (
+            country_code TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            mean REAL,
+            var REAL NOT NULL DEFAULT 0,
+            cusum_high REAL NOT NULL DEFAULT 0,
+            cusum_low REAL NOT NULL DEFAULT 0,
+            min REAL,
+            max REAL,
+            last_timestamp TEXT,
+            PRIMARY KEY (country_code, metric)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS anomalies (
+            id INTEGER PRIMARY KEY,
+            country_code TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            value REAL,
+            expected REAL,
+            score REAL,
+            sentiment_id INTEGER,
+            detected_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_anomalies_ts ON anomalies (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_anomalies_country_ts ON anomalies (country_code, timestamp)",
+    ]),
+    (7, 'one (country_code, timestamp) index on sentiment', [
+        # Duplicated ux_sentiment_country_ts, so every ingest write maintained both
+        "DROP INDEX IF EXISTS idx_sentiment_country_ts",
+    ]),
+    (8, 'drop the article tone-strength index', [
+        # Key stories rank within each country's rows of the period, which
+        # idx_articles_fetched serves; nothing orders all articles by ABS(tone)
+        "DROP INDEX IF EXISTS idx_articles_abs_tone",
+    ]),
+    (9, 'change counter for published payloads', [
+        # Bumped by trigger in the same transaction as any write to a table the
+        # API payloads are built from, whoever the writer is; publish.py records
+        # it and server.js compares one integer instead of rescanning the tables
+        """
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            changes INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "INSERT OR IGNORE INTO change_counter (id, changes) VALUES (1, 0)",
+        *[f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_counts AFTER {event} ON {table}
+        BEGIN
+            UPDATE change_counter SET changes = changes + 1 WHERE id = 1;
+        END
+        """ for table in ('countries', 'sentiment', 'analyses', 'articles', 'anomalies')
+          for event in ('INSERT', 'UPDATE', 'DELETE')],
+    ]),
+]
+
+
+def connect(db_path):
+    """Open a writable connection for migrations and the pipeline writers"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    # Writers own the journal mode; server.js and the report read alongside in WAL
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pulse_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+    """)
+    return conn
+
+
+@contextmanager
+def write_transaction(conn):
+    """BEGIN IMMEDIATE ... COMMIT, or join the transaction the caller already has open"""
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute("SELECT version FROM pulse_migrations")}
+
+
+def migrate(conn, analyze=False):
+    """Apply pending migrations, each in its own transaction. Returns the versions applied."""
+    done = applied_versions(conn)
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if version in done:
+            continue
+        with write_transaction(conn):
+            for statement in statements:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute("INSERT INTO pulse_migrations (version, name) VALUES (?, ?)", (version, name))
+        applied.append(version)
+    if analyze:
+        # Give the planner row counts so it prefers the indexes above
+        conn.execute("ANALYZE")
+    return applied
+
+
+def verify_indexes(conn):
+    """Return a list of problems with the expected indexes (empty when all good)"""
+    existing = {row[0]: row[1] for row in conn.execute(
+        "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index'")}
+    problems = []
+    for name, (table, _columns) in {**INDEXES, **UNIQUE_INDEXES}.items():
+        if name not in existing:
+            problems.append(f"missing index {name} on {table}")
+        elif existing[name] != table:
+            problems.append(f"index {name} is on {existing[name]}, expected {table}")
+    return problems
+
+
+class _PlanRecorder:
+    """Stands in for a PulseDB and records the plan of every query instead of running it"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.plans = []
+
+    def query(self, query, params=(), rows=None):
+        plan = self.conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        self.plans.append((query, plan))
+        return []
+
+    def stream(self, query, params=(), rows=None, batch_size=None):
+        return iter(self.query(query, params))
+
+
+def report_query_plans(conn):
+    """Collect (getter name, sql, plan rows) for every report section query"""
+    import generate_pulse_report as report
+
+    getters = [
+        report.get_global_overview,
+        report.get_top_tense_countries,
+        report.get_top_dissonance_countries,
+        report.get_regional_breakdown,
+        report.get_timeline_trends,
+        report.get_key_stories,
+    ]
+    results = []
+    for getter in getters:
+        recorder = _PlanRecorder(conn)
+        getter(recorder)
+        for query, plan in recorder.plans:
+            results.append((getter.__name__, query, plan))
+    return results
+
+
+def full_scans(query, plan):
+    """Plan lines that walk a hot table without any index"""
+    tables = {}
+    for table, alias in _TABLE_REF.findall(query):
+        tables[table] = table
+        if alias:
+            tables[alias] = table
+    return [detail for _id, _parent, _unused, detail in plan
+            if detail.startswith('SCAN ') and 'INDEX' not in detail
+            and tables.get(detail.split()[1], detail.split()[1]) in HOT_TABLES]
+
+
+def format_plan(plan):
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _unused, detail in plan:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " + "  " * depth[node_id] + detail)
+    return "\n".join(lines)
+
+
+def main():
+    import generate_pulse_report as report
+
+    parser = argparse.ArgumentParser(description="Apply Pulse schema migrations and check report query plans")
+    parser.add_argument('--db', default=report.DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--analyze', action='store_true', help="run ANALYZE after migrating")
+    parser.add_argument('--plan-only', action='store_true', help="only print query plans, change nothing")
+    args = parser.parse_args()
+
+    conn = connect(args.db) if not args.plan_only else sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+
+    if not args.plan_only:
+        applied = migrate(conn, analyze=args.analyze)
+        print(f"Applied migrations: {applied or 'none (up to date)'}")
+
+    problems = verify_indexes(conn)
+    for problem in problems:
+        print(f"✗ {problem}")
+    if not problems:
+        print(f"✓ All {len(INDEXES) + len(UNIQUE_INDEXES)} report indexes present")
+    print()
+
+    scanned = 0
+    for name, query, plan in report_query_plans(conn):
+        scans = full_scans(query, plan)
+        scanned += len(scans)
+        print(f"{'✗' if scans else '✓'} {name}")
+        print(format_plan(plan))
+        print()
+
+    conn.close()
+    return 1 if problems or scanned else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Pre-serialized API payloads for server.js
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Writes the /api/sentiment response, every /api/country/<code> response
+and /api/anomalies (the detector's latest events, see anomalies.py) as
+minified JSON, plus gzip and (when the ``brotli`` package is installed)
+brotli variants. Files are named by a hash of their content. A
+manifest.json maps each route to its files and ETag; server.js streams
+those bytes as they are instead of querying and serializing per request.
+A payload that did not change keeps its files and its ETag, so clients
+revalidating with If-None-Match get a 304.
+
+The manifest also records the database's change counter (migration 9:
+triggers bump it with every write to a table the payloads are built
+from), read in the same transaction as the payloads. server.js reads that
+one row when SQLite reports a commit and, if it moved, answers from live
+queries until the next publish, so a writer that changes the database
+without republishing cannot leave stale payloads on the API.
+
+The manifest is replaced atomically. Files of the previous generation are
+kept until the next publish, so requests already being served finish.
+
+The output directory defaults to ``api/`` next to the database, which is
+where server.js looks (pipeline/api). ingest.py publishes after every
+ingest; run this directly after anything else that changes what the API
+shows.
+
+Usage:
+    python reports/publish.py [--db PATH] [--output DIR]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+import anomalies
+import timeline_codec
+from pulse_db import PulseDB
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_VERSION = 3
+MANIFEST = 'manifest.json'
+FILES_DIR = 'files'
+# Articles per country detail payload, newest first (as server.js returns)
+ARTICLE_LIMIT = 50
+
+# Latest snapshot per country; countries without one still appear, zeroed
+_SENTIMENT = """
+    SELECT c.code, c.name, c.name_es, c.region,
+           s.tone_internal, s.tone_external, s.dissonance,
+           s.article_count_internal, s.article_count_external,
+           s.timeline_internal, s.timeline_external,
+           c.last_updated
+    FROM countries c
+    LEFT JOIN (
+        SELECT country_code, MAX(timestamp) as timestamp,
+               tone_internal, tone_external, dissonance,
+               article_count_internal, article_count_external,
+               timeline_internal, timeline_external
+        FROM sentiment
+        GROUP BY country_code
+    ) s ON s.country_code = c.code
+    ORDER BY c.code
+"""
+
+_ANALYSES = """
+    SELECT country_code, summary_en, summary_es, key_topics, key_topics_es, tension_level,
+           context, context_es, model, MAX(timestamp) as timestamp
+    FROM analyses
+    GROUP BY country_code
+"""
+
+_ARTICLES = """
+    SELECT url, title, title_es, title_en, source, published, language, source_type, tone
+    FROM articles
+    WHERE country_code = ?
+    ORDER BY fetched_at DESC
+    LIMIT ?
+"""
+
+
+# Moves with every insert, update or delete on countries, sentiment,
+# analyses, articles and anomalies (see migrate.py). server.js runs the same
+# query (CHANGES_SQL there); keep the two identical.
+CHANGES = "SELECT changes FROM change_counter WHERE id = 1"
+
+
+def default_output_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), 'api')
+
+
+def changes(db):
+    """The database's change counter, as server.js reads it"""
+    return db.query(CHANGES, rows='tuple')[0][0]
+
+
+def _utc(value):
+    """An ISO timestamp as UTC with a Z suffix; naive values are stored in UTC"""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _side(row, side):
+    return {
+        'tone': row[f'tone_{side}'] or 0,
+        'articleCount': row[f'article_count_{side}'] or 0,
+        'timeline': timeline_codec.decode(row[f'timeline_{side}']),
+    }
+
+
+def _country(row):
+    internal, external = _side(row, 'internal'), _side(row, 'external')
+    return {
+        'name': row['name'],
+        'name_es': row['name_es'],
+        'region': row['region'],
+        'internal': internal,
+        'external': external,
+        'dissonance': row['dissonance'] or 0,
+        'tone': external['tone'],
+        'articleCount': internal['articleCount'] + external['articleCount'],
+        'lastUpdated': row['last_updated'],
+    }
+
+
+def _article(a):
+    return {'title': a['title'], 'title_es': a['title_es'], 'title_en': a['title_en'], 'url': a['url'],
+            'source': a['source'], 'date': a['published'], 'language': a['language']}
+
+
+def _anomaly(e):
+    return {'code': e['country_code'], 'name': e['name'], 'date': e['timestamp'], 'metric': e['metric'],
+            'kind': e['kind'], 'value': e['value'], 'expected': e['expected'], 'score': e['score']}
+
+
+def _analysis(a):
+    if not a:
+        return None
+    return {
+        'summary': a['summary_en'],
+        'summary_es': a['summary_es'],
+        'keyTopics': json.loads(a['key_topics']) if a['key_topics'] else None,
+        'keyTopics_es': json.loads(a['key_topics_es']) if a['key_topics_es'] else None,
+        'tensionLevel': a['tension_level'],
+        'context': a['context'],
+        'context_es': a['context_es'],
+        'model': a['model'],
+        'date': a['timestamp'],
+    }
+
+
+def payloads(db):
+    """Yield (route, payload) for /api/sentiment, /api/anomalies and each /api/country/<code>"""
+    rows = db.query(_SENTIMENT)
+    analyses = {a['country_code']: a for a in db.query(_ANALYSES)}
+    countries = {row['code']: _country(row) for row in rows}
+    updated = max((row['last_updated'] for row in rows if row['last_updated']), default=None)
+    yield '/api/sentiment', {
+        'countries': countries,
+        'count': len(countries),
+        'timestamp': _utc(updated) if updated else None,
+    }
+    events = [_anomaly(event) for event in anomalies.recent(db)]
+    yield '/api/anomalies', {'anomalies': events, 'count': len(events)}
+    for row in rows:
+        country = countries[row['code']]
+        articles = db.query(_ARTICLES, (row['code'], ARTICLE_LIMIT))
+        detail = {'code': row['code'], 'name': country['name'], 'name_es': country['name_es'],
+                  'region': country['region'], 'lastUpdated': country['lastUpdated']}
+        for side in ('internal', 'external'):
+            detail[side] = dict(country[side], articles=[_article(a) for a in articles
+                                                         if a['source_type'] == side])
+        detail['dissonance'] = country['dissonance']
+        detail['analysis'] = _analysis(analyses.get(row['code']))
+        yield f"/api/country/{row['code']}", detail
+
+
+def serialize(payload):
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encodings(body):
+    """Content-Encoding -> bytes; gzip without a timestamp so equal bodies give equal files"""
+    variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+_SUFFIXES = {'identity': '.json', 'gzip': '.json.gz', 'br': '.json.br'}
+
+
+def _write(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _files(manifest):
+    return {variant['file'] for entry in (manifest or {}).get('routes', {}).values()
+            for variant in entry['encodings'].values()}
+
+
+def publish(db_path, output_dir=None):
+    """Write every payload and a new manifest; returns counts of routes, files written and unchanged"""
+    output_dir = output_dir or default_output_dir(db_path)
+    files_dir = os.path.join(output_dir, FILES_DIR)
+    os.makedirs(files_dir, exist_ok=True)
+    previous = load_manifest(output_dir)
+    counts = {'routes': 0, 'written': 0, 'unchanged': 0}
+
+    db = PulseDB(db_path)
+    try:
+        with db.read_transaction():
+            content = changes(db)
+            routes = {}
+            for route, payload in payloads(db):
+                body = serialize(payload)
+                digest = hashlib.sha256(body).hexdigest()[:20]
+                old = (previous or {}).get('routes', {}).get(route)
+                if old and old['etag'] == f'"{digest}"' and all(
+                        os.path.exists(os.path.join(output_dir, v['file'])) for v in old['encodings'].values()):
+                    routes[route] = old
+                    counts['unchanged'] += 1
+                    continue
+                variants = {}
+                for encoding, data in encodings(body).items():
+                    name = f"{FILES_DIR}/{digest}{_SUFFIXES[encoding]}"
+                    path = os.path.join(output_dir, name)
+                    if not os.path.exists(path):
+                        _write(path, data)
+                    variants[encoding] = {'file': name, 'bytes': len(data)}
+                routes[route] = {'etag': f'"{digest}"', 'encodings': variants}
+                counts['written'] += 1
+            counts['routes'] = len(routes)
+    finally:
+        db.close()
+
+    manifest = {
+        'version': MANIFEST_VERSION,
+        'generation': (previous or {}).get('generation', 0) + 1,
+        'published': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'changes': content,
+        'routes': routes,
+    }
+    _write(os.path.join(output_dir, MANIFEST), json.dumps(manifest, indent=1).encode('utf-8'))
+
+    # Keep this generation's files and the previous one's (requests may still be reading them)
+    keep = _files(manifest) | _files(previous)
+    for name in os.listdir(files_dir):
+        if f"{FILES_DIR}/{name}" not in keep:
+            os.remove(os.path.join(files_dir, name))
+    return counts
+
+
+def main(argv=None):
+    from generate_pulse_report import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Publish pre-serialized API payloads for server.js")
+    parser.add_argument('--db', default=DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--output', help="publish directory (default: api/ next to the database)")
+    args = parser.parse_args(argv)
+
+    counts = publish(args.db, args.output)
+    print(f"✓ Published {counts['routes']} routes ({counts['written']} changed, "
+          f"{counts['unchanged']} unchanged{'' if brotli else ', no brotli'})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Read-only SQLite access for the Pulse Python tools
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Opens sensmundi.db the same way server.js does (read-only, alongside the
+WAL-mode ingest writer) and keeps one tuned connection per database per
+thread instead of reconnecting for every query.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from instrument import TRACER
+
+# Page cache in KiB when negative (SQLite convention): 64 MB
+CACHE_SIZE = -64000
+# Memory-map up to 256 MB of the database file
+MMAP_SIZE = 256 * 1024 * 1024
+TEMP_STORE = 'MEMORY'
+# Compiled statements kept per connection by the sqlite3 module
+STATEMENT_CACHE = 256
+# Milliseconds to wait on a lock held by the writer (e.g. a WAL checkpoint)
+BUSY_TIMEOUT = 5000
+# Rows pulled per fetchmany() call when streaming
+FETCH_BATCH = 500
+
+_pool = threading.local()
+
+
+class PulseDB:
+    """A single read-only, tuned connection to a Pulse SQLite database.
+
+    Rows come back as dicts by default, or as plain tuples with
+    ``rows='tuple'`` for large scans where building a dict per row is
+    measurable overhead.
+    """
+
+    def __init__(self, db_path, cache_size=CACHE_SIZE, mmap_size=MMAP_SIZE,
+                 temp_store=TEMP_STORE, statement_cache=STATEMENT_CACHE,
+                 rows='dict'):
+        if rows not in ('dict', 'tuple'):
+            raise ValueError(f"rows must be 'dict' or 'tuple', not {rows!r}")
+        self.db_path = db_path
+        self.rows = rows
+        # (start, end) whose archived weeks are loaded in temp tables (see archive.covering)
+        self.archive_range = None
+        self.conn = sqlite3.connect(
+            f"file:{db_path}?mode=ro",
+            uri=True,
+            cached_statements=statement_cache,
+            isolation_level=None,
+        )
+        self.conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT)}")
+        self.conn.execute(f"PRAGMA cache_size = {int(cache_size)}")
+        self.conn.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        self.conn.execute(f"PRAGMA temp_store = {temp_store}")
+        self.conn.execute("PRAGMA query_only = 1")
+        # A read-only handle cannot switch journal modes; the writer owns that.
+        # In WAL mode our reads never block it, otherwise a long read holds
+        # a shared lock, so callers should keep transactions short.
+        self.journal_mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.wal = self.journal_mode.lower() == 'wal'
+
+    def query(self, query, params=(), rows=None):
+        """Execute a query and return all rows as dicts or tuples"""
+        with TRACER.query(query) as event:
+            cursor = self.conn.execute(query, params)
+            results = cursor.fetchall()
+            event['rows'] = len(results)
+            if (rows or self.rows) == 'tuple':
+                return results
+            columns = [d[0] for d in cursor.description]
+            return [dict(zip(columns, row)) for row in results]
+
+    def stream(self, query, params=(), rows=None, batch_size=None):
+        """Yield rows as dicts or tuples, fetching ``batch_size`` at a time
+
+        Memory stays flat however many rows match. Consume the generator
+        (or close it) before the surrounding read transaction ends. When
+        tracing, the span covers the whole consumption, consumer included.
+        """
+        with TRACER.query(query) as event:
+            cursor = self.conn.execute(query, params)
+            as_tuples = (rows or self.rows) == 'tuple'
+            columns = [d[0] for d in cursor.description]
+            batch_size = batch_size or FETCH_BATCH
+            event['rows'] = 0
+            try:
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        return
+                    event['rows'] += len(batch)
+                    if as_tuples:
+                        yield from batch
+                    else:
+                        for row in batch:
+                            yield dict(zip(columns, row))
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read_transaction(self):
+        """Pin every query in the block to one consistent snapshot"""
+        if self.conn.in_transaction:
+            yield self
+            return
+        self.conn.execute("BEGIN")
+        try:
+            yield self
+        finally:
+            self.conn.execute("COMMIT")
+
+    def close(self):
+        self.conn.close()
+
+
+def open_db(db_path, **options):
+    """Return this thread's pooled connection for ``db_path``, opening it once.
+
+    Connections are keyed by path, options and process id, so a forked
+    worker never reuses its parent's handle.
+    """
+    key = (os.getpid(), db_path, tuple(sorted(options.items())))
+    connections = getattr(_pool, 'connections', None)
+    if connections is None:
+        connections = _pool.connections = {}
+    db = connections.get(key)
+    if db is None:
+        db = connections[key] = PulseDB(db_path, **options)
+    return db
+
+
+def close_all():
+    """Close every pooled connection opened by this thread"""
+    connections = getattr(_pool, 'connections', {})
+    for db in connections.values():
+        db.close()
+    connections.clear()
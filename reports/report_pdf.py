@@ -0,0 +1,637 @@
+"""
+PDF rendering for the Global Sentiment Pulse weekly report
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Everything that needs reportlab or matplotlib lives here, so the report
+CLI only pays for those imports when it actually renders a PDF
+(generate_pulse_report imports this module on first use). matplotlib is
+imported later still, on the first PNG chart that is not in the chart
+cache.
+
+Paragraph styles (STYLE_SPECS), fixed-text paragraphs and each period's
+cover page are built once per process and shared by every render, so a
+batch or a long-running watch does not rebuild them report after report.
+"""
+
+import functools
+from datetime import date
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+from reportlab.pdfgen import canvas
+from reportlab.lib.colors import HexColor
+from reportlab.graphics.shapes import Drawing, Group, Rect, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart, HorizontalBarChart
+from reportlab.graphics.charts.legends import Legend
+import io
+
+import analytics
+from chart_cache import cached_chart
+from instrument import TRACER
+
+# Color scheme
+DARK_BG = HexColor('#0a0a0f')
+ACCENT_BLUE = HexColor('#4f8ffc')
+TEXT_WHITE = HexColor('#ffffff')
+TEXT_GRAY = HexColor('#a0a0a0')
+CARD_BG = HexColor('#1a1a24')
+GRID_GRAY = HexColor('#666666')
+LIGHT_BLUE = HexColor('#8fb4fc')
+ALERT_RED = HexColor('#fc4f4f')
+
+# Tension level -> colour of its tag in the tense countries section
+TENSION_COLORS = {
+    'critical': '#ff4444',
+    'high': '#ff8844',
+    'medium': '#ffaa44',
+    'low': '#44ff88'
+}
+# Story tone label -> colour
+TONE_COLORS = {'Positive': '#44ff88', 'Negative': '#ff4444', 'Neutral': '#888888'}
+
+def _pyplot():
+    """pyplot on the Agg backend, imported on the first PNG chart"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+@TRACER.wrap('chart')
+def create_regional_chart(regions, vector=False):
+    """Create bar chart for regional sentiment
+
+    Returns PNG bytes for an Image flowable, or with ``vector=True`` a
+    reportlab Drawing that embeds directly and stays sharp at any zoom.
+    """
+    if not regions:
+        return None
+    
+    # Prepare data
+    region_names = [r['region'][:15] for r in regions]  # Truncate names
+    internal_tones = [r['avg_internal'] or 0 for r in regions]
+    external_tones = [r['avg_external'] or 0 for r in regions]
+    
+    if vector:
+        return _vector_regional_chart(region_names, internal_tones, external_tones)
+    return _draw_regional_chart(region_names, internal_tones, external_tones)
+
+@cached_chart
+def _draw_regional_chart(region_names, internal_tones, external_tones):
+    plt = _pyplot()
+    
+    # Create figure with dark background
+    fig, ax = plt.subplots(figsize=(10, 5), facecolor='#0a0a0f')
+    ax.set_facecolor('#0a0a0f')
+    
+    x = range(len(region_names))
+    width = 0.35
+    
+    bars1 = ax.bar([i - width/2 for i in x], internal_tones, width, 
+                    label='Internal', color='#4f8ffc', alpha=0.8)
+    bars2 = ax.bar([i + width/2 for i in x], external_tones, width,
+                    label='External', color='#8fb4fc', alpha=0.8)
+    
+    ax.set_xlabel('Region', color='#ffffff', fontsize=10)
+    ax.set_ylabel('Average Sentiment Tone', color='#ffffff', fontsize=10)
+    ax.set_title('Regional Sentiment Breakdown', color='#ffffff', fontsize=12, fontweight='bold')
+    ax.set_xticks(x)
+    ax.set_xticklabels(region_names, rotation=45, ha='right', color='#a0a0a0', fontsize=8)
+    ax.tick_params(axis='y', labelcolor='#a0a0a0')
+    ax.legend(facecolor='#1a1a24', edgecolor='#4f8ffc', labelcolor='#ffffff')
+    ax.axhline(y=0, color='#666666', linestyle='--', linewidth=0.5)
+    ax.grid(axis='y', alpha=0.2, color='#666666')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_color('#666666')
+    ax.spines['left'].set_color('#666666')
+    
+    plt.tight_layout()
+    
+    # Save to bytes
+    img_buffer = io.BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=150, facecolor='#0a0a0f', edgecolor='none')
+    img_buffer.seek(0)
+    plt.close()
+    
+    return img_buffer
+
+@TRACER.wrap('chart')
+def create_dissonance_chart(countries, vector=False):
+    """Create bar chart for top dissonance countries (PNG bytes, or a Drawing with ``vector=True``)"""
+    if not countries:
+        return None
+    
+    # Prepare data
+    names = [c['name'][:20] for c in countries]
+    dissonance_values = [abs(c['dissonance'] or 0) for c in countries]
+    
+    if vector:
+        return _vector_dissonance_chart(names, dissonance_values)
+    return _draw_dissonance_chart(names, dissonance_values)
+
+@cached_chart
+def _draw_dissonance_chart(names, dissonance_values):
+    plt = _pyplot()
+    
+    # Create figure
+    fig, ax = plt.subplots(figsize=(10, 4), facecolor='#0a0a0f')
+    ax.set_facecolor('#0a0a0f')
+    
+    bars = ax.barh(names, dissonance_values, color='#fc4f4f', alpha=0.8)
+    
+    ax.set_xlabel('Dissonance Level', color='#ffffff', fontsize=10)
+    ax.set_title('Top 5 Highest Dissonance Countries', color='#ffffff', fontsize=12, fontweight='bold')
+    ax.tick_params(axis='both', labelcolor='#a0a0a0')
+    ax.grid(axis='x', alpha=0.2, color='#666666')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_color('#666666')
+    ax.spines['left'].set_color('#666666')
+    
+    plt.tight_layout()
+    
+    # Save to bytes
+    img_buffer = io.BytesIO()
+    plt.savefig(img_buffer, format='png', dpi=150, facecolor='#0a0a0f', edgecolor='none')
+    img_buffer.seek(0)
+    plt.close()
+    
+    return img_buffer
+
+def _vector_canvas(width, height, title):
+    """Dark chart background with a centred title, matching the matplotlib charts"""
+    drawing = Drawing(width, height)
+    drawing.add(Rect(0, 0, width, height, fillColor=DARK_BG, strokeColor=None))
+    drawing.add(String(width / 2, height - 18, title, fontName='Helvetica-Bold', fontSize=12,
+                       fillColor=TEXT_WHITE, textAnchor='middle'))
+    return drawing
+
+def _style_vector_axes(chart):
+    for axis in (chart.categoryAxis, chart.valueAxis):
+        axis.strokeColor = GRID_GRAY
+        axis.labels.fillColor = TEXT_GRAY
+        axis.labels.fontName = 'Helvetica'
+        axis.labels.fontSize = 7
+    chart.valueAxis.rangeRound = 'both'
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = HexColor('#2a2a34')
+    chart.valueAxis.gridStrokeWidth = 0.5
+    chart.bars.strokeColor = None
+
+def _vector_regional_chart(region_names, internal_tones, external_tones, width=16*cm, height=10*cm):
+    drawing = _vector_canvas(width, height, 'Regional Sentiment Breakdown')
+    
+    chart = VerticalBarChart()
+    chart.x, chart.y = 55, 75
+    chart.width, chart.height = width - 75, height - 135
+    chart.data = [internal_tones, external_tones]
+    chart.categoryAxis.categoryNames = region_names
+    # Keep region labels under the plot even when tones are negative
+    chart.categoryAxis.joinAxisMode = 'bottom'
+    chart.categoryAxis.labels.angle = 45
+    chart.categoryAxis.labels.boxAnchor = 'ne'
+    chart.categoryAxis.labels.dy = -4
+    chart.groupSpacing = 8
+    _style_vector_axes(chart)
+    chart.bars[0].fillColor = ACCENT_BLUE
+    chart.bars[1].fillColor = LIGHT_BLUE
+    drawing.add(chart)
+    
+    # Axis titles, as on the PNG
+    drawing.add(String(chart.x + chart.width / 2, 8, 'Region', fontName='Helvetica', fontSize=9,
+                       fillColor=TEXT_WHITE, textAnchor='middle'))
+    y_title = Group(String(0, 0, 'Average Sentiment Tone', fontName='Helvetica', fontSize=9,
+                           fillColor=TEXT_WHITE, textAnchor='middle'))
+    y_title.translate(14, chart.y + chart.height / 2)
+    y_title.rotate(90)
+    drawing.add(y_title)
+    
+    legend = Legend()
+    legend.x, legend.y = width - 20, height - 34
+    legend.boxAnchor = 'ne'
+    legend.alignment = 'right'
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 8
+    legend.fillColor = TEXT_WHITE
+    legend.dx = legend.dy = 8
+    legend.columnMaximum = 1
+    legend.deltax = 60
+    legend.colorNamePairs = [(ACCENT_BLUE, 'Internal'), (LIGHT_BLUE, 'External')]
+    drawing.add(legend)
+    
+    return drawing
+
+def _vector_dissonance_chart(names, dissonance_values, width=16*cm, height=8*cm):
+    drawing = _vector_canvas(width, height, 'Top 5 Highest Dissonance Countries')
+    
+    chart = HorizontalBarChart()
+    chart.x, chart.y = 110, 30
+    chart.width, chart.height = width - 130, height - 65
+    chart.data = [dissonance_values]
+    chart.categoryAxis.categoryNames = names
+    chart.categoryAxis.labels.boxAnchor = 'e'
+    chart.categoryAxis.labels.dx = -4
+    chart.valueAxis.valueMin = 0
+    _style_vector_axes(chart)
+    chart.bars[0].fillColor = ALERT_RED
+    drawing.add(chart)
+    
+    drawing.add(String(chart.x + chart.width / 2, 6, 'Dissonance Level', fontName='Helvetica', fontSize=9,
+                       fillColor=TEXT_WHITE, textAnchor='middle'))
+    return drawing
+
+class PageNumCanvas(canvas.Canvas):
+    """Custom canvas for page numbers and footer
+
+    The footer is drawn as each page finishes. "Page N of M" needs the
+    total, so each page only references a tiny per-page form that save()
+    fills in once M is known; no page state is kept in memory meanwhile.
+    """
+    
+    def showPage(self):
+        page_num = self.getPageNumber()
+        if page_num > 1:  # Skip footer on cover page
+            self.draw_page_footer(page_num)
+        canvas.Canvas.showPage(self)
+        
+    def save(self):
+        if len(self._code):
+            self.showPage()
+        page_count = self.getPageNumber() - 1
+        for page_num in range(2, page_count + 1):
+            self.beginForm(f"pageNumber{page_num}")
+            self.setFillColor(TEXT_GRAY)
+            self.setFont('Helvetica', 8)
+            self.drawRightString(A4[0] - 2*cm, 1.5*cm, f"Page {page_num} of {page_count}")
+            self.endForm()
+        canvas.Canvas.save(self)
+        
+    def draw_page_footer(self, page_num):
+        self.saveState()
+        self.setFillColor(TEXT_GRAY)
+        self.setFont('Helvetica', 8)
+        footer_text = f"Generated by Pulse (pulse.aeoninfinitive.com) — Aeon Infinitive"
+        self.drawString(2*cm, 1.5*cm, footer_text)
+        self.doForm(f"pageNumber{page_num}")
+        self.restoreState()
+
+# key -> (ParagraphStyle name, parent, attributes). A parent is an earlier
+# key or a getSampleStyleSheet() name; None means reportlab's defaults
+STYLE_SPECS = {
+    'title': ('CustomTitle', 'Heading1', dict(
+        fontSize=32, textColor=TEXT_WHITE, alignment=TA_CENTER, spaceAfter=12, fontName='Helvetica-Bold')),
+    'subtitle': ('CustomSubtitle', 'Heading2', dict(
+        fontSize=16, textColor=ACCENT_BLUE, alignment=TA_CENTER, spaceAfter=30, fontName='Helvetica')),
+    'heading': ('CustomHeading', 'Heading2', dict(
+        fontSize=18, textColor=ACCENT_BLUE, spaceAfter=12, spaceBefore=20, fontName='Helvetica-Bold')),
+    'body': ('CustomBody', 'Normal', dict(
+        fontSize=10, textColor=TEXT_WHITE, spaceAfter=6, leading=14, fontName='Helvetica')),
+    'metric': ('Metric', 'Normal', dict(
+        fontSize=24, textColor=ACCENT_BLUE, alignment=TA_CENTER, spaceAfter=6, fontName='Helvetica-Bold')),
+    'metric_label': ('MetricLabel', None, dict(
+        fontSize=11, textColor=TEXT_GRAY, alignment=TA_CENTER, spaceAfter=20)),
+    'brand': ('Brand', None, dict(fontSize=14, textColor=TEXT_GRAY, alignment=TA_CENTER, fontName='Helvetica')),
+    'context': ('Context', 'body', dict(leftIndent=15, textColor=TEXT_GRAY, fontSize=9)),
+    'explanation': ('Explanation', 'body', dict(leftIndent=15, fontSize=9, textColor=TEXT_GRAY)),
+    'metrics': ('Metrics', 'body', dict(leftIndent=15, fontSize=9, textColor=ACCENT_BLUE)),
+    'region_summary': ('RegionSummary', 'body', dict(fontSize=9, leftIndent=10)),
+    'story_meta': ('StoryMeta', 'body', dict(fontSize=8, textColor=TEXT_GRAY, leftIndent=15)),
+}
+
+_STYLES = None
+
+def _styles():
+    """Every paragraph style in STYLE_SPECS by key, built once per process"""
+    global _STYLES
+    if _STYLES is not None:
+        return _STYLES
+    
+    sample = getSampleStyleSheet()
+    styles = {}
+    for key, (name, parent, attributes) in STYLE_SPECS.items():
+        parent = styles[parent] if parent in styles else sample[parent] if parent else None
+        styles[key] = ParagraphStyle(name, parent=parent, **attributes)
+    
+    _STYLES = styles
+    return _STYLES
+
+@functools.lru_cache(maxsize=None)
+def _static(text, style):
+    """A Paragraph whose text never changes (headings, intros), shared by every render"""
+    return Paragraph(text, _styles()[style])
+
+@functools.lru_cache(maxsize=16)
+def _cover(start, end):
+    """The cover page flowables for a period; a batch over one week builds them once"""
+    styles = _styles()
+    return (
+        Spacer(1, 6*cm),
+        Paragraph("GLOBAL SENTIMENT PULSE", styles['title']),
+        Paragraph(format_period(start, end), styles['subtitle']),
+        Spacer(1, 2*cm),
+        Paragraph("Aeon Infinitive", styles['brand']),
+        PageBreak(),
+    )
+
+def warm(vector_charts=False):
+    """Build styles and, unless charts are vector, start matplotlib: for batch workers"""
+    _styles()
+    if not vector_charts:
+        plt = _pyplot()
+        plt.figure()
+        plt.close('all')
+
+def format_period(start, end):
+    """Human label for a report period, e.g. 'Week of February 9-15, 2026'"""
+    first, last = date.fromisoformat(start), date.fromisoformat(end)
+    if first.year != last.year:
+        label = f"{first:%B} {first.day}, {first.year} - {last:%B} {last.day}, {last.year}"
+    elif first.month != last.month:
+        label = f"{first:%B} {first.day} - {last:%B} {last.day}, {last.year}"
+    else:
+        label = f"{first:%B} {first.day}-{last.day}, {last.year}"
+    if (last - first).days == 6 and first.weekday() == 0:
+        return f"Week of {label}"
+    return label
+
+def _cover_section(snapshot, styles, vector_charts=False):
+    """Title page: report name and period"""
+    return list(_cover(snapshot.start, snapshot.end))
+
+def _overview_section(snapshot, styles, vector_charts=False):
+    """Average tone across every tracked country"""
+    body_style = styles['body']
+    story = []
+    overview = snapshot.overview
+    
+    story.append(_static("Global Overview", 'heading'))
+    
+    if overview:
+        avg_internal = overview.get('avg_internal', 0) or 0
+        avg_external = overview.get('avg_external', 0) or 0
+        avg_dissonance = overview.get('avg_dissonance', 0) or 0
+        total_articles = (overview.get('total_internal', 0) or 0) + (overview.get('total_external', 0) or 0)
+        countries = overview.get('countries_tracked', 0) or 0
+        
+        # Overall sentiment
+        overall = (avg_internal + avg_external) / 2
+        trend = "↗ Improving" if overall > -0.5 else "↘ Declining" if overall < -1.5 else "→ Stable"
+        
+        story.append(Paragraph(f"{overall:.2f}", styles['metric']))
+        story.append(_static("Average Global Sentiment", 'metric_label'))
+        
+        story.append(Paragraph(
+            f"This week, global sentiment averaged <b>{overall:.2f}</b> across {countries} countries, "
+            f"indicating a {trend.split()[1].lower()} trend. "
+            f"Internal media tone ({avg_internal:.2f}) {'was more negative than' if avg_internal < avg_external else 'aligned with'} "
+            f"external coverage ({avg_external:.2f}), with an average dissonance of {abs(avg_dissonance):.2f}.",
+            body_style
+        ))
+        
+        story.append(Paragraph(
+            f"Analysis drew from <b>{total_articles:,}</b> articles covering geopolitical events, "
+            f"humanitarian crises, and regional developments.",
+            body_style
+        ))
+    
+    story.append(Spacer(1, 0.5*cm))
+    
+    return story
+
+def _tense_section(snapshot, styles, vector_charts=False):
+    """Countries with the highest analysed tension"""
+    body_style = styles['body']
+    story = []
+    story.append(_static("Top 5 Most Tense Countries", 'heading'))
+    
+    tense = snapshot.tense
+    for i, country in enumerate(tense, 1):
+        tension_color = TENSION_COLORS.get(country.get('tension_level', 'low'), '#888888')
+        
+        story.append(Paragraph(
+            f"<b>{i}. {country['name']}</b> "
+            f"<font color='{tension_color}'>[{(country.get('tension_level') or 'unknown').upper()}]</font>",
+            body_style
+        ))
+        
+        context = country.get('context_en') or country.get('summary_en') or 'No context available.'
+        story.append(Paragraph(context[:300] + ('...' if len(context) > 300 else ''), styles['context']))
+        story.append(Spacer(1, 0.3*cm))
+    
+    story.append(PageBreak())
+    
+    return story
+
+def _dissonance_section(snapshot, styles, vector_charts=False):
+    """Largest internal/external gaps, with their chart"""
+    body_style = styles['body']
+    story = []
+    story.append(_static("Top 5 Highest Dissonance", 'heading'))
+    story.append(_static("Countries where internal and external narratives diverge most significantly:", 'body'))
+    story.append(Spacer(1, 0.3*cm))
+    
+    dissonance = snapshot.dissonance
+    for i, country in enumerate(dissonance, 1):
+        diss = country.get('dissonance', 0) or 0
+        internal = country.get('tone_internal', 0) or 0
+        external = country.get('tone_external', 0) or 0
+        
+        story.append(Paragraph(
+            f"<b>{i}. {country['name']}</b> (Dissonance: {abs(diss):.2f})",
+            body_style
+        ))
+        
+        story.append(Paragraph(
+            f"Internal: {internal:.2f} | External: {external:.2f}",
+            styles['metrics']
+        ))
+        
+        explanation = country.get('context_en') or country.get('summary_en') or \
+            f"Internal media {'more positive' if internal > external else 'more negative'} than external coverage."
+        
+        story.append(Paragraph(explanation[:250] + ('...' if len(explanation) > 250 else ''),
+                               styles['explanation']))
+        story.append(Spacer(1, 0.3*cm))
+    
+    # Add dissonance chart
+    diss_chart = create_dissonance_chart(dissonance, vector=vector_charts)
+    if diss_chart is not None:
+        story.append(Spacer(1, 0.5*cm))
+        story.append(diss_chart if vector_charts else Image(diss_chart, width=16*cm, height=8*cm))
+    
+    story.append(PageBreak())
+    
+    return story
+
+def _regional_section(snapshot, styles, vector_charts=False):
+    """Regional averages, chart and summary lines"""
+    story = []
+    story.append(_static("Regional Breakdown", 'heading'))
+    
+    regions = snapshot.regions
+    if regions:
+        story.append(_static(
+            "Average sentiment by geographic region, comparing internal and external media tone:", 'body'))
+        story.append(Spacer(1, 0.5*cm))
+        
+        # Add chart
+        regional_chart = create_regional_chart(regions, vector=vector_charts)
+        if regional_chart is not None:
+            story.append(regional_chart if vector_charts else Image(regional_chart, width=16*cm, height=10*cm))
+        
+        story.append(Spacer(1, 0.5*cm))
+        
+        # Summary table
+        for region in regions:
+            story.append(Paragraph(
+                f"<b>{region['region']}</b>: "
+                f"Internal {region['avg_internal']:.2f}, "
+                f"External {region['avg_external']:.2f}, "
+                f"Dissonance {abs(region['avg_dissonance']):.2f} "
+                f"({region['country_count']} countries)",
+                styles['region_summary']
+            ))
+    
+    story.append(PageBreak())
+    
+    return story
+
+def _shifts_section(snapshot, styles, vector_charts=False):
+    """Biggest moves, unusual readings and widening gaps"""
+    body_style, metrics_style = styles['body'], styles['metrics']
+    story = []
+    story.append(_static("Notable Sentiment Shifts", 'heading'))
+    story.append(_static(
+        "Countries experiencing the most significant changes in media tone throughout the week:", 'body'))
+    story.append(Spacer(1, 0.3*cm))
+    
+    shifts = snapshot.shifts
+    for i, shift in enumerate(shifts, 1):
+        direction = "↗ Improved" if shift['shift'] > 0 else "↘ Declined"
+        magnitude = "significantly" if abs(shift['shift']) > 2 else "moderately"
+        
+        story.append(Paragraph(
+            f"<b>{i}. {shift['name']}</b> {direction} {magnitude} "
+            f"(from {shift['from']:.2f} to {shift['to']:.2f}, Δ {shift['shift']:+.2f})",
+            body_style
+        ))
+        if shift['slope'] is not None:
+            story.append(Paragraph(
+                f"Trend {shift['slope']:+.2f}/day | Volatility {shift['volatility']:.2f}",
+                metrics_style
+            ))
+        story.append(Spacer(1, 0.2*cm))
+
+    unusual = analytics.anomalies(snapshot.trends)
+    if unusual:
+        story.append(Spacer(1, 0.3*cm))
+        story.append(Paragraph(
+            f"<b>Unusual readings</b> — latest tone at least {analytics.ANOMALY_Z:.0f} standard deviations "
+            f"from the country's previous {analytics.BASELINE_DAYS} days:",
+            body_style
+        ))
+        for trend in unusual:
+            scores = ", ".join(f"{label} z {z:+.1f}" for label, z in
+                               (("internal", trend['zscore']), ("external", trend['external_zscore']))
+                               if z is not None)
+            story.append(Paragraph(
+                f"{trend['name']}: {scores}",
+                metrics_style
+            ))
+
+    gaps = [t for t in analytics.widening_gaps(snapshot.trends) if abs(t['divergence']) >= 0.01]
+    if gaps:
+        story.append(Spacer(1, 0.3*cm))
+        story.append(_static(
+            "<b>Fastest-moving gaps</b> — change per day in internal minus external tone:", 'body'))
+        for trend in gaps:
+            story.append(Paragraph(
+                f"{trend['name']}: {trend['divergence']:+.2f}/day",
+                metrics_style
+            ))
+
+    story.append(Spacer(1, 0.5*cm))
+    
+    return story
+
+def _stories_section(snapshot, styles, vector_charts=False):
+    """Representative headlines of the period"""
+    body_style = styles['body']
+    story = []
+    story.append(_static("Key Stories of the Week", 'heading'))
+    story.append(_static(
+        "Ten representative headlines capturing this week's global narrative landscape:", 'body'))
+    story.append(Spacer(1, 0.3*cm))
+    
+    stories = snapshot.stories
+    for i, story_item in enumerate(stories, 1):
+        sentiment_label = "Positive" if story_item['tone'] > 1 else "Negative" if story_item['tone'] < -1 else "Neutral"
+        sentiment_color = TONE_COLORS[sentiment_label]
+        
+        story.append(Paragraph(
+            f"<b>{i}.</b> {story_item['title']}",
+            body_style
+        ))
+        story.append(Paragraph(
+            f"<font color='{sentiment_color}'>{sentiment_label}</font> | "
+            f"{story_item['country']} | {story_item['type'].title()} source",
+            styles['story_meta']
+        ))
+        story.append(Spacer(1, 0.2*cm))
+    
+    return story
+
+# Report sections in page order: name -> builder returning the section's flowables
+SECTIONS = [
+    ('cover', _cover_section),
+    ('overview', _overview_section),
+    ('tense', _tense_section),
+    ('dissonance', _dissonance_section),
+    ('regional', _regional_section),
+    ('shifts', _shifts_section),
+    ('stories', _stories_section),
+]
+
+def generate_pdf(snapshot, output_path, vector_charts=False, sections=None):
+    """Generate the complete PDF report
+
+    ``vector_charts`` embeds the charts as native reportlab drawings instead
+    of 150-dpi PNGs: smaller files, no rasterisation, sharp at any zoom.
+
+    ``sections`` is an optional dict of already built flowables by section
+    name. Missing sections are built and stored in it, so a caller that
+    drops only the sections whose data changed (watch mode) rebuilds just
+    those on the next call.
+    """
+    # Create PDF with custom canvas
+    doc = SimpleDocTemplate(
+        output_path,
+        pagesize=A4,
+        topMargin=2*cm,
+        bottomMargin=2.5*cm,
+        leftMargin=2*cm,
+        rightMargin=2*cm
+    )
+    
+    if sections is None:
+        sections = {}
+    styles = _styles()
+    story = []
+    for name, build in SECTIONS:
+        if name not in sections:
+            with TRACER.span('section', name):
+                sections[name] = build(snapshot, styles, vector_charts)
+        for flowable in sections[name]:
+            # platypus marks a flowable it pushed to the next frame and refuses
+            # to push it twice; a reused one starts over in the new layout
+            flowable.__dict__.pop('_postponed', None)
+        story.extend(sections[name])
+    
+    # Build PDF
+    with TRACER.span('build', 'doc.build'):
+        doc.build(story, canvasmaker=PageNumCanvas)
+    
+    return output_path
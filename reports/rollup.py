@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Incremental sentiment rollups
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Keeps ``sentiment_daily`` and ``sentiment_weekly`` (per country and per
+region) up to date from the raw ``sentiment`` table. Only rows past the
+stored rowid watermark are read on each run, so a refresh after an ingest
+touches a few hundred rows instead of the whole history.
+
+Buckets hold sums and non-NULL counts; averages are ``sum / n`` at read
+time, which gives the same result as AVG() over the raw rows for any
+range of whole days. Weeks run Monday to Sunday and are keyed by their
+Monday.
+
+Usage:
+    python reports/rollup.py [--db PATH] [--rebuild [SINCE]]
+"""
+
+import argparse
+import sys
+
+import archive
+import migrate
+
+WATERMARK = 'sentiment'
+
+DAY = "substr(timestamp, 1, 10)"
+WEEK = f"date({DAY}, 'weekday 0', '-6 days')"
+
+# table -> period expression over a sentiment row
+GRAINS = {
+    'sentiment_daily': DAY,
+    'sentiment_weekly': WEEK,
+}
+
+_MEASURES = (
+    'samples',
+    'sum_tone_internal', 'n_tone_internal',
+    'sum_tone_external', 'n_tone_external',
+    'sum_dissonance', 'n_dissonance',
+    'article_count_internal', 'article_count_external',
+)
+
+
+def _add_country_rows(conn, table, period, where, params):
+    """Fold the matching raw rows into the per-country buckets"""
+    updates = ",\n".join(f"{m} = {m} + excluded.{m}" for m in _MEASURES)
+    conn.execute(f"""
+        INSERT INTO {table} (scope, period, key, {', '.join(_MEASURES)}, country_count)
+        SELECT
+            'country',
+            {period},
+            country_code,
+            COUNT(*),
+            TOTAL(tone_internal), COUNT(tone_internal),
+            TOTAL(tone_external), COUNT(tone_external),
+            TOTAL(dissonance), COUNT(dissonance),
+            TOTAL(article_count_internal), TOTAL(article_count_external),
+            1
+        FROM sentiment
+        WHERE {where}
+        GROUP BY country_code, {period}
+        ON CONFLICT (scope, period, key) DO UPDATE SET
+        {updates}
+    """, params)
+
+
+def _rebuild_region_rows(conn, table, period, where, params):
+    """Recompute the region buckets for every period the matching rows touch
+
+    Region rows are derived from the country rows rather than added to, so
+    ``country_count`` stays a distinct count.
+    """
+    touched = f"SELECT DISTINCT {period} FROM sentiment WHERE {where}"
+    conn.execute(f"DELETE FROM {table} WHERE scope = 'region' AND period IN ({touched})", params)
+    sums = ", ".join(f"SUM(d.{m})" for m in _MEASURES)
+    conn.execute(f"""
+        INSERT INTO {table} (scope, period, key, {', '.join(_MEASURES)}, country_count)
+        SELECT 'region', d.period, c.region, {sums}, COUNT(*)
+        FROM {table} d
+        JOIN countries c ON d.key = c.code
+        WHERE d.scope = 'country'
+            AND d.period IN ({touched})
+            AND c.region IS NOT NULL AND c.region != ''
+        GROUP BY d.period, c.region
+    """, params)
+
+
+def _aggregate(conn, where, params):
+    for table, period in GRAINS.items():
+        _add_country_rows(conn, table, period, where, params)
+        _rebuild_region_rows(conn, table, period, where, params)
+
+
+def get_watermark(conn, name=WATERMARK):
+    """Last sentiment rowid the ``name`` consumer has processed (anomalies.py keeps its own)"""
+    row = conn.execute("SELECT last_rowid FROM rollup_state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def set_watermark(conn, rowid, name=WATERMARK):
+    conn.execute("""
+        INSERT INTO rollup_state (name, last_rowid, updated_at) VALUES (?, ?, datetime('now'))
+        ON CONFLICT (name) DO UPDATE SET last_rowid = excluded.last_rowid, updated_at = excluded.updated_at
+    """, (name, rowid))
+
+
+def refresh(conn):
+    """Roll up sentiment rows added since the last run. Returns how many were processed.
+
+    Assumes ``sentiment`` is append-only; use rebuild() after editing or
+    deleting history. Joins the caller's transaction if one is open, so an
+    ingest can commit raw rows and rollups together.
+    """
+    with migrate.write_transaction(conn):
+        last = get_watermark(conn)
+        newest = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM sentiment").fetchone()[0]
+        processed = 0
+        if newest > last:
+            processed = conn.execute(
+                "SELECT COUNT(*) FROM sentiment WHERE rowid > ? AND rowid <= ?", (last, newest)).fetchone()[0]
+            _aggregate(conn, "rowid > ? AND rowid <= ?", (last, newest))
+            set_watermark(conn, newest)
+    return processed
+
+
+def rebuild(conn, since=None):
+    """Recompute rollups from raw rows, for everything or from ``since`` (YYYY-MM-DD) on
+
+    ``since`` is moved back to the Monday of its week so weekly buckets are
+    never left half-filled. Weeks moved to the archive have no raw rows left,
+    so their buckets are kept: the rebuild starts after the last one.
+    """
+    floor = archive.hot_since(conn)
+    if floor and (since is None or since < floor):
+        since = floor
+    with migrate.write_transaction(conn):
+        refresh(conn)
+        last = get_watermark(conn)
+        if since is None:
+            for table in GRAINS:
+                conn.execute(f"DELETE FROM {table}")
+            _aggregate(conn, "rowid <= ?", (last,))
+        else:
+            start = conn.execute("SELECT date(?, 'weekday 0', '-6 days')", (since,)).fetchone()[0]
+            for table in GRAINS:
+                conn.execute(f"DELETE FROM {table} WHERE period >= ?", (start,))
+            _aggregate(conn, f"rowid <= ? AND {DAY} >= ?", (last, start))
+
+
+def read_rollup(db, start, end, scope='country', grain='sentiment_daily'):
+    """Average tone and dissonance per key over whole periods from ``start`` to ``end``
+
+    ``db`` is anything with a ``query()`` method (a PulseDB or the report's
+    snapshot connection). Periods are days, or week Mondays for the weekly
+    grain.
+    """
+    if grain not in GRAINS:
+        raise ValueError(f"unknown rollup grain {grain!r}")
+    return db.query(f"""
+        SELECT
+            key,
+            SUM(sum_tone_internal) / SUM(n_tone_internal) as avg_internal,
+            SUM(sum_tone_external) / SUM(n_tone_external) as avg_external,
+            SUM(sum_dissonance) / SUM(n_dissonance) as avg_dissonance,
+            SUM(article_count_internal) as total_internal,
+            SUM(article_count_external) as total_external,
+            SUM(samples) as samples
+        FROM {grain}
+        WHERE scope = ? AND period >= ? AND period <= ?
+        GROUP BY key
+        ORDER BY key
+    """, (scope, start, end))
+
+
+def main():
+    from generate_pulse_report import DB_PATH
+
+    parser = argparse.ArgumentParser(description="Refresh the sentiment rollup tables")
+    parser.add_argument('--db', default=DB_PATH, help="path to sensmundi.db")
+    parser.add_argument('--rebuild', nargs='?', const='all', metavar='SINCE',
+                        help="recompute from raw rows (everything, or from YYYY-MM-DD on)")
+    args = parser.parse_args()
+
+    conn = migrate.connect(args.db)
+    migrate.migrate(conn)
+    if args.rebuild:
+        rebuild(conn, None if args.rebuild == 'all' else args.rebuild)
+        print(f"✓ Rollups rebuilt{'' if args.rebuild == 'all' else ' from ' + args.rebuild}")
+    else:
+        processed = refresh(conn)
+        print(f"✓ Rolled up {processed} new sentiment rows")
+    conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
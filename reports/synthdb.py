@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic sensmundi.db for benchmarks
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+Fills ``countries``, ``sentiment`` (with 90-point daily timelines, packed
+like the ingest writes them), ``analyses`` and ``articles`` at a chosen
+scale, then applies the migrations, rollups and anomaly scoring so the database
+looks like production. The same arguments always produce the same rows.
+
+Usage:
+    python reports/synthdb.py OUTPUT [--scale small|medium|large]
+                              [--countries N] [--days N] [--snapshots N] [--articles N] [--seed N]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import string
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+import anomalies
+import migrate
+import rollup
+import timeline_codec
+from fetch_gdelt import COUNTRIES
+
+# Same columns the pipeline creates; the report and server.js read these
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS countries (
+        code TEXT PRIMARY KEY, name TEXT, name_es TEXT, region TEXT, last_updated TEXT
+    );
+    CREATE TABLE IF NOT EXISTS sentiment (
+        id INTEGER PRIMARY KEY, country_code TEXT, timestamp TEXT,
+        tone_internal REAL, tone_external REAL, dissonance REAL,
+        article_count_internal INTEGER, article_count_external INTEGER,
+        timeline_internal TEXT, timeline_external TEXT
+    );
+    CREATE TABLE IF NOT EXISTS analyses (
+        id INTEGER PRIMARY KEY, country_code TEXT, timestamp TEXT,
+        summary_en TEXT, summary_es TEXT, key_topics TEXT, key_topics_es TEXT,
+        tension_level TEXT, context TEXT, context_en TEXT, context_es TEXT, model TEXT
+    );
+    CREATE TABLE IF NOT EXISTS articles (
+        id INTEGER PRIMARY KEY, country_code TEXT, url TEXT, title TEXT, title_es TEXT,
+        title_en TEXT, source TEXT, published TEXT, language TEXT, source_type TEXT,
+        tone REAL, fetched_at TEXT
+    );
+"""
+
+# name -> (countries, days of history, snapshots per day, articles per country per day)
+SCALES = {
+    'small': (50, 7, 1, 20),
+    'medium': (250, 90, 1, 20),
+    'large': (1000, 730, 1, 5),
+}
+
+REGIONS = ['Europe', 'Asia', 'Americas', 'Africa', 'Middle East', 'Oceania']
+TENSION_LEVELS = ['low', 'medium', 'high', 'critical']
+TENSION_WEIGHTS = [50, 30, 15, 5]
+WORDS = ('election protest summit trade talks ceasefire budget strike flood drought court ruling '
+         'minister resigns inflation rally reform border vaccine energy deal sanctions').split()
+SOURCES = ['reuters.com', 'apnews.com', 'bbc.co.uk', 'aljazeera.com', 'local-daily.example']
+END_DATE = date(2026, 2, 15)
+TIMELINE_DAYS = 90
+BATCH_SIZE = 5000
+
+
+def country_codes(n):
+    """The fetcher's real countries first, then unused two- and three-letter codes"""
+    real = [(code, name) for code, (name, _fips) in COUNTRIES.items()]
+    used = {code for code, _name in real}
+    extra = (''.join(p) for width in (2, 3) for p in itertools.product(string.ascii_uppercase, repeat=width))
+    synthetic = ((code, f"Synthetic {code}") for code in extra if code not in used)
+    return list(itertools.islice(itertools.chain(real, synthetic), n))
+
+
+def _epoch(day):
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def _walk(rng, length):
+    """Daily tone random walk, mean-reverting around a per-country level, two decimals"""
+    level = rng.uniform(-4, 2)
+    steps = rng.normal(0, 0.35, length)
+    tones = np.empty(length)
+    tone = level
+    for i, step in enumerate(steps):
+        tone += step + 0.1 * (level - tone)
+        tones[i] = tone
+    return np.round(np.clip(tones, -10, 10), 2)
+
+
+def _timeline(tones, end_index, end_day):
+    # Packed like timeline_codec.encode() would pack the fetcher's output
+    window = tones[end_index - TIMELINE_DAYS + 1:end_index + 1].astype('<f4')
+    base = _epoch(end_day - timedelta(days=TIMELINE_DAYS - 1))
+    return timeline_codec.HEADER.pack(timeline_codec.VERSION, base, 86400) + window.tobytes()
+
+
+def _rows(codes, days, snapshots, articles, seed):
+    """Yield (table, row) pairs in a fixed order"""
+    rng = np.random.default_rng(seed)
+    text = random.Random(seed)
+    first_day = END_DATE - timedelta(days=days - 1)
+    for i, (code, name) in enumerate(codes):
+        yield 'countries', (code, name, None, REGIONS[i % len(REGIONS)], f"{END_DATE.isoformat()}T23:00:00")
+        internal = _walk(rng, days + TIMELINE_DAYS)
+        external = _walk(rng, days + TIMELINE_DAYS)
+        for d in range(days):
+            day = first_day + timedelta(days=d)
+            index = TIMELINE_DAYS - 1 + d
+            for s in range(snapshots):
+                timestamp = f"{day.isoformat()}T{(24 * s) // snapshots:02d}:00:00"
+                ti, te = float(internal[index]), float(external[index])
+                yield 'sentiment', (
+                    code, timestamp, ti, te, round(abs(ti - te), 2),
+                    int(rng.integers(5, 250)), int(rng.integers(5, 250)),
+                    _timeline(internal, index, day), _timeline(external, index, day),
+                )
+            timestamp = f"{day.isoformat()}T00:00:00"
+            yield 'analyses', (
+                code, timestamp, f"{name}: {' '.join(text.sample(WORDS, 12))}.",
+                text.choices(TENSION_LEVELS, TENSION_WEIGHTS)[0],
+                f"{' '.join(text.sample(WORDS, 20))}.", 'synthetic',
+            )
+            for k in range(articles):
+                source_type = 'internal' if k % 2 else 'external'
+                tone = round(float(rng.normal(float(internal[index] if k % 2 else external[index]), 3)), 2)
+                title = ' '.join(text.sample(WORDS, 8)).capitalize()
+                yield 'articles', (
+                    code, f"https://{text.choice(SOURCES)}/{code.lower()}/{day.isoformat()}/{k}",
+                    title, None, title, text.choice(SOURCES), day.strftime('%Y%m%dT%H%M%SZ'),
+                    'en', source_type, tone, f"{day.isoformat()}T{k % 24:02d}:{k % 60:02d}:00",
+                )
+
+
+_INSERTS = {
+    'countries': "INSERT INTO countries (code, name, name_es, region, last_updated) VALUES (?, ?, ?, ?, ?)",
+    'sentiment': """INSERT INTO sentiment (
+        country_code, timestamp, tone_internal, tone_external, dissonance,
+        article_count_internal, article_count_external, timeline_internal, timeline_external
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    'analyses': """INSERT INTO analyses (
+        country_code, timestamp, summary_en, tension_level, context_en, model
+    ) VALUES (?, ?, ?, ?, ?, ?)""",
+    'articles': """INSERT INTO articles (
+        country_code, url, title, title_es, title_en, source, published,
+        language, source_type, tone, fetched_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+}
+
+
+def generate(path, countries, days, snapshots=1, articles=20, seed=1):
+    """Create a synthetic database at ``path`` (replacing any file there); returns row counts"""
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = migrate.connect(path)
+    conn.executescript(SCHEMA)
+
+    counts = dict.fromkeys(_INSERTS, 0)
+    pending = {table: [] for table in _INSERTS}
+    with migrate.write_transaction(conn):
+        for table, row in _rows(country_codes(countries), days, snapshots, articles, seed):
+            pending[table].append(row)
+            if len(pending[table]) >= BATCH_SIZE:
+                conn.executemany(_INSERTS[table], pending[table])
+                counts[table] += len(pending[table])
+                pending[table] = []
+        for table, rows in pending.items():
+            conn.executemany(_INSERTS[table], rows)
+            counts[table] += len(rows)
+
+    migrate.migrate(conn, analyze=True)
+    rollup.refresh(conn)
+    anomalies.refresh(conn)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic sensmundi.db")
+    parser.add_argument('output', help="database file to create (replaced if it exists)")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help="preset size")
+    parser.add_argument('--countries', type=int, help="override the preset's country count")
+    parser.add_argument('--days', type=int, help="override the preset's days of history")
+    parser.add_argument('--snapshots', type=int, help="sentiment snapshots per country per day")
+    parser.add_argument('--articles', type=int, help="articles per country per day")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    countries, days, snapshots, articles = SCALES[args.scale]
+    countries = args.countries or countries
+    days = args.days or days
+    snapshots = args.snapshots or snapshots
+    articles = args.articles if args.articles is not None else articles
+
+    started = time.perf_counter()
+    counts = generate(args.output, countries, days, snapshots, articles, args.seed)
+    print(f"✓ {args.output}: " + ", ".join(f"{n} {table}" for table, n in counts.items()) +
+          f" ({time.perf_counter() - started:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
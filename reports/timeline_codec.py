@@ -0,0 +1,130 @@
+"""
+Compact binary encoding for sentiment timelines
+Aeon Infinitive - pulse.aeoninfinitive.com
+
+``sentiment.timeline_internal`` / ``timeline_external`` used to hold JSON
+arrays of up to 90 ``{"date", "tone"}`` objects. They now hold a packed
+BLOB instead:
+
+    version u8 | base epoch seconds i64 | step seconds u32 | tones float32[]
+
+all little-endian. Point ``i`` is at ``base + i * step``; a missing point
+is stored as NaN. Tones are rounded to two decimals on the way out, so a
+round trip gives back exactly what the fetcher produced. JSON text is still
+accepted everywhere, which keeps rows that cannot be packed (irregular
+spacing) and not-yet-migrated databases readable.
+
+server.js decodes the same layout (see decodeTimeline there).
+"""
+
+import json
+import math
+import struct
+from datetime import datetime, timezone
+
+VERSION = 1
+HEADER = struct.Struct('<BqI')
+# Refuse to pad a timeline with more than this many NaN gaps per real point
+MAX_GAP_RATIO = 4
+
+
+def _parse_date(value):
+    # GDELT dates are 'YYYYMMDDTHHMMSSZ'; the fetcher keeps only the first
+    # 10 characters, which still pins down the day
+    if len(value) >= 15:
+        return int(datetime.strptime(value[:15], '%Y%m%dT%H%M%S').replace(tzinfo=timezone.utc).timestamp())
+    return int(datetime.strptime(value[:8], '%Y%m%d').replace(tzinfo=timezone.utc).timestamp())
+
+
+def _format_date(epoch, width):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y%m%dT%H%M%SZ')[:width]
+
+
+def is_packed(value):
+    return isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= HEADER.size and value[0] == VERSION
+
+
+def encode(points):
+    """Pack a ``[{'date', 'tone'}]`` timeline, or return None if it cannot be packed losslessly"""
+    if not points:
+        return HEADER.pack(VERSION, 0, 0)
+    try:
+        times = [_parse_date(p['date']) for p in points]
+    except (KeyError, TypeError, ValueError):
+        return None
+    diffs = [b - a for a, b in zip(times, times[1:])]
+    step = min(diffs) if diffs else 86400
+    if step <= 0 or any(d % step for d in diffs):
+        return None
+    count = (times[-1] - times[0]) // step + 1
+    if count > len(points) * MAX_GAP_RATIO:
+        return None
+    tones = [math.nan] * count
+    for t, p in zip(times, points):
+        tones[(t - times[0]) // step] = p['tone']
+    packed = HEADER.pack(VERSION, times[0], step) + struct.pack(f'<{count}f', *tones)
+    # Only keep the packed form if it reproduces the original exactly
+    if decode(packed, len(points[0]['date'])) != points:
+        return None
+    return packed
+
+
+def encode_db_value(points):
+    """Column value for a timeline: packed BLOB when possible, JSON text otherwise"""
+    packed = encode(points)
+    return packed if packed is not None else json.dumps(points)
+
+
+def decode(value, date_width=10):
+    """Timeline as ``[{'date', 'tone'}]`` from a packed BLOB, JSON text or None"""
+    if value is None:
+        return []
+    if not is_packed(value):
+        return json.loads(value) if value else []
+    _version, base, step = HEADER.unpack_from(value)
+    count = (len(value) - HEADER.size) // 4
+    tones = struct.unpack_from(f'<{count}f', value, HEADER.size)
+    return [{'date': _format_date(base + i * step, date_width), 'tone': round(tone, 2)}
+            for i, tone in enumerate(tones) if not math.isnan(tone)]
+
+
+def to_array(value):
+    """(float32 NumPy array with NaN gaps, base epoch, step seconds) for vectorised analytics"""
+    import numpy as np
+
+    if not is_packed(value):
+        value = encode(decode(value)) or HEADER.pack(VERSION, 0, 0)
+    _version, base, step = HEADER.unpack_from(value)
+    return np.frombuffer(value, dtype='<f4', offset=HEADER.size), base, step
+
+
+def _pack_text(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        packed = encode(json.loads(value))
+    except (ValueError, TypeError):
+        return value
+    return packed if packed is not None else value
+
+
+def migrate_rows(conn, batch_size=1000):
+    """Rewrite JSON-text timelines in ``sentiment`` as packed BLOBs (used by migration 4)
+
+    Rows that cannot be packed losslessly stay as JSON. Run VACUUM
+    afterwards to hand the freed pages back to the filesystem.
+    """
+    last = 0
+    while True:
+        rows = conn.execute("""
+            SELECT rowid, timeline_internal, timeline_external FROM sentiment
+            WHERE rowid > ? AND (typeof(timeline_internal) = 'text' OR typeof(timeline_external) = 'text')
+            ORDER BY rowid LIMIT ?
+        """, (last, batch_size)).fetchall()
+        if not rows:
+            return
+        updates = []
+        for rowid, internal, external in rows:
+            updates.append((_pack_text(internal), _pack_text(external), rowid))
+        conn.executemany("UPDATE sentiment SET timeline_internal = ?, timeline_external = ? WHERE rowid = ?", updates)
+        last = rows[-1][0]
@@ -1,6 +1,7 @@
 import express from 'express';
 import cors from 'cors';
 import path from 'path';
+import fs from 'fs';
 import Database from 'better-sqlite3';
 import { fileURLToPath } from 'url';
 
@@ -47,10 +48,109 @@ function getSubsDb() {
   return subsDb;
 }
 
+// Timelines are stored packed (see reports/timeline_codec.py):
+// version u8 | base epoch seconds i64 | step seconds u32 | float32 tones (NaN = gap),
+// all little-endian. Older rows still hold JSON text.
+function decodeTimeline(value) {
+  if (!value) return [];
+  if (typeof value === 'string') return JSON.parse(value);
+  const base = Number(value.readBigInt64LE(1));
+  const step = value.readUInt32LE(9);
+  const timeline = [];
+  for (let i = 0, offset = 13; offset + 4 <= value.length; i++, offset += 4) {
+    const tone = value.readFloatLE(offset);
+    if (Number.isNaN(tone)) continue;
+    const date = new Date((base + i * step) * 1000).toISOString().replace(/[-:]/g, '').slice(0, 10);
+    timeline.push({ date, tone: Math.round(tone * 100) / 100 });
+  }
+  return timeline;
+}
+
+// --- Published payloads ---
+// reports/publish.py writes each API response pre-serialized (plus gzip/br
+// variants) after every ingest, with a manifest mapping route -> files + ETag.
+// Routes in the manifest are served straight from those bytes; anything
+// missing falls back to the live queries below. So does everything while the
+// manifest is stale: it records the database's change counter (bumped by
+// triggers on every write to the tables the payloads come from), and whenever
+// SQLite reports a commit (PRAGMA data_version) we read that one row again.
+// Keep CHANGES_SQL identical to CHANGES in publish.py.
+const PUBLISH_DIR = path.join(__dirname, 'pipeline', 'api');
+const MANIFEST_PATH = path.join(PUBLISH_DIR, 'manifest.json');
+let manifest = null;
+let manifestMtime = 0;
+let checkedManifest = null;
+let checkedVersion = null;
+let manifestCurrent = false;
+
+const CHANGES_SQL = 'SELECT changes FROM change_counter WHERE id = 1';
+
+// Whether the database still holds what manifest m was published from
+function isCurrent(m) {
+  if (!Number.isInteger(m.changes)) return false;
+  const d = getDb();
+  const version = d.pragma('data_version', { simple: true });
+  if (m !== checkedManifest || version !== checkedVersion) {
+    manifestCurrent = d.prepare(CHANGES_SQL).pluck().get() === m.changes;
+    checkedManifest = m;
+    checkedVersion = version;
+  }
+  return manifestCurrent;
+}
+
+function getManifest() {
+  let stat;
+  try {
+    stat = fs.statSync(MANIFEST_PATH);
+  } catch {
+    return null;
+  }
+  if (stat.mtimeMs !== manifestMtime) {
+    try {
+      manifest = JSON.parse(fs.readFileSync(MANIFEST_PATH, 'utf8'));
+      manifestMtime = stat.mtimeMs;
+    } catch {
+      // Keep serving the previous manifest if the new one cannot be read
+    }
+  }
+  if (!manifest) return null;
+  try {
+    return isCurrent(manifest) ? manifest : null;
+  } catch {
+    return null;
+  }
+}
+
+function sendPublished(req, res, route) {
+  const m = getManifest();
+  const entry = m && m.routes[route];
+  if (!entry) return false;
+
+  res.set({
+    'Content-Type': 'application/json; charset=utf-8',
+    'ETag': entry.etag,
+    'Vary': 'Accept-Encoding',
+    'Cache-Control': 'no-cache'
+  });
+  if (req.fresh) {
+    res.status(304).end();
+    return true;
+  }
+  const encoding = req.acceptsEncodings(['br', 'gzip'].filter(e => entry.encodings[e]).concat('identity')) || 'identity';
+  const variant = entry.encodings[encoding];
+  if (encoding !== 'identity') res.set('Content-Encoding', encoding);
+  res.set('Content-Length', String(variant.bytes));
+  fs.createReadStream(path.join(PUBLISH_DIR, variant.file))
+    .on('error', () => res.destroy())
+    .pipe(res);
+  return true;
+}
+
 // --- API ---
 
 // All countries sentiment (for map)
 app.get('/api/sentiment', (req, res) => {
+  if (sendPublished(req, res, '/api/sentiment')) return;
   const d = getDb();
   const rows = d.prepare(`
     SELECT c.code, c.name, c.name_es, c.region,
@@ -71,12 +171,12 @@ app.get('/api/sentiment', (req, res) => {
       internal: {
         tone: r.tone_internal || 0,
         articleCount: r.article_count_internal || 0,
-        timeline: r.timeline_internal ? JSON.parse(r.timeline_internal) : []
+        timeline: decodeTimeline(r.timeline_internal)
       },
       external: {
         tone: r.tone_external || 0,
         articleCount: r.article_count_external || 0,
-        timeline: r.timeline_external ? JSON.parse(r.timeline_external) : []
+        timeline: decodeTimeline(r.timeline_external)
       },
       dissonance: r.dissonance || 0,
       tone: r.tone_external || 0,
@@ -88,9 +188,32 @@ app.get('/api/sentiment', (req, res) => {
   res.json({ countries, count: rows.length });
 });
 
+// Latest tone/dissonance anomaly events (see reports/anomalies.py)
+app.get('/api/anomalies', (req, res) => {
+  if (sendPublished(req, res, '/api/anomalies')) return;
+  let rows = [];
+  try {
+    rows = getDb().prepare(`
+      SELECT a.country_code, c.name, a.timestamp, a.metric, a.kind, a.value, a.expected, a.score
+      FROM anomalies a
+      LEFT JOIN countries c ON a.country_code = c.code
+      ORDER BY a.timestamp DESC, a.id DESC
+      LIMIT 200
+    `).all();
+  } catch {
+    // Database not migrated yet: no detector output
+  }
+  const anomalies = rows.map(r => ({
+    code: r.country_code, name: r.name, date: r.timestamp, metric: r.metric,
+    kind: r.kind, value: r.value, expected: r.expected, score: r.score
+  }));
+  res.json({ anomalies, count: anomalies.length });
+});
+
 // Country detail with articles
 app.get('/api/country/:code', (req, res) => {
   const code = req.params.code.toUpperCase();
+  if (sendPublished(req, res, `/api/country/${code}`)) return;
   const d = getDb();
 
   const country = d.prepare(`
@@ -138,13 +261,13 @@ app.get('/api/country/:code', (req, res) => {
     internal: {
       tone: country.tone_internal || 0,
       articleCount: country.article_count_internal || 0,
-      timeline: country.timeline_internal ? JSON.parse(country.timeline_internal) : [],
+      timeline: decodeTimeline(country.timeline_internal),
       articles: intArticles.map(a => ({ title: a.title, title_es: a.title_es, title_en: a.title_en, url: a.url, source: a.source, date: a.published, language: a.language }))
     },
     external: {
       tone: country.tone_external || 0,
       articleCount: country.article_count_external || 0,
-      timeline: country.timeline_external ? JSON.parse(country.timeline_external) : [],
+      timeline: decodeTimeline(country.timeline_external),
       articles: extArticles.map(a => ({ title: a.title, title_es: a.title_es, title_en: a.title_en, url: a.url, source: a.source, date: a.published, language: a.language }))
     },
     dissonance: country.dissonance || 0,
@@ -0,0 +1,38 @@
+"""
+Shared fixtures: small deterministic databases from reports/synthdb.py
+Aeon Infinitive - pulse.aeoninfinitive.com
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# The report tools import each other as siblings, as when run from reports/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'reports'))
+
+import pulse_db
+import synthdb
+
+# 20 countries x 28 days (2026-01-19 .. 2026-02-15, four whole weeks), 6 articles a day
+COUNTRIES, DAYS, ARTICLES = 20, 28, 6
+
+
+@pytest.fixture(scope='session')
+def template_db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('synth') / 'template.db')
+    synthdb.generate(path, COUNTRIES, DAYS, articles=ARTICLES)
+    return path
+
+
+@pytest.fixture
+def db_path(template_db, tmp_path):
+    """A private copy of the synthetic database (sqlite backup, so WAL contents come along)"""
+    path = str(tmp_path / 'sensmundi.db')
+    source, target = sqlite3.connect(template_db), sqlite3.connect(path)
+    source.backup(target)
+    source.close()
+    target.close()
+    yield path
+    pulse_db.close_all()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import analytics
+from pulse_db import PulseDB
+
+DAY = analytics.DAY_SECONDS
+START, END = '2026-02-09', '2026-02-15'
+
+
+def _side(tones, first_day, step=DAY):
+    return np.array(tones, dtype=np.float32), analytics._epoch(first_day), step
+
+
+def _known():
+    # AA: ten baseline days alternating 0/2 (mean 1, spread 1), then 1..7 across
+    # the period and an outlier the day after it. Constant external tone.
+    internal = [0.0, 2.0] * 5 + [1, 2, 3, 4, 5, 6, 7] + [100]
+    # BB: only the period's last three days, no external timeline at all
+    return analytics.align([
+        ('AA', 'Alpha', _side(internal, '2026-01-30'), _side([0.0] * 18, '2026-01-30')),
+        ('BB', 'Beta', _side([3, 3, 3], '2026-02-13'), _side([], '2026-02-13')),
+    ])
+
+
+def test_ragged_timelines_share_one_axis():
+    timelines = _known()
+    assert timelines['codes'] == ['AA', 'BB']
+    assert timelines['times'][0] == analytics._epoch('2026-01-30')
+    assert list(np.diff(timelines['times'])) == [DAY] * 17
+    internal = timelines['internal']
+    assert internal.shape == (2, 18)
+    assert np.isnan(internal[1, :14]).all() and list(internal[1, 14:17]) == [3, 3, 3]
+    assert np.isnan(internal[1, 17]) and np.isnan(timelines['external'][1]).all()
+
+
+def test_step_that_does_not_fit_the_axis_is_left_out():
+    timelines = analytics.align([
+        ('AA', 'Alpha', _side([1, 2], '2026-02-09'), _side([1, 2], '2026-02-09')),
+        ('BB', 'Beta', _side([5, 6], '2026-02-09', step=DAY + 1), _side([], '2026-02-09')),
+    ])
+    assert np.isnan(timelines['internal'][1]).all()
+
+
+def test_measures_on_a_known_matrix():
+    aa, bb = analytics.analyze(_known(), START, END)
+    # Shift, slope and volatility only see the period (not the baseline or the day after)
+    assert (aa['shift'], aa['from'], aa['to']) == (6.0, 1.0, 7.0)
+    assert aa['slope'] == pytest.approx(1.0)
+    assert aa['volatility'] == pytest.approx(2.0)
+    # Latest tone 7 against a baseline of mean 1, spread 1
+    assert aa['zscore'] == pytest.approx(6.0)
+    # A flat baseline has no spread to measure against
+    assert aa['external_zscore'] is None
+    assert aa['divergence'] == pytest.approx(1.0)
+
+    assert (bb['shift'], bb['slope'], bb['volatility']) == (0.0, 0.0, 0.0)
+    assert bb['zscore'] is None and bb['external_zscore'] is None and bb['divergence'] is None
+
+
+def test_single_point_has_no_trend():
+    timelines = analytics.align([('AA', 'Alpha', _side([4], '2026-02-12'), _side([2], '2026-02-12'))])
+    [aa] = analytics.analyze(timelines, START, END)
+    assert (aa['from'], aa['to']) == (4.0, 4.0)
+    assert aa['shift'] is None and aa['slope'] is None and aa['volatility'] is None
+
+
+def test_load_timelines_takes_the_latest_snapshot_per_country(db_path):
+    db = PulseDB(db_path)
+    try:
+        timelines = analytics.load_timelines(db, START, '2026-02-11')
+        latest = dict(db.query("""
+            SELECT country_code, tone_internal FROM sentiment
+            WHERE timestamp = (SELECT MAX(timestamp) FROM sentiment WHERE timestamp <= '2026-02-11T23:59:59')
+        """, rows='tuple'))
+    finally:
+        db.close()
+    assert timelines['codes'] == sorted(latest)
+    # The synthetic timelines end on their snapshot's day
+    assert timelines['times'][-1] == analytics._epoch('2026-02-11')
+    assert list(timelines['internal'][:, -1]) == pytest.approx([latest[code] for code in timelines['codes']])
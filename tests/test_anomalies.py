@@ -0,0 +1,59 @@
+import anomalies
+import migrate
+import rollup
+
+
+def _feed(values, records=False):
+    state = anomalies.new_state()
+    return [anomalies.observe(state, value, records) for value in values], state
+
+
+def test_nothing_is_scored_during_warmup():
+    events, state = _feed([0.0] * (anomalies.WARMUP - 1) + [100.0], records=True)
+    assert not any(events)
+    assert state['n'] == anomalies.WARMUP and state['max'] == 100.0
+
+
+def test_spike_and_record():
+    baseline = [0.0, 0.5] * anomalies.WARMUP
+    events, _state = _feed(baseline + [10.0], records=True)
+    assert {kind for kind, _expected, _score in events[-1]} == {'spike', 'record'}
+    assert not any(events[:-1])
+
+
+def test_sustained_shift_trips_cusum_but_one_spike_does_not():
+    baseline = [0.0, 0.5] * anomalies.WARMUP
+    events, _state = _feed(baseline + [10.0] + baseline)
+    assert not any(kind == 'shift' for step in events for kind, *_ in step)
+    events, _state = _feed(baseline + [2.0] * 10)
+    shifts = [score for step in events for kind, _expected, score in step if kind == 'shift']
+    assert shifts and shifts[0] > 0
+
+
+def test_refresh_scores_only_new_rows(db_path):
+    conn = migrate.connect(db_path)
+    assert anomalies.refresh(conn) == 0
+    events = conn.execute("SELECT COUNT(*) FROM anomalies").fetchone()[0]
+    conn.execute("""
+        INSERT INTO sentiment (country_code, timestamp, tone_internal, tone_external, dissonance)
+        SELECT country_code, '2026-02-16T06:00:00', tone_internal - 30, tone_external, dissonance + 30
+        FROM sentiment WHERE timestamp = (SELECT MAX(timestamp) FROM sentiment)
+    """)
+    raised = anomalies.refresh(conn)
+    assert raised > 0
+    assert conn.execute("SELECT COUNT(*) FROM anomalies").fetchone()[0] == events + raised
+    assert rollup.get_watermark(conn, anomalies.WATERMARK) == conn.execute(
+        "SELECT MAX(rowid) FROM sentiment").fetchone()[0]
+    new = conn.execute("SELECT DISTINCT kind FROM anomalies WHERE timestamp = '2026-02-16T06:00:00'").fetchall()
+    assert {'spike', 'record'} <= {kind for kind, in new}
+
+
+def test_rebuild_replays_to_the_same_state(db_path):
+    conn = migrate.connect(db_path)
+    columns = 'country_code, timestamp, metric, kind, value, expected, score, sentiment_id'
+    before = conn.execute(f"SELECT {columns} FROM anomalies ORDER BY id").fetchall()
+    states = conn.execute("SELECT * FROM anomaly_state ORDER BY country_code, metric").fetchall()
+    assert before and states
+    assert anomalies.rebuild(conn) == len(before)
+    assert conn.execute(f"SELECT {columns} FROM anomalies ORDER BY id").fetchall() == before
+    assert conn.execute("SELECT * FROM anomaly_state ORDER BY country_code, metric").fetchall() == states
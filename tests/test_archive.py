@@ -0,0 +1,114 @@
+from datetime import date
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet  # noqa: E402
+
+import archive  # noqa: E402
+import generate_pulse_report as report  # noqa: E402
+import migrate  # noqa: E402
+import rollup  # noqa: E402
+from pulse_db import PulseDB  # noqa: E402
+
+# Monday after the synthetic data; keeping 2 weeks archives 2026-01-19 and 2026-01-26
+TODAY = date(2026, 2, 16)
+KEEP = 2
+WEEKS = ['2026-01-19', '2026-01-26']
+SECTIONS = ('overview', 'tense', 'dissonance', 'regions', 'trends', 'stories')
+
+
+def _report(db_path, start, end):
+    snapshot = report.ReportSnapshot(db_path, start, end).load()
+    return {name: getattr(snapshot, name) for name in SECTIONS}
+
+
+def _partition(db_path, table, week):
+    return pa.parquet.read_table(archive.week_path(archive.archive_dir(db_path), table, week))
+
+
+def _assert_one_copy(conn, db_path):
+    for week in WEEKS:
+        recorded = dict(zip(('sentiment', 'analyses', 'articles'), conn.execute(
+            "SELECT sentiment_rows, analyses_rows, articles_rows FROM archive_weeks WHERE week = ?",
+            (week,)).fetchone()))
+        for table in archive.TIME_COLUMNS:
+            data = _partition(db_path, table, week)
+            ids = data.column('id').to_pylist()
+            assert len(ids) == len(set(ids)) == recorded[table], (table, week)
+
+
+def test_round_trip_reports_are_unchanged(db_path):
+    before = {period: _report(db_path, *period) for period in
+              [('2026-01-19', '2026-01-25'), ('2026-01-26', '2026-02-08')]}
+    conn = migrate.connect(db_path)
+    moved = archive.archive(conn, db_path, KEEP, today=TODAY)
+    assert sorted(moved) == WEEKS
+    assert conn.execute("SELECT COUNT(*) FROM sentiment WHERE timestamp < '2026-02-02'").fetchone()[0] == 0
+    for period, sections in before.items():
+        assert _report(db_path, *period) == sections, period
+
+
+def test_rerun_after_an_interrupted_run_keeps_one_copy(db_path, monkeypatch):
+    conn = migrate.connect(db_path)
+    source = {table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {column} < '2026-02-02'").fetchone()[0]
+              for table, column in archive.TIME_COLUMNS.items()}
+    write_week = archive._write_week
+
+    def killed(pa, root, table, week, data):
+        # Every table of the first week is on disk, nothing is committed yet
+        rows = write_week(pa, root, table, week, data)
+        if table == 'articles':
+            raise KeyboardInterrupt
+        return rows
+
+    monkeypatch.setattr(archive, '_write_week', killed)
+    with pytest.raises(KeyboardInterrupt):
+        archive.archive(conn, db_path, KEEP, today=TODAY)
+    assert conn.execute("SELECT COUNT(*) FROM archive_weeks").fetchone()[0] == 0
+    monkeypatch.setattr(archive, '_write_week', write_week)
+
+    archive.archive(conn, db_path, KEEP, today=TODAY)
+    _assert_one_copy(conn, db_path)
+    for table, rows in source.items():
+        assert sum(_partition(db_path, table, week).num_rows for week in WEEKS) == rows, table
+
+
+def test_late_article_replaces_its_archived_copy(db_path):
+    conn = migrate.connect(db_path)
+    archive.archive(conn, db_path, KEEP, today=TODAY)
+    archived = _partition(db_path, 'articles', WEEKS[0]).slice(0, 1).to_pylist()[0]
+    code, url = archived['country_code'], archived['url']
+    conn.execute("INSERT INTO articles (country_code, url, title, fetched_at) VALUES (?, ?, 'corrected', ?)",
+                 (code, url, archived['fetched_at']))
+    archive.archive(conn, db_path, KEEP, today=TODAY)
+    rows = [row for row in _partition(db_path, 'articles', WEEKS[0]).to_pylist()
+            if (row['country_code'], row['url']) == (code, url)]
+    assert [row['title'] for row in rows] == ['corrected']
+    _assert_one_copy(conn, db_path)
+
+
+def test_rows_not_yet_rolled_up_are_counted_before_archiving(db_path):
+    conn = migrate.connect(db_path)
+    # A late snapshot for the first week that no rollup or anomaly refresh has seen
+    conn.execute("""
+        INSERT INTO sentiment (country_code, timestamp, tone_internal, tone_external, dissonance,
+                               article_count_internal, article_count_external)
+        SELECT country_code, '2026-01-20T12:30:00', tone_internal - 4, tone_external + 4, dissonance + 8, 5, 5
+        FROM sentiment WHERE timestamp LIKE '2026-01-20T00%'
+    """)
+    raw = conn.execute("""
+        SELECT AVG(tone_internal), AVG(tone_external), AVG(dissonance),
+               SUM(article_count_internal), SUM(article_count_external)
+        FROM sentiment WHERE timestamp >= '2026-01-19' AND timestamp < '2026-01-26'
+    """).fetchone()
+    newest = conn.execute("SELECT MAX(rowid) FROM sentiment").fetchone()[0]
+
+    archive.archive(conn, db_path, KEEP, today=TODAY)
+    db = PulseDB(db_path)
+    overview = report.get_global_overview(db, '2026-01-19', '2026-01-25')
+    db.close()
+    assert (overview['avg_internal'], overview['avg_external'], overview['avg_dissonance'],
+            overview['total_internal'], overview['total_external']) == pytest.approx(raw)
+    assert rollup.get_watermark(conn) == newest
+    assert rollup.get_watermark(conn, 'anomalies') == newest
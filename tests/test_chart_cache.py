@@ -0,0 +1,44 @@
+import io
+
+import chart_cache
+from chart_cache import ChartCache, cached_chart
+
+
+@cached_chart
+def _chart(values):
+    _chart.calls += 1
+    return io.BytesIO(repr(values).encode() * 100)
+
+
+_chart.calls = 0
+
+
+def test_unusable_directory_renders_instead_of_failing(tmp_path, monkeypatch):
+    blocker = tmp_path / 'not-a-dir'
+    blocker.write_bytes(b'')
+    cache = ChartCache(cache_dir=str(blocker / 'charts'))
+    monkeypatch.setattr(chart_cache, 'CHART_CACHE', cache)
+    assert cache.put('k', b'data') is False
+    assert _chart([1, 2]).getvalue() == _chart([1, 2]).getvalue()
+    assert cache.hits == 0 and cache.misses == 2
+
+
+def test_hits_and_eviction_past_the_limit(tmp_path, monkeypatch):
+    cache = ChartCache(cache_dir=str(tmp_path), max_bytes=2500)
+    monkeypatch.setattr(chart_cache, 'CHART_CACHE', cache)
+    calls = _chart.calls
+    first = _chart([1]).getvalue()
+    assert _chart([1]).getvalue() == first
+    assert _chart.calls == calls + 1 and cache.hits == 1
+    assert cache.evictions == 0
+    for n in range(5):
+        _chart([n, n])
+    assert cache.evictions > 0
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= 2500
+
+
+def test_key_depends_on_renderer_version(monkeypatch):
+    cache = ChartCache()
+    before = cache.key('f', 'src', [1], {})
+    monkeypatch.setattr(chart_cache, '_renderer_version', 'other')
+    assert cache.key('f', 'src', [1], {}) != before
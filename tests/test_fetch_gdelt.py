@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch_gdelt
+
+RATE_LIMITED = b"Please limit requests to one every 5 seconds or contact us for larger queries."
+SERIES = [{'date': f'202602{day:02d}T000000Z', 'value': -1.0 - day / 10} for day in range(1, 15)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)['query'][0]
+        self.server.requests.append(query)
+        script = self.server.replies.get(query)
+        status, body = script.pop(0) if script else (200, json.dumps({'timeline': [{'data': SERIES}]}).encode())
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gdelt():
+    """A local DOC API stub: ``replies`` scripts (status, body) per query, the rest get SERIES"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    server.requests, server.replies = [], {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/api/v2/doc/doc"
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(gdelt, retries=3):
+    return fetch_gdelt.GdeltClient(gdelt.url, fetch_gdelt.TokenBucket(1000, 10), max_retries=retries,
+                                   backoff_base=0.001)
+
+
+def _main(gdelt, tmp_path, *extra):
+    return fetch_gdelt.main(['--base-url', gdelt.url, '--codes', 'US,CN', '--rate', '1000', '--burst', '10',
+                             '--retries', '0', '--checkpoint-dir', str(tmp_path / 'checkpoints'),
+                             '--state', str(tmp_path / 'state.json'), '--output', str(tmp_path / 'out.json'),
+                             *extra])
+
+
+def test_plain_text_rate_limit_reply_is_retried(gdelt):
+    gdelt.replies['China'] = [(200, RATE_LIMITED), (200, RATE_LIMITED)]
+    series = asyncio.run(_client(gdelt).series('China'))
+    assert series == SERIES
+    assert gdelt.requests == ['China'] * 3
+
+
+def test_failing_country_is_left_out_not_written_as_zero(gdelt, tmp_path):
+    gdelt.replies['sourcecountry:CH'] = [(503, b'busy')] * 4
+    client = _client(gdelt)
+    countries, failures = asyncio.run(fetch_gdelt.fetch_all(['US', 'CN'], client, str(tmp_path)))
+    assert set(countries) == {'US'} and set(failures) == {'CN'}
+    assert gdelt.requests.count('sourcecountry:CH') == 4
+    assert sorted(os.listdir(tmp_path)) == ['US.json']
+
+
+def test_fetch_error_after_the_last_retry(gdelt):
+    gdelt.replies['China'] = [(200, RATE_LIMITED)] * 3
+    with pytest.raises(fetch_gdelt.FetchError, match='China'):
+        asyncio.run(_client(gdelt, retries=2).series('China'))
+    assert gdelt.requests == ['China'] * 3
+
+
+def test_token_bucket_paces_requests():
+    async def run(n):
+        bucket = fetch_gdelt.TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Two tokens up front, then one every 50 ms
+    elapsed = asyncio.run(run(6))
+    assert 0.18 <= elapsed < 1.0
+
+
+def test_resume_keeps_checkpointed_countries(gdelt, tmp_path):
+    gdelt.replies['sourcecountry:CH'] = [(500, b'down')]
+    assert _main(gdelt, tmp_path) == 1
+    with open(tmp_path / 'out.json') as f:
+        assert set(json.load(f)['countries']) == {'US'}
+
+    gdelt.requests.clear()
+    # --full ignores the fetch state, so only the checkpoint keeps US from being asked again
+    assert _main(gdelt, tmp_path, '--resume', '--full') == 0
+    assert sorted(gdelt.requests) == ['China', 'sourcecountry:CH']
+    with open(tmp_path / 'out.json') as f:
+        countries = json.load(f)['countries']
+    assert set(countries) == {'US', 'CN'}
+    assert countries['CN']['internal']['tone'] == round(sum(x['value'] for x in SERIES[-7:]) / 7, 2)
+
+
+def _days(first, last, value):
+    return [{'date': f'202602{day:02d}T000000Z', 'value': value} for day in range(first, last + 1)]
+
+
+def test_incremental_timespan_overlaps_the_smoothed_tail():
+    def at(day, hour=0):
+        return datetime(2026, 2, day, hour, tzinfo=timezone.utc)
+
+    series = _days(1, 14, 0.0)
+    # 2.5 days since the last point, rounded up, plus SMOOTH + 1 points of overlap
+    assert fetch_gdelt.incremental_timespan(series, at(16, 12)) == f'{3 + fetch_gdelt.SMOOTH + 1}d'
+    # Never shorter than the span GDELT still answers at daily resolution
+    assert fetch_gdelt.incremental_timespan(series, at(14, 6)) == f'{fetch_gdelt.MIN_TIMESPAN_DAYS}d'
+    # Nothing stored, or too old to be worth patching: a full fetch
+    assert fetch_gdelt.incremental_timespan([], at(16)) is None
+    assert fetch_gdelt.incremental_timespan(series, datetime(2026, 6, 1, tzinfo=timezone.utc)) is None
+
+
+def test_merge_series_keeps_one_point_per_day():
+    old, new = _days(1, 10, 0.0), _days(6, 12, 1.0)
+    merged = fetch_gdelt.merge_series(old, new)
+    assert [x['date'][:8] for x in merged] == [f'202602{day:02d}' for day in range(1, 13)]
+    # The window's first SMOOTH - 1 points are under-smoothed; the stored ones stay
+    assert [x['value'] for x in merged] == [0.0] * 9 + [1.0] * 3
+
+
+def test_merge_series_without_prior_state_keeps_the_last_90_days():
+    first = datetime(2025, 10, 1, tzinfo=timezone.utc)
+    fresh = [{'date': (first + timedelta(days=day)).strftime('%Y%m%dT%H%M%SZ'), 'value': float(day)}
+             for day in range(120)]
+    assert fetch_gdelt.merge_series([], fresh) == fresh[-fetch_gdelt.TIMELINE_DAYS:]
+    assert len(fetch_gdelt.merge_series(fresh[:60], fresh[60:])) == fetch_gdelt.TIMELINE_DAYS
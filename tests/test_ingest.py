@@ -0,0 +1,28 @@
+import ingest
+import migrate
+
+
+def _fetched(code, name, internal, external):
+    return {
+        'code': code, 'name': name, 'dissonance': abs(internal - external),
+        'internal': {'tone': internal, 'articleCount': 3, 'timeline': []},
+        'external': {'tone': external, 'articleCount': 4, 'timeline': []},
+        'articles': [{'url': f"https://example.org/{code}", 'title': 'Headline', 'source_type': 'internal',
+                      'tone': internal}],
+    }
+
+
+def test_ingest_writes_one_snapshot_and_restores_autocheckpoint(db_path):
+    conn = migrate.connect(db_path)
+    conn.execute("PRAGMA wal_autocheckpoint = 250")
+    counts = ingest.ingest(conn, [_fetched('US', 'United States', -1.0, -3.0)], '2026-02-16T06:00:00')
+    assert counts['countries'] == 1 and counts['articles'] == 1 and counts['rollup_rows'] == 1
+    assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 250
+    # Same snapshot again: replaced in place, rollups still match the raw row
+    counts = ingest.ingest(conn, [_fetched('US', 'United States', 2.0, -3.0)], '2026-02-16T06:00:00')
+    assert counts['replaced'] == 1
+    assert conn.execute("SELECT COUNT(*) FROM sentiment WHERE timestamp = '2026-02-16T06:00:00'").fetchone()[0] == 1
+    assert conn.execute("""
+        SELECT sum_tone_internal / n_tone_internal FROM sentiment_daily
+        WHERE scope = 'country' AND key = 'US' AND period = '2026-02-16'
+    """).fetchone()[0] == 2.0
@@ -0,0 +1,22 @@
+import generate_pulse_report as report
+from instrument import TRACER
+
+
+def test_render_job_traces_only_its_own_run(db_path, tmp_path):
+    result = report.render_job(db_path, '2026-02-09', '2026-02-15', str(tmp_path / 'r.json'), trace=True, fmt='json')
+    assert result['error'] is None
+    assert not TRACER.enabled
+    kinds = {event['kind'] for event in result['trace']['events']}
+    assert {'getter', 'sql'} <= kinds
+
+
+def test_tracing_stops_when_the_run_is_interrupted(db_path, monkeypatch):
+    def interrupted(*args, **kwargs):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(report, 'export_data', interrupted)
+    try:
+        report.render_job(db_path, '2026-02-09', '2026-02-15', '-', trace=True, fmt='json')
+    except KeyboardInterrupt:
+        pass
+    assert not TRACER.enabled
@@ -0,0 +1,92 @@
+import pytest
+
+import generate_pulse_report as report
+from pulse_db import open_db
+
+# Every column top_stories() reads, in index order (no ORDER BY, so nothing is sorted up front)
+ARTICLES = """
+    SELECT a.title_en, a.title, a.source, a.country_code, c.name as country_name,
+           a.tone, a.source_type, a.fetched_at
+    FROM articles a
+    JOIN countries c ON a.country_code = c.code
+    WHERE a.fetched_at >= ? AND a.fetched_at <= ?
+        AND (a.title_en IS NOT NULL OR a.title IS NOT NULL)
+"""
+
+
+class _Row(dict):
+    """An article row that counts how many of its kind are alive"""
+    alive = 0
+
+    def __init__(self, **columns):
+        super().__init__(**columns)
+        _Row.alive += 1
+
+    def __del__(self):
+        _Row.alive -= 1
+
+
+def _article(country, tone, fetched_at='2026-02-10T00:00:00', title=None):
+    return _Row(title_en=title or f"{country} {tone} {fetched_at}", title=None, source='wire',
+                country_code=country, country_name=country, tone=tone, source_type='external',
+                fetched_at=fetched_at)
+
+
+@pytest.mark.parametrize('start, end, limit', [
+    ('2026-02-09', '2026-02-15', 10),
+    ('2026-02-15', '2026-02-15', 3),
+    ('2026-01-19', '2026-02-15', 25),
+])
+def test_sql_selection_matches_top_stories(db_path, start, end, limit):
+    db = open_db(db_path)
+    in_sql = report.get_key_stories(db, start, end, limit)
+    streamed = report.top_stories(db.stream(ARTICLES, (start + 'T00:00:00', end + 'T23:59:59')), limit)
+    assert len(in_sql) == limit
+    assert in_sql == streamed
+
+
+def test_stories_alternate_polarity_and_spread_over_countries(db_path):
+    db = open_db(db_path)
+    stories = report.get_key_stories(db, '2026-02-09', '2026-02-15', 10)
+    positive = [s['country'] for s in stories if s['tone'] > 0]
+    negative = [s['country'] for s in stories if s['tone'] <= 0]
+    assert len(positive) == len(negative) == 5
+    # Every (country, polarity) group's strongest story comes before any group's second one
+    assert len(set(positive)) == len(positive) and len(set(negative)) == len(negative)
+
+
+def test_every_group_gets_a_turn_before_a_second_story():
+    # AA has the four strongest negative stories, BB and CC one weaker each
+    rows = [_article('AA', -9), _article('AA', -8), _article('AA', -7), _article('AA', -6),
+            _article('BB', -2), _article('CC', -1), _article('CC', 3)]
+    stories = report.top_stories(rows, 5)
+    assert [(s['country'], s['tone']) for s in stories] == [
+        ('AA', -9), ('CC', 3), ('BB', -2), ('CC', -1), ('AA', -8)]
+
+
+def test_ties_go_to_the_newest_then_to_positive():
+    rows = [_article('AA', -4, '2026-02-10T00:00:00'), _article('AA', -4, '2026-02-12T00:00:00'),
+            _article('BB', 4, '2026-02-12T00:00:00'), _article('CC', None, '2026-02-14T00:00:00')]
+    stories = report.top_stories(rows, 4)
+    assert [s['title'] for s in stories] == [
+        'BB 4 2026-02-12T00:00:00', 'AA -4 2026-02-12T00:00:00',
+        # A missing tone ranks below any scored story and counts as negative
+        'CC None 2026-02-14T00:00:00', 'AA -4 2026-02-10T00:00:00']
+    assert stories[2]['tone'] == 0
+
+
+def test_only_the_strongest_rows_of_each_group_are_held():
+    before, peak = _Row.alive, 0
+
+    def rows():
+        nonlocal peak
+        for i in range(5000):
+            row = _article(f"C{i % 4}", (i % 97) - 48.5, f"2026-02-10T{i % 24:02d}:00:00")
+            peak = max(peak, _Row.alive - before)
+            yield row
+            del row
+
+    stories = report.top_stories(rows(), 3)
+    assert len(stories) == 3
+    # 4 countries x 2 polarities x 3 rows, plus the new row and the last one turned away
+    assert peak <= 4 * 2 * 3 + 2
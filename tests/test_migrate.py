@@ -0,0 +1,32 @@
+import migrate
+import synthdb
+
+
+def test_upsert_key_migration_keeps_null_url_articles(tmp_path):
+    conn = migrate.connect(str(tmp_path / 'old.db'))
+    conn.executescript(synthdb.SCHEMA)
+    conn.executemany("INSERT INTO articles (country_code, url, title) VALUES (?, ?, ?)", [
+        ('US', None, 'first'), ('US', None, 'second'), ('US', 'a', 'old'), ('US', 'a', 'new'), ('FR', 'a', 'fr'),
+    ])
+    migrate.migrate(conn)
+    rows = conn.execute("SELECT country_code, url, title FROM articles ORDER BY rowid").fetchall()
+    assert rows == [('US', None, 'first'), ('US', None, 'second'), ('US', 'a', 'new'), ('FR', 'a', 'fr')]
+
+
+def test_fresh_database_has_every_index(db_path):
+    conn = migrate.connect(db_path)
+    assert migrate.verify_indexes(conn) == []
+    assert {v for v, *_ in migrate.MIGRATIONS} == migrate.applied_versions(conn)
+
+
+def test_migrations_do_not_follow_the_indexes_dict(tmp_path, monkeypatch):
+    def schema(path):
+        conn = migrate.connect(str(path))
+        conn.executescript(synthdb.SCHEMA)
+        migrate.migrate(conn)
+        return sorted(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index'").fetchall())
+
+    expected = schema(tmp_path / 'a.db')
+    monkeypatch.setattr(migrate, 'INDEXES', {'idx_unused': ('articles', 'title')})
+    monkeypatch.setattr(migrate, 'UNIQUE_INDEXES', {})
+    assert schema(tmp_path / 'b.db') == expected
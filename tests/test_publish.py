@@ -0,0 +1,60 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import publish
+from pulse_db import PulseDB
+
+
+def _changes(db_path):
+    db = PulseDB(db_path)
+    try:
+        return publish.changes(db)
+    finally:
+        db.close()
+
+
+def test_manifest_records_the_change_counter(db_path, tmp_path):
+    publish.publish(db_path, str(tmp_path))
+    assert publish.load_manifest(str(tmp_path))['changes'] == _changes(db_path)
+
+
+@pytest.mark.parametrize('statement', [
+    "UPDATE sentiment SET timeline_internal = timeline_internal || x'00000000' WHERE rowid = 1",
+    # Same length, so no length or count based signature would notice
+    "UPDATE analyses SET summary_en = upper(summary_en) WHERE rowid = 1",
+    "UPDATE countries SET region = region WHERE code = (SELECT MIN(code) FROM countries)",
+    "DELETE FROM articles WHERE rowid = 1",
+    "INSERT INTO anomalies (country_code, timestamp, metric, kind) VALUES ('US', '2026-02-16', 'dissonance', 'spike')",
+])
+def test_any_write_moves_the_change_counter(db_path, statement):
+    before = _changes(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(statement)
+    conn.close()
+    assert _changes(db_path) == before + 1
+
+
+def test_writes_outside_the_api_tables_do_not(db_path):
+    before = _changes(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE rollup_state SET updated_at = updated_at")
+        conn.execute("DELETE FROM sentiment_daily WHERE period = '2026-01-19'")
+    conn.close()
+    assert _changes(db_path) == before
+
+
+def test_sentiment_timestamp_is_utc(db_path, tmp_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE countries SET last_updated = '2026-02-16T08:30:00+02:00'")
+    conn.close()
+    publish.publish(db_path, str(tmp_path))
+    manifest = publish.load_manifest(str(tmp_path))
+    entry = manifest['routes']['/api/sentiment']['encodings']['identity']
+    with open(os.path.join(str(tmp_path), entry['file'])) as f:
+        assert json.load(f)['timestamp'] == '2026-02-16T06:30:00Z'
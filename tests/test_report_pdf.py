@@ -0,0 +1,20 @@
+import pytest
+
+pytest.importorskip('reportlab')
+
+import report_pdf
+from reportlab.graphics.shapes import Group, String
+
+
+def _strings(node):
+    for child in getattr(node, 'contents', ()):
+        if isinstance(child, String):
+            yield child.text
+        elif isinstance(child, Group):
+            yield from _strings(child)
+
+
+def test_vector_regional_chart_keeps_axis_titles():
+    drawing = report_pdf._vector_regional_chart(['Europe', 'Asia'], [-1.5, 0.4], [-1.0, 1.0])
+    texts = set(_strings(drawing))
+    assert {'Regional Sentiment Breakdown', 'Region', 'Average Sentiment Tone'} <= texts
@@ -0,0 +1,16 @@
+import json
+
+import generate_pulse_report as report
+
+
+def test_single_day_period_fills_every_section(db_path, tmp_path):
+    output = str(tmp_path / 'day.json')
+    assert report.main(['--db', db_path, '--start', '2026-02-15', '--end', '2026-02-15',
+                        '--format', 'json', '--output', output]) == 0
+    with open(output) as f:
+        data = json.load(f)
+    for section in ('overview', 'tense', 'dissonance', 'regions', 'trends', 'stories'):
+        assert data[section], section
+    assert data['overview']['countries_tracked'] > 0
+    # The synthetic timelines are daily: one point inside the day, so a tone but no shift yet
+    assert all(trend['to'] is not None for trend in data['trends'])
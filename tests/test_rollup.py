@@ -0,0 +1,69 @@
+import pytest
+
+import migrate
+import rollup
+
+
+def _raw(conn, grain):
+    period = rollup.GRAINS[grain]
+    return {(row[0], row[1]): row[2:] for row in conn.execute(f"""
+        SELECT {period}, country_code, AVG(tone_internal), AVG(tone_external), AVG(dissonance), COUNT(*)
+        FROM sentiment GROUP BY 1, 2
+    """)}
+
+
+def _rolled(conn, grain):
+    return {(row[0], row[1]): row[2:] for row in conn.execute(f"""
+        SELECT period, key, sum_tone_internal / n_tone_internal, sum_tone_external / n_tone_external,
+               sum_dissonance / n_dissonance, samples
+        FROM {grain} WHERE scope = 'country'
+    """)}
+
+
+def _assert_matches(conn):
+    for grain in rollup.GRAINS:
+        raw, rolled = _raw(conn, grain), _rolled(conn, grain)
+        assert rolled.keys() == raw.keys()
+        for key, values in raw.items():
+            assert rolled[key] == pytest.approx(values), (grain, key)
+
+
+def test_rollups_equal_raw_averages(db_path):
+    conn = migrate.connect(db_path)
+    _assert_matches(conn)
+
+
+def test_refresh_only_reads_past_the_watermark(db_path):
+    conn = migrate.connect(db_path)
+    assert rollup.refresh(conn) == 0
+    last = rollup.get_watermark(conn)
+    conn.execute("""
+        INSERT INTO sentiment (country_code, timestamp, tone_internal, tone_external, dissonance,
+                               article_count_internal, article_count_external)
+        SELECT country_code, '2026-02-16T06:00:00', tone_internal + 1, tone_external - 1, dissonance + 2, 3, 4
+        FROM sentiment WHERE timestamp LIKE '2026-02-15%'
+    """)
+    added = conn.execute("SELECT COUNT(*) FROM sentiment WHERE rowid > ?", (last,)).fetchone()[0]
+    assert rollup.refresh(conn) == added
+    assert rollup.get_watermark(conn) > last
+    assert rollup.refresh(conn) == 0
+    _assert_matches(conn)
+
+
+def test_rebuild_from_a_day_matches_raw(db_path):
+    conn = migrate.connect(db_path)
+    conn.execute("UPDATE sentiment SET tone_internal = tone_internal + 5 WHERE timestamp >= '2026-02-10'")
+    rollup.rebuild(conn, '2026-02-10')
+    _assert_matches(conn)
+
+
+def test_region_rows_count_distinct_countries(db_path):
+    conn = migrate.connect(db_path)
+    rows = conn.execute("""
+        SELECT d.period, d.key, d.country_count,
+               (SELECT COUNT(DISTINCT s.country_code) FROM sentiment s JOIN countries c ON s.country_code = c.code
+                WHERE c.region = d.key AND substr(s.timestamp, 1, 10) = d.period)
+        FROM sentiment_daily d WHERE d.scope = 'region'
+    """).fetchall()
+    assert rows
+    assert all(count == expected for _period, _key, count, expected in rows)
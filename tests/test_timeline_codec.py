@@ -0,0 +1,54 @@
+import json
+import math
+
+import pytest
+
+import timeline_codec
+
+
+def _daily(days, skip=()):
+    return [{'date': f"202602{d:02d}T000000", 'tone': round(-2 + 0.37 * d, 2)}
+            for d in range(1, days + 1) if d not in skip]
+
+
+@pytest.mark.parametrize('points', [
+    [],
+    _daily(1),
+    _daily(14),
+    _daily(14, skip=(3, 4, 9)),
+])
+def test_packed_round_trip(points):
+    packed = timeline_codec.encode(points)
+    assert timeline_codec.is_packed(packed)
+    assert timeline_codec.decode(packed, 15) == points
+
+
+def test_unpackable_timelines_stay_json():
+    irregular = [{'date': '20260201T000000', 'tone': 1.0}, {'date': '20260201T060000', 'tone': 2.0},
+                 {'date': '20260201T100000', 'tone': 3.0}]
+    assert timeline_codec.encode(irregular) is None
+    value = timeline_codec.encode_db_value(irregular)
+    assert isinstance(value, str)
+    assert timeline_codec.decode(value) == irregular
+
+
+def test_to_array_keeps_gaps_and_axis():
+    points = _daily(5, skip=(2,))
+    tones, base, step = timeline_codec.to_array(timeline_codec.encode(points))
+    assert step == 86400 and len(tones) == 5
+    assert math.isnan(tones[1])
+    assert [round(float(t), 2) for t in tones if not math.isnan(t)] == [p['tone'] for p in points]
+    # JSON text (unmigrated rows) lands on the same axis
+    assert timeline_codec.to_array(json.dumps(points))[1:] == (base, step)
+
+
+def test_migrate_rows_packs_json_text(db_path):
+    import migrate
+
+    conn = migrate.connect(db_path)
+    points = _daily(7)
+    conn.execute("UPDATE sentiment SET timeline_internal = ? WHERE rowid = 1", (json.dumps(points),))
+    timeline_codec.migrate_rows(conn)
+    value = conn.execute("SELECT timeline_internal FROM sentiment WHERE rowid = 1").fetchone()[0]
+    assert timeline_codec.is_packed(value)
+    assert timeline_codec.decode(value, 15) == points
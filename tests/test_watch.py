@@ -0,0 +1,99 @@
+import sqlite3
+
+import pytest
+
+import generate_pulse_report as report
+from pulse_db import PulseDB
+
+START, END = '2026-02-09', '2026-02-15'
+
+
+def _signatures(db_path):
+    db = PulseDB(db_path)
+    try:
+        with db.read_transaction():
+            return report.table_signatures(db, START, END)
+    finally:
+        db.close()
+
+
+def _changed_after(db_path, statement):
+    before = _signatures(db_path)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(statement)
+    conn.close()
+    return report.changed_sections(before, _signatures(db_path))
+
+
+def test_unchanged_database_rebuilds_nothing(db_path):
+    assert report.changed_sections(_signatures(db_path), _signatures(db_path)) == set()
+
+
+def test_timeline_only_update_invalidates_sentiment_sections(db_path):
+    changed = _changed_after(db_path, """
+        UPDATE sentiment SET timeline_internal = timeline_internal || x'00000000'
+        WHERE rowid = (SELECT MAX(rowid) FROM sentiment WHERE timestamp <= '2026-02-15T23:59:59')
+    """)
+    assert changed == {'tense', 'dissonance', 'shifts'}
+
+
+def test_in_place_analysis_update_invalidates_its_sections(db_path):
+    changed = _changed_after(db_path, """
+        UPDATE analyses SET tension_level = CASE tension_level WHEN 'critical' THEN 'low' ELSE 'critical' END
+        WHERE rowid = (SELECT MAX(rowid) FROM analyses WHERE timestamp <= '2026-02-15T23:59:59')
+    """)
+    assert changed == {'tense', 'dissonance'}
+
+
+@pytest.mark.parametrize('statement, sections', [
+    # Same length and same totals: only the content differs
+    ("UPDATE analyses SET summary_en = upper(summary_en) WHERE timestamp = '2026-02-12T00:00:00'",
+     {'tense', 'dissonance'}),
+    ("UPDATE analyses SET context_en = upper(context_en) WHERE timestamp = '2026-02-12T00:00:00'",
+     {'tense', 'dissonance'}),
+    ("""UPDATE analyses SET tension_level = CASE tension_level WHEN 'high' THEN 'HIGH' ELSE 'high' END
+        WHERE timestamp = '2026-02-12T00:00:00'""", {'tense', 'dissonance'}),
+    ("""UPDATE sentiment SET timeline_internal = timeline_external, timeline_external = timeline_internal
+        WHERE rowid = (SELECT MAX(rowid) FROM sentiment WHERE timestamp <= '2026-02-15T23:59:59')""",
+     {'tense', 'dissonance', 'shifts'}),
+])
+def test_same_length_rewrite_invalidates_its_sections(db_path, statement, sections):
+    assert _changed_after(db_path, statement) == sections
+
+
+def test_rows_outside_the_period_are_ignored(db_path):
+    changed = _changed_after(db_path, """
+        UPDATE articles SET tone = tone + 1 WHERE fetched_at < '2026-02-01'
+    """)
+    assert changed == set()
+
+
+def test_rows_the_rollup_has_not_seen_are_read_raw(db_path):
+    raw = """
+        SELECT AVG(tone_internal), AVG(tone_external), AVG(dissonance),
+               SUM(article_count_internal), SUM(article_count_external)
+        FROM sentiment WHERE timestamp >= '2026-02-09' AND timestamp <= '2026-02-15T23:59:59'
+    """
+    # Written the way the fill step does: straight into sentiment, no rollup refresh
+    changed = _changed_after(db_path, """
+        INSERT INTO sentiment (country_code, timestamp, tone_internal, tone_external, dissonance,
+                               article_count_internal, article_count_external)
+        SELECT country_code, '2026-02-15T12:30:00', tone_internal - 6, tone_external + 6, dissonance + 12, 5, 5
+        FROM sentiment WHERE timestamp LIKE '2026-02-15T00%'
+    """)
+    assert {'overview', 'regional'} <= changed
+    conn = sqlite3.connect(db_path)
+    expected = conn.execute(raw).fetchone()
+    regions = dict(conn.execute("""
+        SELECT c.region, AVG(s.dissonance) FROM sentiment s JOIN countries c ON s.country_code = c.code
+        WHERE s.timestamp >= '2026-02-09' AND s.timestamp <= '2026-02-15T23:59:59' GROUP BY c.region
+    """).fetchall())
+    added = conn.execute("SELECT COUNT(*) FROM sentiment WHERE timestamp = '2026-02-15T12:30:00'").fetchone()[0]
+    conn.close()
+    snapshot = report.ReportSnapshot(db_path, START, END).load({'overview', 'regional'})
+    overview = snapshot.overview
+    assert (overview['avg_internal'], overview['avg_external'], overview['avg_dissonance'],
+            overview['total_internal'], overview['total_external']) == pytest.approx(expected)
+    assert {row['region']: row['avg_dissonance'] for row in snapshot.regions} == pytest.approx(regions)
+    assert snapshot.rollup_lag == added > 0